@@ -0,0 +1,335 @@
+# alerts.py
+"""
+Streaming coverage alerts, run at the end of each scraper ingest.
+- Constant-size state: per source / tonality an EWMA baseline of daily counts,
+  an EWMA negative share, and count-min sketches (today vs. baseline) for terms
+- Each ingest updates the state in O(new rows); history is never rescanned
+- Mentions count toward the day they were published (Nairobi), not the day they were
+  ingested; ones dated before the day the state has moved on to are too late to count
+- Flags volume spikes, negative-share jumps and fast-rising terms
+- Alerts go to sinks: a JSON-lines file, a webhook, or MemorySink in tests
+
+State lives in state/alerts.pkl (cached between workflow runs with the rest of state/).
+"""
+
+import json
+import os
+import pickle
+import re
+import zlib
+from datetime import date, datetime, timedelta, timezone
+from urllib.request import Request, urlopen
+
+import numpy as np
+
+from helb_data import atomic_write
+from outlets import outlet, resolve
+
+# ---------------- CONFIG ----------------
+STATE_DIR = os.environ.get("HELB_STATE_DIR", "state")
+STATE_PATH = os.path.join(STATE_DIR, "alerts.pkl")
+ALERTS_LOG = os.path.join(STATE_DIR, "alerts.jsonl")
+WEBHOOK_URL = os.environ.get("HELB_ALERT_WEBHOOK", "")
+
+HALF_LIFE_DAYS = 7        # baselines forget half their weight in a week
+MAX_SOURCES = 50          # outlets tracked individually; the rest share "Other"
+MIN_COUNT = 5             # ignore spikes smaller than this many mentions a day
+SPIKE_Z = 3.0             # today's count vs. baseline mean, in baseline std devs
+SHARE_JUMP = 0.20         # negative share above baseline that raises an alert
+MIN_TERM_COUNT = 4        # a rising term needs at least this many mentions today
+TERM_RATIO = 4.0          # ... and this many times its baseline daily count
+SKETCH_WIDTH = 2048
+SKETCH_DEPTH = 4
+STATE_FORMAT = 2          # 2: per-source baselines keyed by outlet id (outlets.resolve)
+OTHER = "Other"
+
+ALPHA = 1 - 0.5 ** (1 / HALF_LIFE_DAYS)
+NAIROBI = timezone(timedelta(hours=3), "Africa/Nairobi")   # the sheet's "published" dates are Nairobi days
+
+STOP_WORDS = {
+    "helb", "kenya", "kenyan", "higher", "education", "loans", "loan", "board", "said", "says",
+    "with", "from", "that", "this", "have", "will", "their", "they", "after", "over", "into",
+    "about", "more", "been", "were", "what", "when", "which", "while", "also", "than", "amid",
+}
+_TOKEN = re.compile(r"\b[a-z][a-z]{3,}\b")
+
+
+def terms(text):
+    return {t for t in _TOKEN.findall(str(text).lower()) if t not in STOP_WORDS}
+
+
+def published_day(mention):
+    """The mention's "published" date (YYYY-MM-DD), or None."""
+    try:
+        return date.fromisoformat(str(mention.get("published", "")).strip()[:10])
+    except ValueError:
+        return None
+
+
+# ---------------- SKETCH ----------------
+class CountMinSketch:
+    """Fixed-size approximate counter; estimates never undercount."""
+
+    def __init__(self, width=SKETCH_WIDTH, depth=SKETCH_DEPTH):
+        self.table = np.zeros((depth, width), dtype=np.float32)
+
+    def _cells(self, term):
+        data = term.encode("utf-8")
+        width = self.table.shape[1]
+        return [(row, zlib.crc32(data, row * 0x9E3779B1 & 0xFFFFFFFF) % width) for row in range(self.table.shape[0])]
+
+    def add(self, term, n=1.0):
+        for row, col in self._cells(term):
+            self.table[row, col] += n
+
+    def estimate(self, term):
+        return float(min(self.table[row, col] for row, col in self._cells(term)))
+
+
+# ---------------- BASELINES ----------------
+class Baseline:
+    """EWMA mean / variance of a daily count, plus the running count for today."""
+
+    __slots__ = ("mean", "var", "days", "today")
+
+    def __init__(self):
+        self.mean, self.var, self.days, self.today = 0.0, 0.0, 0, 0
+
+    def roll(self, gap_days):
+        """Close today's count (and `gap_days - 1` empty days) into the baseline."""
+        for count in [self.today] + [0] * max(gap_days - 1, 0):
+            delta = count - self.mean
+            self.mean += ALPHA * delta
+            self.var = (1 - ALPHA) * (self.var + ALPHA * delta * delta)
+            self.days += 1
+        self.today = 0
+
+    @classmethod
+    def merged(cls, baselines):
+        """One baseline for sources now counted as one outlet (their daily counts add up)."""
+        total = cls()
+        for b in baselines:
+            total.mean += b.mean
+            total.var += b.var
+            total.today += b.today
+            total.days = max(total.days, b.days)
+        return total
+
+    def is_spike(self):
+        if self.days < 3 or self.today < MIN_COUNT:
+            return False
+        return self.today > self.mean + SPIKE_Z * max(self.var ** 0.5, 1.0)
+
+
+class DetectorState:
+    def __init__(self):
+        self.day = None
+        self.total = Baseline()
+        self.sources = {}
+        self.tonalities = {}
+        self.neg_share = None      # EWMA of daily negative share
+        self.neg_today = 0
+        self.terms_today = CountMinSketch()
+        self.terms_baseline = CountMinSketch()
+        self.alerted = set()       # (kind, key) already raised today
+        self.late = 0              # mentions published before `day`, not counted
+        self.format = STATE_FORMAT
+
+
+def migrate(state):
+    """Bring a state saved by an older version up to STATE_FORMAT. Format 1 keyed sources by
+    their raw spelling ("Daily Nation", "Nation Africa"); those merge into one outlet id."""
+    if getattr(state, "format", 1) < 2:
+        grouped = {}
+        for key, baseline in state.sources.items():
+            grouped.setdefault(key if key == OTHER else resolve(key), []).append(baseline)
+        state.sources = {key: Baseline.merged(group) for key, group in grouped.items()}
+        state.alerted = {
+            (kind, resolve(key) if kind == "source_spike" and key != OTHER else key) for kind, key in state.alerted
+        }
+    if not hasattr(state, "late"):
+        state.late = 0
+    state.format = STATE_FORMAT
+    return state
+
+
+# ---------------- SINKS ----------------
+class FileSink:
+    def __init__(self, path=ALERTS_LOG):
+        self.path = path
+
+    def send(self, alert):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(alert) + "\n")
+
+
+class WebhookSink:
+    def __init__(self, url=WEBHOOK_URL):
+        self.url = url
+
+    def send(self, alert):
+        body = json.dumps({"text": alert["message"], "alert": alert}).encode("utf-8")
+        req = Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urlopen(req, timeout=10):
+            pass
+
+
+class MemorySink:
+    """Stand-in for tests: keeps alerts in a list."""
+
+    def __init__(self):
+        self.alerts = []
+
+    def send(self, alert):
+        self.alerts.append(alert)
+
+
+def default_sinks():
+    sinks = [FileSink()]
+    if WEBHOOK_URL:
+        sinks.append(WebhookSink())
+    return sinks
+
+
+# ---------------- DETECTOR ----------------
+class CoverageDetector:
+    def __init__(self, state=None, sinks=None):
+        self.state = state or DetectorState()
+        self.sinks = default_sinks() if sinks is None else sinks
+
+    @classmethod
+    def load(cls, path=STATE_PATH, sinks=None):
+        state = None
+        if os.path.exists(path):
+            with open(path, "rb") as fh:
+                state = migrate(pickle.load(fh))
+        return cls(state, sinks)
+
+    def save(self, path=STATE_PATH):
+        atomic_write(path, lambda fh: pickle.dump(self.state, fh), "wb")
+
+    def _source_key(self, source):
+        source = resolve(str(source or ""))   # an outlet id resolves to itself
+        if source in self.state.sources or len(self.state.sources) < MAX_SOURCES:
+            return source
+        return OTHER
+
+    def _roll_day(self, day):
+        s = self.state
+        if s.day is None:
+            s.day = day
+            return
+        gap = (day - s.day).days
+        if gap <= 0:
+            return
+        total_today = s.total.today
+        for baseline in [s.total, *s.sources.values(), *s.tonalities.values()]:
+            baseline.roll(gap)
+        if total_today:
+            share = s.neg_today / total_today
+            s.neg_share = share if s.neg_share is None else s.neg_share + ALPHA * (share - s.neg_share)
+        # today's term counts fold into the baseline; empty gap days decay it
+        decay = (1 - ALPHA) ** gap
+        s.terms_baseline.table *= decay
+        s.terms_baseline.table += (1 - decay) * s.terms_today.table
+        s.terms_today = CountMinSketch(*s.terms_today.table.shape[::-1])
+        s.neg_today = 0
+        s.alerted = set()
+        s.day = day
+
+    def update(self, mentions, day=None):
+        """Fold one ingest's new mentions (dicts with title/summary/published/outlet/tonality)
+        into the state and return the alerts it raised. Each mention counts toward its published
+        day; `day` (default: today in Nairobi) stands in for missing or future dates.
+        Cost is O(len(mentions))."""
+        today = day or datetime.now(NAIROBI).date()
+        by_day = {}
+        for m in mentions:
+            by_day.setdefault(min(published_day(m) or today, today), []).append(m)
+
+        alerts = []
+        for d in sorted(by_day):
+            if self.state.day is not None and d < self.state.day:
+                # that day is already folded into the baselines
+                self.state.late += len(by_day[d])
+                continue
+            self._roll_day(d)
+            alerts += self._detect(*self._count(by_day[d]))
+
+        alerts = [a for a in alerts if a is not None]
+        for alert in alerts:
+            for sink in self.sinks:
+                try:
+                    sink.send(alert)
+                except Exception as e:
+                    print(f"⚠️ Alert sink {type(sink).__name__} failed: {e}")
+        return alerts
+
+    def _count(self, mentions):
+        """Add one day's mentions to today's counts; returns what they touched."""
+        s = self.state
+        touched_sources, touched_tonalities, batch_terms = set(), set(), set()
+        for m in mentions:
+            source = self._source_key(m.get("outlet") or m.get("source"))
+            tonality = str(m.get("tonality", "")).strip().capitalize() or "Unknown"
+            s.total.today += 1
+            s.sources.setdefault(source, Baseline()).today += 1
+            s.tonalities.setdefault(tonality, Baseline()).today += 1
+            touched_sources.add(source)
+            touched_tonalities.add(tonality)
+            if tonality == "Negative":
+                s.neg_today += 1
+            for term in terms(f"{m.get('title', '')} {m.get('summary', '')}"):
+                s.terms_today.add(term)
+                batch_terms.add(term)
+        return touched_sources, touched_tonalities, batch_terms
+
+    def _detect(self, touched_sources, touched_tonalities, batch_terms):
+        s = self.state
+        alerts = []
+        if s.total.is_spike():
+            alerts.append(self._alert("volume_spike", "all", s.total, f"{s.total.today} mentions on {s.day} vs ~{s.total.mean:.1f}/day"))
+        for source in touched_sources:
+            b = s.sources[source]
+            if b.is_spike():
+                alerts.append(self._alert("source_spike", source, b, f"{outlet(source).name}: {b.today} mentions on {s.day} vs ~{b.mean:.1f}/day"))
+        for tonality in touched_tonalities:
+            b = s.tonalities[tonality]
+            if b.is_spike():
+                alerts.append(self._alert("tonality_spike", tonality, b, f"{tonality}: {b.today} mentions on {s.day} vs ~{b.mean:.1f}/day"))
+        if s.neg_share is not None and s.total.today >= MIN_COUNT:
+            share = s.neg_today / s.total.today
+            if share - s.neg_share >= SHARE_JUMP:
+                alerts.append(self._alert(
+                    "negative_share", "all", None,
+                    f"Negative share {share:.0%} on {s.day} vs ~{s.neg_share:.0%} baseline",
+                    share=round(share, 3), baseline_share=round(s.neg_share, 3),
+                ))
+        # Terms need a few days of baseline, or everything looks new
+        for term in batch_terms if s.total.days >= 3 else ():
+            today, base = s.terms_today.estimate(term), s.terms_baseline.estimate(term)
+            if today >= MIN_TERM_COUNT and today > TERM_RATIO * (base + 1):
+                alerts.append(self._alert(
+                    "rising_term", term, None, f"'{term}' in {today:.0f} mentions on {s.day} vs ~{base:.1f}/day",
+                    today=today, baseline=round(base, 2),
+                ))
+        return alerts
+
+    def _alert(self, kind, key, counts, message, **extra):
+        if (kind, key) in self.state.alerted:
+            return None
+        self.state.alerted.add((kind, key))
+        alert = {"kind": kind, "key": key, "day": str(self.state.day), "message": message}
+        if counts is not None:
+            alert.update(today=counts.today, baseline=round(counts.mean, 2))
+        alert.update(extra)
+        return alert
+
+
+def run_alerts(mentions, path=STATE_PATH, sinks=None, day=None):
+    """Scraper stage: load state, update it with the new mentions, save it."""
+    detector = CoverageDetector.load(path, sinks)
+    alerts = detector.update(mentions, day=day)
+    detector.save(path)
+    return alerts
@@ -2,6 +2,8 @@
 import streamlit as st
 import pandas as pd
 
+from app_data import get_csv_store, show_memory_report
+
 # -------------------------------
 # Page configuration
 # -------------------------------
@@ -17,11 +19,12 @@ st.write("Welcome! Use the sidebar to navigate to different pages.")
 # -------------------------------
 # Load dataset once
 # -------------------------------
-CSV_URL = "https://docs.google.com/spreadsheets/d/10LcDId4y2vz5mk7BReXL303-OBa2QxsN3drUcefpdSQ/export?format=csv"
-
-@st.cache_data(ttl=3600)  # cache for 1 hour
-def load_data():
-    df = pd.read_csv(CSV_URL)
+# The raw sheet is shared by all pages (app_data); it is reloaded only when the
+# scraper's version marker changes, so no fixed TTL is needed here. The derived
+# frame is one read-only object per process, shared by every session.
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_data(version_key, _raw):
+    df = _raw
 
     # Rename columns
     col_map = {
@@ -44,10 +47,9 @@ def load_data():
 
     return df
 
-if "mentions_df" not in st.session_state:
-    st.session_state["mentions_df"] = load_data()
-
-df = st.session_state["mentions_df"]
+version_key, raw_df = get_csv_store().snapshot()
+df = load_data(version_key, raw_df)
+show_memory_report(df, version_key, "overview")
 
 # -------------------------------
 # Quick Summary Stats
@@ -71,4 +73,4 @@ with col3:
 # -------------------------------
 # Extra info for user
 # -------------------------------
-st.info("✅ Data is automatically limited to the last 5 years and cached for faster loading.")
+st.info("✅ Data is automatically limited to the last 5 years and reloaded only when new mentions arrive.")
@@ -0,0 +1,54 @@
+# app_data.py
+"""
+Streamlit-side handles on the shared mentions data.
+Stores are cached with st.cache_resource, so every page and session in the
+process shares one copy and one version probe (see helb_data.MentionsStore).
+"""
+
+import os
+
+import streamlit as st
+
+from helb_data import CSV_URL, CsvSource, MentionsStore, SheetsApiSource, memory_report
+
+SHEETS_SCOPE = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
+
+
+@st.cache_resource(show_spinner=False)
+def get_csv_store(location=CSV_URL):
+    return MentionsStore(CsvSource(location))
+
+
+@st.cache_resource(show_spinner=False)
+def get_sheet_store(sheet_id: str):
+    # HELB_CSV_URL bypasses the Sheets API (e.g. a local CSV for benchmarks)
+    if os.environ.get("HELB_CSV_URL"):
+        return get_csv_store(os.environ["HELB_CSV_URL"])
+
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    # Attempt to authenticate via st.secrets first, otherwise fall back to local file
+    if "gcp_service_account" in st.secrets:
+        # st.secrets["gcp_service_account"] should be the parsed JSON (dict)
+        creds = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=SHEETS_SCOPE)
+    elif os.path.exists("service_account.json"):
+        creds = Credentials.from_service_account_file("service_account.json", scopes=SHEETS_SCOPE)
+    else:
+        raise FileNotFoundError("No GCP service account available. Add st.secrets['gcp_service_account'] or service_account.json in app root.")
+    client = gspread.authorize(creds)
+    return MentionsStore(SheetsApiSource(client.open_by_key(sheet_id)))
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _memory_report(page, version_key, _df):
+    return memory_report(_df)
+
+
+def show_memory_report(df, version_key, page):
+    """Sidebar expander with the resident size of the frame a page works on."""
+    report = _memory_report(page, version_key, df)
+    total = report.iloc[-1]
+    with st.sidebar.expander("🧠 Memory usage"):
+        st.caption(f"{len(df):,} mentions · {total['bytes'] / 1e6:.1f} MB · {total['bytes_per_mention']:.0f} B per mention")
+        st.dataframe(report, hide_index=True, use_container_width=True)
@@ -0,0 +1,358 @@
+# bench/load_test.py
+"""
+Concurrent-session load test for app.py and the pages under pages/.
+
+Each level starts one local `streamlit run` server and opens N browser sessions
+against it over Streamlit's websocket protocol, so the sessions share the
+server's caches (cache_data / cache_resource, the CSV store) and its GIL, as
+real viewers do. All N sessions connect first and are then released together.
+Sessions click slicers, search keywords and page through mentions against a
+synthetic CSV (HELB_CSV_URL) and a throwaway overrides file (HELB_OVERRIDES_CSV).
+
+Every level gets a fresh server, so its first reruns pay the cold load, as after
+a restart. A rerun is timed from sending it to the server's "script finished";
+latencies include failed reruns, and any page exception fails the run. The
+server's RSS (now and peak, from /proc, so Linux only) is reported per level.
+The client side needs `websockets` >= 13, which Streamlit installs.
+
+Usage:
+    python bench/load_test.py --rows 5000 --levels 1,5,10,25,50 --actions 5 --out bench_output.txt
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.startup import discover_pages  # noqa: E402
+from bench.synthetic import write_csv  # noqa: E402
+
+KEYWORDS = ["loan", "disbursement", "repayment", "wings", "funding model", "budget"]
+WIDGETS = ["multiselect", "selectbox", "radio", "number_input", "slider", "text_input"]
+
+
+# ---------------- SCENARIOS ----------------
+# Each takes (PageView, rng) and sets widgets for one user interaction; the caller times the rerun.
+def act_overview(view, rng):
+    pass
+
+
+def act_dashboard(view, rng):
+    choice = rng.randrange(4)
+    if choice == 0:
+        quarters = view.sidebar("multiselect")[2]
+        view.set(quarters, rng.sample(list(quarters.options), min(len(quarters.options), rng.randint(0, 2))))
+    elif choice == 1:
+        months = view.sidebar("multiselect")[3]
+        view.set(months, rng.sample(list(months.options), min(len(months.options), rng.randint(0, 3))))
+    elif choice == 2:
+        view.set(view.sidebar("text_input")[0], rng.choice(KEYWORDS + [""]))
+    else:
+        fys = view.sidebar("multiselect")[1]
+        view.set(fys, rng.sample(list(fys.options), min(len(fys.options), rng.randint(0, 1))))
+
+
+def act_mentions(view, rng):
+    page = view.sidebar("number_input")[0]
+    if rng.random() < 0.7:
+        view.set(page, min(page.max, view.value(page) + 1))
+    else:
+        view.set(page, rng.randint(int(page.min), int(page.max)))
+
+
+def act_keywords(view, rng):
+    choice = rng.randrange(3)
+    if choice == 0:
+        view.set(view.sidebar("selectbox")[0], rng.choice(["All", "Positive", "Neutral", "Negative"]))
+    elif choice == 1:
+        sources = view.sidebar("selectbox")[1]
+        view.set(sources, rng.choice(list(sources.options)))
+    else:
+        view.set(view.main("slider")[0], [rng.randint(5, 20)])
+
+
+def act_search(view, rng):
+    if rng.random() < 0.8:
+        query = rng.choice(KEYWORDS)
+        view.set(view.main("text_input")[0], f'"{query}"' if " " in query else query)
+    else:
+        sources = view.sidebar("multiselect")[0]
+        view.set(sources, rng.sample(list(sources.options), min(len(sources.options), 2)))
+
+
+def act_reports(view, rng):
+    if rng.random() < 0.3:
+        kinds = view.sidebar("radio")[0]
+        view.set(kinds, rng.choice(list(kinds.options)))
+    else:
+        periods = view.sidebar("selectbox")[0]
+        view.set(periods, rng.choice(list(periods.options)))
+
+
+SCENARIOS = {
+    "app.py": act_overview,
+    "pages/1_Dashboard.py": act_dashboard,
+    "pages/2_Mentions.py": act_mentions,
+    "pages/3_Keyword_Trends.py": act_keywords,
+    "pages/4_Search.py": act_search,
+    "pages/5_Reports.py": act_reports,
+}
+
+
+# ---------------- SESSION: one browser tab over the websocket ----------------
+class PageView:
+    """What a browser holds for one session: the widgets of the last run and their values."""
+
+    def __init__(self):
+        self.elements = {}      # delta path -> (widget type, proto)
+        self.states = {}        # widget id -> WidgetState sent with every rerun
+        self.errors = []
+
+    def handle(self, msg):
+        """Apply one ForwardMsg; True once the script run is over."""
+        kind = msg.WhichOneof("type")
+        if kind == "new_session":
+            self.elements, self.errors = {}, []
+        elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            element = msg.delta.new_element
+            etype = element.WhichOneof("type")
+            if etype in WIDGETS:
+                self.elements[tuple(msg.metadata.delta_path)] = (etype, getattr(element, etype))
+            elif etype == "exception":
+                self.errors.append(f"{element.exception.type}: {element.exception.message}")
+        elif kind == "page_not_found":
+            self.errors.append("page not found")
+        return kind == "script_finished"
+
+    def _widgets(self, etype, container):
+        return [proto for path, (t, proto) in sorted(self.elements.items()) if t == etype and path[0] == container]
+
+    def main(self, etype):
+        return self._widgets(etype, 0)
+
+    def sidebar(self, etype):
+        return self._widgets(etype, 1)
+
+    def value(self, widget):
+        state = self.states.get(widget.id)
+        return state.double_value if state is not None else widget.default
+
+    def set(self, widget, value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        state = WidgetState(id=widget.id)
+        if isinstance(value, list):
+            # multiselect options go by their labels; slider values are numbers
+            target = state.string_array_value if all(isinstance(v, str) for v in value) else state.double_array_value
+            target.data.extend(value)
+        elif isinstance(value, str):
+            state.string_value = value
+        else:
+            state.double_value = value
+        self.states[widget.id] = state
+
+    def rerun(self, page_name):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        msg = BackMsg()
+        msg.rerun_script.page_name = page_name   # the page's URL path, as a browser would send it
+        msg.rerun_script.widget_states.widgets.extend(self.states.values())
+        return msg.SerializeToString()
+
+
+async def run_session(url, page, actions, timeout, seed, start):
+    """Connect, await `start` (the whole level connected), then rerun the page;
+    returns (timings, errors)."""
+    from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+    from websockets.asyncio.client import connect
+
+    act = SCENARIOS.get(page, act_overview)
+    page_name = "" if page == "app.py" else re.sub(r"^\d+_", "", os.path.splitext(os.path.basename(page))[0])
+    rng = random.Random(seed)
+    view, timings = PageView(), []
+    try:
+        ws = await connect(url, subprotocols=["streamlit"], max_size=None, open_timeout=timeout)
+    except Exception as e:
+        await start()
+        return timings, [f"could not connect: {type(e).__name__}: {e}"]
+
+    async def run_script():
+        await ws.send(view.rerun(page_name))
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await ws.recv())
+            if view.handle(msg):
+                return
+
+    async with ws:
+        await start()
+        try:
+            for n in range(actions + 1):
+                if n:
+                    act(view, rng)
+                t0 = time.perf_counter()
+                try:
+                    await asyncio.wait_for(run_script(), timeout)
+                finally:
+                    timings.append(time.perf_counter() - t0)
+                if view.errors:
+                    break
+        except Exception as e:
+            return timings, [f"{type(e).__name__}: {e}" if str(e) else type(e).__name__]
+    return timings, view.errors
+
+
+# ---------------- SERVER ----------------
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(env, timeout):
+    port = free_port()
+    cmd = [
+        sys.executable, "-m", "streamlit", "run", os.path.join(ROOT, "app.py"),
+        "--server.headless=true", f"--server.port={port}", "--server.address=127.0.0.1",
+        "--server.fileWatcherType=none", "--browser.gatherUsageStats=false",
+        "--server.enableXsrfProtection=false",
+    ]
+    log = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            log.seek(0)
+            sys.exit(f"❌ streamlit exited with {proc.returncode}:\n{log.read()[-2000:]}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as resp:
+                if resp.status == 200:
+                    return proc, port, log
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    sys.exit(f"❌ streamlit did not come up within {timeout:.0f}s")
+
+
+def server_rss_mb(pid):
+    """(current, peak) resident size of the server process, from /proc."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="utf-8") as fh:
+            fields = dict(line.split(":", 1) for line in fh if ":" in line)
+        return int(fields["VmRSS"].split()[0]) / 1024, int(fields["VmHWM"].split()[0]) / 1024
+    except (OSError, KeyError, ValueError):
+        return float("nan"), float("nan")
+
+
+# ---------------- LEVEL: N sessions on one server ----------------
+async def drive_level(url, page, sessions, args):
+    go, arrived = asyncio.Event(), 0
+
+    # every session has its websocket open before any of them asks for a run
+    async def start():
+        nonlocal arrived
+        arrived += 1
+        if arrived == sessions:
+            go.set()
+        await go.wait()
+
+    return await asyncio.gather(*(
+        run_session(url, page, args.actions, args.timeout, args.seed + n, start) for n in range(sessions)
+    ))
+
+
+def run_level(page, sessions, args, env):
+    proc, port, log = start_server(env, args.timeout)
+    try:
+        results = asyncio.run(drive_level(f"ws://127.0.0.1:{port}/_stcore/stream", page, sessions, args))
+        rss, peak = server_rss_mb(proc.pid)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        log.close()
+
+    latencies, errors, failed = [], Counter(), 0
+    for timings, errs in results:
+        latencies.extend(timings)
+        errors.update(errs)
+        failed += bool(errs)
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else float("nan")
+    return {
+        "page": page,
+        "sessions": sessions,
+        "failed": failed,
+        "reruns": len(latencies),
+        "p50_s": pick(0.50),
+        "p95_s": pick(0.95),
+        "server_rss_mb": rss,
+        "server_peak_mb": peak,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rerun latency and server RSS under concurrent sessions.")
+    parser.add_argument("--rows", type=int, default=5000, help="synthetic mentions to load")
+    parser.add_argument("--levels", default="1,5,10,25,50", help="comma-separated session counts")
+    parser.add_argument("--actions", type=int, default=5, help="interactions per session after first render")
+    parser.add_argument("--pages", help="comma-separated subset, e.g. pages/1_Dashboard.py")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--out", help="also write the report to this file")
+    args = parser.parse_args()
+
+    pages = args.pages.split(",") if args.pages else discover_pages()
+    levels = [int(n) for n in args.levels.split(",")]
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            HELB_CSV_URL=write_csv(os.path.join(tmp, "mentions.csv"), args.rows),
+            HELB_OVERRIDES_CSV=os.path.join(tmp, "tonality_overrides.csv"),
+            HELB_STATE_DIR=os.path.join(tmp, "state"),
+        )
+        total_errors = 0
+        lines = [f"Load test — {args.rows} rows, {args.actions} interactions per session, one server per level", ""]
+        lines.append(
+            f"{'page':28} {'sessions':>8} {'failed':>6} {'reruns':>7} {'p50_s':>8} {'p95_s':>8}"
+            f" {'server_rss_mb':>13} {'server_peak_mb':>14}"
+        )
+        for page in pages:
+            for sessions in levels:
+                r = run_level(page, sessions, args, env)
+                lines.append(
+                    f"{page:28} {r['sessions']:>8} {r['failed']:>6} {r['reruns']:>7} {r['p50_s']:>8.3f} {r['p95_s']:>8.3f}"
+                    f" {r['server_rss_mb']:>13.1f} {r['server_peak_mb']:>14.1f}"
+                )
+                print(lines[-1], flush=True)
+                for err, count in r["errors"].most_common():
+                    lines.append(f"    ⚠️ {count}× {err}")
+                    print(lines[-1], flush=True)
+                total_errors += sum(r["errors"].values())
+
+    report = "\n".join(lines)
+    print("\n" + report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(report + "\n")
+    if total_errors:
+        sys.exit(f"❌ {total_errors} error(s) across sessions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# bench/memory.py
+"""
+Resident memory per mention: object-dtype frames vs helb_data.compact_frame.
+The derived columns mirror the Dashboard (tonality_norm, MONTH, FINANCIAL_YEAR, QUARTER).
+
+Usage:
+    python bench/memory.py --rows 100000
+"""
+
+import argparse
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.synthetic import make_mentions  # noqa: E402
+from helb_data import compact_frame, memory_report  # noqa: E402
+
+
+def with_derived(df):
+    parsed = pd.to_datetime(df["published"], errors="coerce")
+    df = df.assign(
+        published_parsed=parsed,
+        tonality_norm=df["tonality"].str.capitalize(),
+        MONTH=parsed.dt.strftime("%b"),
+        FINANCIAL_YEAR=[f"{d.year}/{d.year + 1}" if d.month >= 7 else f"{d.year - 1}/{d.year}" for d in parsed],
+        QUARTER=["Q1" if m in (7, 8, 9) else "Q2" if m in (10, 11, 12) else "Q3" if m <= 3 else "Q4" for m in parsed.dt.month],
+    )
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bytes per mention before and after compaction.")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    baseline = with_derived(make_mentions(args.rows)).astype(
+        {c: object for c in ["title", "published", "source", "summary", "link", "tonality",
+                             "tonality_norm", "MONTH", "FINANCIAL_YEAR", "QUARTER"]}
+    )
+    compact = compact_frame(baseline, categories=["tonality_norm", "MONTH", "FINANCIAL_YEAR", "QUARTER"])
+
+    before = memory_report(baseline).set_index("column")
+    after = memory_report(compact).set_index("column")
+    table = pd.DataFrame({
+        "object_B_per_mention": before["bytes_per_mention"],
+        "compact_dtype": after["dtype"],
+        "compact_B_per_mention": after["bytes_per_mention"],
+    })
+    table["ratio"] = table["object_B_per_mention"] / table["compact_B_per_mention"]
+    print(f"Memory per mention — {args.rows:,} synthetic rows\n")
+    print(table.round(2).to_string())
+
+
+if __name__ == "__main__":
+    main()
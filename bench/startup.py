@@ -0,0 +1,131 @@
+# bench/startup.py
+"""
+Startup-time benchmark for app.py and every page under pages/.
+
+For each page, in a fresh interpreter:
+- cold import: the page's top-level imports, first time in the process
+- warm import: the same imports again (modules already in sys.modules)
+- cold render: first headless AppTest run of the page
+- warm render: a second AppTest run in the same process (caches populated)
+
+Pages read a synthetic local CSV through HELB_CSV_URL, so no network is needed.
+
+Usage:
+    python bench/startup.py --rows 5000 --runs 3 --out bench_output.txt
+"""
+
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Nothing heavy (pandas, streamlit, ...) is imported at module level: the child
+# interpreter must reach the timed page imports with a cold sys.modules.
+METRICS = ["cold_import_s", "warm_import_s", "cold_render_s", "warm_render_s"]
+
+
+def discover_pages():
+    pages = ["app.py"]
+    pages_dir = os.path.join(ROOT, "pages")
+    pages += sorted(os.path.join("pages", f) for f in os.listdir(pages_dir) if f.endswith(".py"))
+    return pages
+
+
+def top_level_imports(path):
+    """Source of the module-level import statements of a page."""
+    with open(path, encoding="utf-8") as fh:
+        tree = ast.parse(fh.read())
+    nodes = [n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(n) for n in nodes)
+
+
+def measure_page(page, timeout):
+    """Runs inside the child interpreter; prints one JSON line."""
+    path = os.path.join(ROOT, page)
+    imports = compile(top_level_imports(path), page, "exec")
+    preloaded = sorted(m for m in ("pandas", "numpy", "streamlit", "plotly") if m in sys.modules)
+
+    t0 = time.perf_counter()
+    exec(imports, {})
+    cold_import = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    exec(imports, {})
+    warm_import = time.perf_counter() - t0
+
+    from streamlit.testing.v1 import AppTest
+
+    renders = []
+    for _ in range(2):
+        at = AppTest.from_file(path, default_timeout=timeout)
+        t0 = time.perf_counter()
+        at.run()
+        renders.append(time.perf_counter() - t0)
+
+    print(json.dumps({
+        "page": page,
+        "cold_import_s": cold_import,
+        "warm_import_s": warm_import,
+        "cold_render_s": renders[0],
+        "warm_render_s": renders[1],
+        "exceptions": [str(e.value) for e in at.exception],
+        "preloaded": preloaded,
+    }))
+
+
+def run_child(page, csv_path, timeout):
+    # Pages that persist state (e.g. the search index) write it next to the CSV, not into the repo
+    env = dict(os.environ, HELB_CSV_URL=csv_path, HELB_STATE_DIR=os.path.join(os.path.dirname(csv_path), "state"))
+    out = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", page, "--timeout", str(timeout)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and first-render time per page.")
+    parser.add_argument("--rows", type=int, default=5000, help="synthetic mentions to load")
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters per page")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--out", help="also write the report to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        measure_page(args.child, args.timeout)
+        return
+
+    # The fixture is written here in the parent, so the children never import pandas early
+    from bench.synthetic import write_csv
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = write_csv(os.path.join(tmp, "mentions.csv"), args.rows)
+        lines = [f"Startup benchmark — {args.rows} rows, median of {args.runs} run(s)", ""]
+        lines.append(f"{'page':32} " + " ".join(f"{m:>14}" for m in METRICS))
+        for page in discover_pages():
+            results = [run_child(page, csv_path, args.timeout) for _ in range(args.runs)]
+            medians = [statistics.median(r[m] for r in results) for m in METRICS]
+            lines.append(f"{page:32} " + " ".join(f"{v:>14.3f}" for v in medians))
+            for err in results[-1]["exceptions"]:
+                lines.append(f"    ⚠️ {err}")
+            if results[-1]["preloaded"]:
+                lines.append(f"    ⚠️ already imported before timing: {', '.join(results[-1]['preloaded'])}")
+
+    report = "\n".join(lines)
+    print(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as fh:
+            fh.write(report + "\n")
+
+
+if __name__ == "__main__":
+    main()
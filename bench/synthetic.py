@@ -0,0 +1,61 @@
+# bench/synthetic.py
+"""
+Synthetic HELB mentions for offline benchmarks.
+- Same columns as the sheet the scraper writes (see HEADERS in scraper_to_sheets.py)
+- Deterministic for a given seed, so runs are comparable
+"""
+
+import argparse
+import random
+
+import pandas as pd
+
+HEADERS = ["title", "published", "source", "summary", "link", "tonality"]
+
+SOURCES = [
+    "Nation Africa", "The Standard", "The Star", "Citizen Digital", "Kenyans.co.ke",
+    "Capital FM", "KBC", "People Daily", "Business Daily", "Tuko",
+]
+TONALITIES = ["Positive", "Neutral", "Negative"]
+TOPICS = [
+    "HELB disburses loans to university students",
+    "Students decry delays in HELB disbursement",
+    "HELB launches loan repayment drive for defaulters",
+    "Wings to Fly scholars receive HELB funding",
+    "New university funding model leaves students stranded",
+    "HELB waives penalties on loan repayment",
+    "Parliament questions HELB budget allocation",
+    "HELB opens applications for TVET students",
+]
+
+
+def make_mentions(n, seed=42, start="2025-01-01", end="2025-12-31"):
+    rng = random.Random(seed)
+    days = pd.date_range(start, end, freq="D").strftime("%Y-%m-%d").tolist()
+    rows = []
+    for i in range(n):
+        topic = rng.choice(TOPICS)
+        rows.append([
+            f"{topic} ({i})",
+            rng.choice(days),
+            rng.choice(SOURCES),
+            f"{topic}. The Higher Education Loans Board said on record {i} that it was reviewing the matter.",
+            f"https://example.com/helb/{i}",
+            rng.choice(TONALITIES),
+        ])
+    return pd.DataFrame(rows, columns=HEADERS)
+
+
+def write_csv(path, n, seed=42):
+    make_mentions(n, seed=seed).to_csv(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic mentions CSV.")
+    parser.add_argument("path")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    write_csv(args.path, args.rows, seed=args.seed)
+    print(f"✅ Wrote {args.rows} synthetic mentions to {args.path}")
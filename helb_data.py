@@ -0,0 +1,400 @@
+# helb_data.py
+"""
+Shared access to the HELB mentions sheet (used by the pages and the scraper).
+- Sources: the published CSV export / a local CSV, and the Google Sheets API
+- The scraper writes a small version marker (worksheet "_meta") after each ingest
+- MentionsStore probes that marker and reloads only when the data changed;
+  when the scraper only appended rows, just the new tail is fetched. Hand edits in the
+  sheet do not move the marker, so the whole sheet is also compared every VERIFY_INTERVAL
+- Frames are held with categorical / Arrow string dtypes (compact_frame)
+- Editor tonality corrections live in a small overrides file, not in copies of the sheet
+"""
+
+import hashlib
+import importlib
+import importlib.util
+import io
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import NamedTuple
+from urllib.parse import quote
+from urllib.request import urlopen
+
+import pandas as pd
+
+# ---------------- CONFIG ----------------
+SHEET_ID = "10LcDId4y2vz5mk7BReXL303-OBa2QxsN3drUcefpdSQ"
+# HELB_CSV_URL points the pages at another export (e.g. a local CSV for benchmarks)
+CSV_URL = os.environ.get(
+    "HELB_CSV_URL", f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/export?format=csv"
+)
+
+META_SHEET = "_meta"
+META_HEADERS = ["generation", "row_count", "last_link", "updated_at"]
+PROBE_INTERVAL = 60  # seconds between version probes, per process
+VERIFY_INTERVAL = 15 * 60  # seconds between full content checks (catches hand edits)
+
+# Text columns repeating fewer distinct values than this share of rows become categoricals
+CATEGORY_RATIO = 0.5
+# Always kept as strings: free text, and the raw date the pages parse themselves
+TEXT_COLUMNS = ("title", "summary", "link", "published")
+
+# Editor corrections to VADER's tonality, keyed by mention_key()
+OVERRIDES_CSV = os.environ.get("HELB_OVERRIDES_CSV", "tonality_overrides.csv")
+OVERRIDE_HEADERS = ["key", "tonality", "original", "edited_at"]
+
+_SHEET_URL = re.compile(r"^(https://docs\.google\.com/spreadsheets/d/[\w-]+)")
+
+
+# ---------------- COMPACT FRAMES ----------------
+def _string_dtype():
+    # pyarrow ships with streamlit; probe for it without importing it
+    if importlib.util.find_spec("pyarrow") is None:
+        return "object"
+    return pd.StringDtype("pyarrow")
+
+
+def compact_frame(df, categories=(), text=TEXT_COLUMNS, fill_blank=True):
+    """Shrink a mentions frame in place of object dtypes.
+    - `categories` and any other low-cardinality text column -> category
+    - `text` and the remaining text columns -> Arrow-backed strings
+    - small integer columns -> the narrowest (nullable) integer type
+    With `fill_blank`, missing text becomes "" (a blank cell in the sheet), so the
+    raw sheet columns stay fillna-safe; derived columns keep their missing values."""
+    out = {}
+    string_dtype = _string_dtype()
+    n = max(len(df), 1)
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            out[col] = s
+        elif pd.api.types.is_object_dtype(s.dtype) or pd.api.types.is_string_dtype(s.dtype):
+            if pd.api.types.infer_dtype(s, skipna=True) not in ("string", "empty"):
+                out[col] = s
+                continue
+            if fill_blank:
+                s = s.fillna("")
+            if col in categories or (col not in text and s.nunique() / n < CATEGORY_RATIO):
+                out[col] = s.astype("category")
+            else:
+                out[col] = s.astype(string_dtype)
+        elif pd.api.types.is_float_dtype(s.dtype) and s.dropna().mod(1).eq(0).all():
+            out[col] = pd.to_numeric(s.astype("Int64"), downcast="integer")
+        elif pd.api.types.is_integer_dtype(s.dtype):
+            out[col] = pd.to_numeric(s, downcast="integer")
+        else:
+            out[col] = s
+    return pd.DataFrame(out, index=df.index)
+
+
+def memory_report(df):
+    """Deep memory use per column, plus a total row."""
+    usage = df.memory_usage(deep=True, index=True)
+    report = pd.DataFrame({
+        "column": usage.index,
+        "dtype": ["index" if c == "Index" else str(df[c].dtype) for c in usage.index],
+        "bytes": usage.values,
+    })
+    report["bytes_per_mention"] = report["bytes"] / max(len(df), 1)
+    total = pd.DataFrame([{
+        "column": "TOTAL",
+        "dtype": "",
+        "bytes": int(report["bytes"].sum()),
+        "bytes_per_mention": report["bytes"].sum() / max(len(df), 1),
+    }])
+    return pd.concat([report, total], ignore_index=True)
+
+
+# ---------------- FILES ----------------
+def run_main(module):
+    """Entry point for scripts that pickle their own classes: runs `module.main()` from the
+    importable module rather than __main__, so the pickles refer to e.g. topics.TopicModel."""
+    importlib.import_module(module).main()
+
+
+def atomic_write(path, write, mode="w"):
+    """Create or replace `path` through a uniquely named temp file in the same directory,
+    so readers (and concurrent writers) only ever see a complete file. `write(fh)` fills it."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    encoding = None if "b" in mode else "utf-8"
+    with tempfile.NamedTemporaryFile(
+        mode, encoding=encoding, dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp", delete=False
+    ) as fh:
+        tmp = fh.name
+        try:
+            write(fh)
+        except BaseException:
+            fh.close()
+            os.remove(tmp)
+            raise
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, path)
+
+
+# ---------------- TONALITY OVERRIDES ----------------
+def mention_key(link, title="", published=""):
+    """Stable id of a mention: its link, else title|published (the scraper's dedup signature)."""
+    link = "" if pd.isna(link) else str(link).strip()
+    if link:
+        return link
+    return f"{'' if pd.isna(title) else str(title).strip()}|{'' if pd.isna(published) else str(published).strip()}"
+
+
+def load_overrides(path=OVERRIDES_CSV):
+    """Editor corrections as a frame with OVERRIDE_HEADERS (empty if none saved yet)."""
+    if not os.path.exists(path):
+        return pd.DataFrame(columns=OVERRIDE_HEADERS)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+_overrides_lock = threading.Lock()
+
+
+def save_overrides(changes, path=OVERRIDES_CSV):
+    """Merge {key: (tonality, original)} into the overrides file and write it atomically.
+    Corrections set back to the original tonality are dropped. Sessions are threads of
+    one process, so the read-merge-write runs under a lock (no edit is lost)."""
+    with _overrides_lock:
+        current = load_overrides(path).set_index("key")
+        edited_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        for key, (tonality, original) in changes.items():
+            if key in current.index:
+                original = current.at[key, "original"]
+            if tonality == original:
+                current = current.drop(index=key, errors="ignore")
+            else:
+                current.loc[key] = [tonality, original, edited_at]
+        atomic_write(path, lambda fh: current.reset_index()[OVERRIDE_HEADERS].to_csv(fh, index=False))
+    return current
+
+
+# ---------------- VERSIONS ----------------
+class DataVersion(NamedTuple):
+    generation: str   # changes whenever existing rows may have been rewritten
+    row_count: int    # data rows, excluding the header (-1 if unknown)
+    last_link: str = ""
+
+    @property
+    def key(self):
+        return f"{self.generation}:{self.row_count}:{self.last_link}"
+
+    def extends(self, older):
+        """True when this version only appended rows to `older`."""
+        return (
+            older is not None
+            and self.generation == older.generation
+            and self.row_count > older.row_count >= 0
+        )
+
+
+def version_from_meta(record):
+    """Parse a row of the "_meta" worksheet; None if it is not a marker."""
+    if not all(h in record for h in META_HEADERS[:2]):
+        return None
+    try:
+        row_count = int(record["row_count"])
+    except (TypeError, ValueError):
+        return None
+    last_link = record.get("last_link", "")
+    last_link = "" if pd.isna(last_link) else str(last_link).strip()
+    return DataVersion(str(record["generation"]).strip(), row_count, last_link)
+
+
+def content_version(df):
+    """Fallback version when no marker exists: a hash of the frame's contents."""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    digest.update("|".join(map(str, df.columns)).encode("utf-8"))
+    return DataVersion(f"sha1:{digest.hexdigest()}", len(df), _last_link(df))
+
+
+def write_version_marker(spreadsheet, row_count, last_link, rewritten=False):
+    """Called by the scraper after each ingest. `rewritten` bumps the generation,
+    which tells readers that rows were changed in place and a full reload is needed."""
+    try:
+        meta = spreadsheet.worksheet(META_SHEET)
+    except Exception:
+        meta = spreadsheet.add_worksheet(title=META_SHEET, rows=2, cols=len(META_HEADERS))
+    current = meta.get_all_records()
+    try:
+        generation = int(current[0]["generation"]) if current else 0
+    except (KeyError, TypeError, ValueError):
+        generation = 0
+    if rewritten or not current:
+        generation += 1
+    updated_at = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    meta.update([META_HEADERS, [generation, row_count, last_link, updated_at]])
+    return DataVersion(str(generation), row_count, last_link)
+
+
+def _last_link(df):
+    if df.empty or "link" not in df.columns:
+        return ""
+    last = df["link"].iloc[-1]
+    return "" if pd.isna(last) else str(last).strip()
+
+
+def _read_bytes(location):
+    if location.startswith(("http://", "https://")):
+        with urlopen(location, timeout=30) as resp:
+            return resp.read()
+    with open(location, "rb") as fh:
+        return fh.read()
+
+
+def _column_letter(n):
+    letters = ""
+    while n:
+        n, rem = divmod(n - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+# ---------------- SCRAPER SHEET ----------------
+SHEET_NAME = "HELB_Mentions"     # Google Sheet name
+SPREADSHEET_ID = None            # if you prefer ID, put it here
+SCRAPER_SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive",
+]
+
+
+def open_sheet(keyfile="service_account.json"):
+    """(spreadsheet, first worksheet) for the scraper-side scripts."""
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    creds = ServiceAccountCredentials.from_json_keyfile_name(keyfile, SCRAPER_SCOPES)
+    gc = gspread.authorize(creds)
+    sh = gc.open_by_key(SPREADSHEET_ID) if SPREADSHEET_ID else gc.open(SHEET_NAME)
+    return sh, sh.get_worksheet(0)
+
+
+# ---------------- SOURCES ----------------
+class CsvSource:
+    """The published CSV export of the sheet, or a local CSV file."""
+
+    def __init__(self, location=CSV_URL):
+        self.location = location
+        self.is_local = not location.startswith(("http://", "https://"))
+        match = _SHEET_URL.match(location)
+        self.sheet_base = match.group(1) if match else None
+
+    def probe(self):
+        if self.is_local:
+            # Local files have no marker; any change means a full reload
+            stat = os.stat(self.location)
+            return DataVersion(f"file:{stat.st_mtime_ns}:{stat.st_size}", -1)
+        if self.sheet_base:
+            # gviz serves a single worksheet as a few bytes of CSV
+            url = f"{self.sheet_base}/gviz/tq?tqx=out:csv&sheet={META_SHEET}"
+            meta = pd.read_csv(io.BytesIO(_read_bytes(url)), dtype=str, keep_default_na=False)
+            if not meta.empty:
+                return version_from_meta(meta.iloc[0].to_dict())
+        return None
+
+    def fetch(self, offset=0):
+        if offset and self.sheet_base:
+            tq = quote(f"select * offset {offset}")
+            url = f"{self.sheet_base}/gviz/tq?tqx=out:csv&headers=1&gid=0&tq={tq}"
+            return pd.read_csv(io.BytesIO(_read_bytes(url)))
+        df = pd.read_csv(io.BytesIO(_read_bytes(self.location)))
+        return df.iloc[offset:].reset_index(drop=True) if offset else df
+
+
+class SheetsApiSource:
+    """The sheet read through an authorized gspread Spreadsheet."""
+
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+
+    def probe(self):
+        records = self.spreadsheet.worksheet(META_SHEET).get_all_records()
+        return version_from_meta(records[0]) if records else None
+
+    def fetch(self, offset=0):
+        worksheet = self.spreadsheet.sheet1
+        if not offset:
+            values = worksheet.get_all_values()
+            if not values:
+                return pd.DataFrame()
+            return pd.DataFrame(values[1:], columns=values[0])
+        header = worksheet.row_values(1)
+        rows = worksheet.get(f"A{offset + 2}:{_column_letter(len(header))}")
+        rows = [list(r) + [""] * (len(header) - len(r)) for r in rows]
+        return pd.DataFrame(rows, columns=header)
+
+
+# ---------------- STORE ----------------
+class MentionsStore:
+    """Process-wide compact copy of the raw sheet, refreshed by version rather than by TTL."""
+
+    def __init__(self, source, probe_interval=PROBE_INTERVAL, verify_interval=VERIFY_INTERVAL):
+        self.source = source
+        self.probe_interval = probe_interval
+        self.verify_interval = verify_interval
+        self.version = None      # what the pages key their caches on
+        self.marker = None       # the scraper's marker as last seen
+        self.df = None
+        self._probed_at = 0.0
+        self._verified_at = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self, force=False):
+        """Return (version_key, frame). Callers must treat the frame as read-only."""
+        with self._lock:
+            now = time.monotonic()
+            if force or self.df is None or now - self._probed_at >= self.probe_interval:
+                self._probed_at = now
+                try:
+                    self._refresh()
+                except Exception as e:
+                    if self.df is None:
+                        raise
+                    print(f"⚠️ Refresh failed, serving version {self.version.key}: {e}")
+            return self.version.key, self.df
+
+    def _refresh(self):
+        try:
+            marker = self.source.probe()
+        except Exception:
+            marker = None
+
+        verify = self.df is not None and time.monotonic() - self._verified_at >= self.verify_interval
+        if marker is not None and not verify:
+            if marker == self.marker:
+                return
+            if marker.extends(self.marker) and self._append_tail(marker):
+                return
+
+        df = compact_frame(self.source.fetch())
+        self._verified_at = time.monotonic()
+        if marker is None:
+            version = content_version(df)
+        elif marker == self.marker:
+            # Same marker: only a hand edit in the sheet can have changed the rows
+            digest = content_version(df)
+            if digest.generation == content_version(self.df).generation:
+                return
+            version = DataVersion(f"{marker.generation}~{digest.generation[5:17]}", marker.row_count, marker.last_link)
+        else:
+            version = marker
+        if version == self.version:
+            return
+        self.df, self.version, self.marker = df, version, marker
+
+    def _append_tail(self, version):
+        tail = self.source.fetch(offset=self.version.row_count)
+        expected = version.row_count - self.version.row_count
+        if list(tail.columns) != list(self.df.columns) or len(tail) != expected:
+            return False
+        if _last_link(tail) != version.last_link:
+            return False
+        # Categories that gained values come back as plain strings; re-compact them
+        self.df = compact_frame(pd.concat([self.df, tail], ignore_index=True))
+        self.version = self.marker = version
+        return True
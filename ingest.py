@@ -0,0 +1,529 @@
+# ingest.py
+"""
+Ingest pipeline used by scraper_to_sheets.py:
+
+    fetchers -> normalize -> dedup -> score -> sink
+
+- Fetchers (Google News, RSS/Atom feeds of Kenyan outlets, news sitemaps) run
+  concurrently and yield raw items; one failing fetcher does not stop the others
+- Feeds and sitemaps use conditional GETs (ETag / Last-Modified, kept in
+  state/http_cache.json), so an unchanged feed costs one 304 and yields nothing;
+  new validators are only committed once the items fetched with them are stored
+- Dedup matches links, and titles on the same day with Google News' " - Publisher"
+  suffix, case and spacing ignored, so an outlet's own copy of a GNews story is skipped
+- The other stages are generators over mentions; scoring and the sheet append work per batch
+- Fetchers also read local files, so they can be tried against fixture feeds:
+
+      python ingest.py --feed fixtures/feeds/rss.xml --sitemap fixtures/feeds/sitemap.xml
+"""
+
+import argparse
+import html
+import json
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+import pandas as pd
+
+from helb_data import atomic_write
+from outlets import resolve as resolve_outlet
+from tonality_model import score_tonality
+from topics import assign_topics
+
+# ---------------- CONFIG ----------------
+HEADERS = ["title", "published", "source", "summary", "link", "tonality", "topic", "outlet"]
+START_DATE = (2025, 1, 1)  # YYYY, MM, DD → fetch from Jan 1, 2025 onwards
+CUTOFF_DATE = pd.Timestamp("2025-01-01")
+RECENT_WINDOW_HOURS = 48   # newer than this: ask Google News for the last N hours, else by date
+
+# Outlet feeds carry all their news, so items are kept only if they mention one of these
+KEYWORDS = ("helb", "higher education loans board")
+FEEDS = {
+    "Capital FM": "https://www.capitalfm.co.ke/news/feed/",
+    "The Standard": "https://www.standardmedia.co.ke/rss/headlines.php",
+    "Kenyans.co.ke": "https://www.kenyans.co.ke/feeds/news",
+    "Tuko": "https://www.tuko.co.ke/rss/all.rss",
+}
+SITEMAPS = {
+    # "Outlet": "https://outlet.example/news-sitemap.xml",
+}
+MAX_CHILD_SITEMAPS = 3     # a sitemap index is followed into its most recent children only
+
+STATE_DIR = os.environ.get("HELB_STATE_DIR", "state")
+HTTP_CACHE = os.path.join(STATE_DIR, "http_cache.json")
+USER_AGENT = "HELB-Media-Tracker/1.0"
+TIMEOUT = 20
+MAX_WORKERS = 8
+BATCH_SIZE = 500           # mentions scored and appended per call
+
+
+# ---------------- HTTP ----------------
+class HttpCache:
+    """ETag / Last-Modified per URL. A fetch stages the validators it got under its fetcher's
+    name; they are committed only after the items are stored (commit), so a failed run
+    fetches the same feeds again instead of getting a 304 for items it never stored."""
+
+    def __init__(self, entries=None):
+        self.entries = dict(entries or {})
+        self.staged = {}   # fetcher name -> {location: validators}
+
+    def get(self, location):
+        return self.entries.get(location, {})
+
+    def stage(self, fetcher, location, validators):
+        self.staged.setdefault(fetcher, {})[location] = validators
+
+    def drop(self, fetcher):
+        self.staged.pop(fetcher, None)
+
+    def commit(self):
+        for validators in self.staged.values():
+            self.entries.update(validators)
+        self.staged = {}
+
+
+def load_http_cache(path=HTTP_CACHE):
+    if not os.path.exists(path):
+        return HttpCache()
+    with open(path, encoding="utf-8") as fh:
+        return HttpCache(json.load(fh))
+
+
+def save_http_cache(cache, path=HTTP_CACHE):
+    """Saves the committed validators only."""
+    atomic_write(path, lambda fh: json.dump(cache.entries, fh, indent=1))
+
+
+def fetch_url(location, cache, fetcher=""):
+    """Body of a URL or local file, or None when it has not changed since the cached validators.
+    New validators are staged under `fetcher` (see HttpCache)."""
+    entry = cache.get(location)
+    if os.path.exists(location):
+        # Local fixtures: the file's mtime plays the part of Last-Modified
+        stamp = str(os.stat(location).st_mtime_ns)
+        if entry.get("last_modified") == stamp:
+            return None
+        with open(location, "rb") as fh:
+            body = fh.read()
+        cache.stage(fetcher, location, {"last_modified": stamp})
+        return body
+
+    headers = {"User-Agent": USER_AGENT}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    try:
+        with urlopen(Request(location, headers=headers), timeout=TIMEOUT) as resp:
+            body = resp.read()
+            validators = {"etag": resp.headers.get("ETag"), "last_modified": resp.headers.get("Last-Modified")}
+    except HTTPError as e:
+        if e.code == 304:
+            return None
+        raise
+    cache.stage(fetcher, location, {k: v for k, v in validators.items() if v})
+    return body
+
+
+# ---------------- FETCHERS ----------------
+# Each fetcher yields raw items shaped like GNews results, so normalize() treats them alike:
+#   {"title", "description", "published date", "url", "publisher": {"title": ...}}
+
+def _text(el, path, ns=None):
+    found = el.find(path, ns or {})
+    return (found.text or "").strip() if found is not None and found.text else ""
+
+
+def _strip_html(text):
+    return re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", html.unescape(text or ""))).strip()
+
+
+def _mentions_keyword(*texts, keywords=KEYWORDS):
+    blob = " ".join(texts).lower()
+    return any(k in blob for k in keywords)
+
+
+class GNewsFetcher:
+    """Google News search for one query; `since` narrows it to items newer than that time."""
+
+    def __init__(self, query, since=None, client=None):
+        self.query = query
+        self.name = f"gnews:{query}"
+        self.since = since
+        self.client = client   # anything with get_news(query); built from the window if None
+
+    def window(self, now=None):
+        if not self.since:
+            return {"start_date": START_DATE}
+        now = now or pd.Timestamp.now(tz="UTC")
+        since = pd.Timestamp(self.since)
+        hours = int(-(-(now - since).total_seconds() // 3600)) + 1
+        if hours <= RECENT_WINDOW_HOURS:
+            return {"period": f"{hours}h"}
+        day = (since - pd.Timedelta(days=1)).date()
+        return {"start_date": (day.year, day.month, day.day)}
+
+    def fetch(self, cache):
+        client = self.client
+        if client is None:
+            from gnews import GNews
+
+            client = GNews(language="en", country="KE", **self.window())
+        yield from client.get_news(self.query) or []
+
+
+class FeedFetcher:
+    """An outlet's RSS 2.0 or Atom feed, filtered to items mentioning KEYWORDS."""
+
+    ATOM = {"a": "http://www.w3.org/2005/Atom"}
+
+    def __init__(self, source, url, keywords=KEYWORDS):
+        self.source = source
+        self.url = url
+        self.name = f"feed:{source}"
+        self.keywords = keywords
+
+    def fetch(self, cache):
+        body = fetch_url(self.url, cache, self.name)
+        if body is None:
+            return
+        root = ET.fromstring(body)
+        if root.tag == "{%s}feed" % self.ATOM["a"]:
+            entries = (self._atom_item(e) for e in root.findall("a:entry", self.ATOM))
+        else:
+            entries = (self._rss_item(i) for i in root.iter("item"))
+        for item in entries:
+            if _mentions_keyword(item["title"], item["description"], keywords=self.keywords):
+                yield item
+
+    def _rss_item(self, item):
+        return {
+            "title": _strip_html(_text(item, "title")),
+            "description": _strip_html(_text(item, "description")),
+            "published date": _text(item, "pubDate"),
+            "url": _text(item, "link"),
+            "publisher": {"title": self.source},
+        }
+
+    def _atom_item(self, entry):
+        link = entry.find("a:link[@rel='alternate']", self.ATOM)
+        if link is None:
+            link = entry.find("a:link", self.ATOM)
+        return {
+            "title": _strip_html(_text(entry, "a:title", self.ATOM)),
+            "description": _strip_html(_text(entry, "a:summary", self.ATOM) or _text(entry, "a:content", self.ATOM)),
+            "published date": _text(entry, "a:published", self.ATOM) or _text(entry, "a:updated", self.ATOM),
+            "url": link.get("href", "") if link is not None else "",
+            "publisher": {"title": self.source},
+        }
+
+
+class SitemapFetcher:
+    """An outlet's (news) sitemap. Titles come from <news:title>, else from the URL slug."""
+
+    NS = {"s": "http://www.sitemaps.org/schemas/sitemap/0.9", "n": "http://www.google.com/schemas/sitemap-news/0.9"}
+
+    def __init__(self, source, url, keywords=KEYWORDS):
+        self.source = source
+        self.url = url
+        self.name = f"sitemap:{source}"
+        self.keywords = keywords
+
+    def fetch(self, cache, url=None, depth=0):
+        body = fetch_url(url or self.url, cache, self.name)
+        if body is None:
+            return
+        root = ET.fromstring(body)
+        if root.tag == "{%s}sitemapindex" % self.NS["s"] and depth == 0:
+            children = sorted(
+                root.findall("s:sitemap", self.NS), key=lambda s: _text(s, "s:lastmod", self.NS), reverse=True
+            )
+            for child in children[:MAX_CHILD_SITEMAPS]:
+                yield from self.fetch(cache, _text(child, "s:loc", self.NS), depth + 1)
+            return
+        for entry in root.findall("s:url", self.NS):
+            loc = _text(entry, "s:loc", self.NS)
+            title = _text(entry, "n:news/n:title", self.NS) or _slug_title(loc)
+            if not _mentions_keyword(title, loc.replace("-", " "), keywords=self.keywords):
+                continue
+            yield {
+                "title": title,
+                "description": "",
+                "published date": _text(entry, "n:news/n:publication_date", self.NS) or _text(entry, "s:lastmod", self.NS),
+                "url": loc,
+                "publisher": {"title": self.source},
+            }
+
+
+def _slug_title(url):
+    slug = url.rstrip("/").rsplit("/", 1)[-1]
+    slug = re.sub(r"\.\w+$", "", slug)
+    slug = re.sub(r"[-_]+", " ", re.sub(r"[-_]?\d{5,}$", "", slug)).strip()
+    return slug[:1].upper() + slug[1:]
+
+
+def default_fetchers(queries, since=None):
+    """GNews for each query, plus every configured outlet feed and sitemap."""
+    since = since or {}
+    fetchers = [GNewsFetcher(q, since.get(f"gnews:{q}")) for q in queries]
+    fetchers += [FeedFetcher(source, url) for source, url in FEEDS.items()]
+    fetchers += [SitemapFetcher(source, url) for source, url in SITEMAPS.items()]
+    return fetchers
+
+
+def new_stats(fetchers):
+    return {f.name: {"fetched": 0, "new": 0, "newest": None, "error": None} for f in fetchers}
+
+
+def fetch_all(fetchers, cache, stats, workers=MAX_WORKERS):
+    """Run fetchers concurrently; yield (fetcher name, raw item) as each one finishes."""
+    if not fetchers:
+        return
+    with ThreadPoolExecutor(max_workers=min(workers, len(fetchers))) as pool:
+        futures = {pool.submit(lambda f=f: list(f.fetch(cache))): f for f in fetchers}
+        for future in as_completed(futures):
+            fetcher = futures[future]
+            try:
+                items = future.result()
+            except Exception as e:
+                cache.drop(fetcher.name)
+                stats[fetcher.name]["error"] = str(e)
+                print(f"⚠️ {fetcher.name} failed: {e}")
+                continue
+            stats[fetcher.name]["fetched"] = len(items)
+            print(f"📰 {fetcher.name}: {len(items)} items")
+            for item in items:
+                yield fetcher.name, item
+
+
+# ---------------- NORMALIZE ----------------
+def clean_date(val):
+    """Any stored or fetched date as YYYY-MM-DD in Nairobi time ("" if unparseable)."""
+    if not val or pd.isna(val):
+        return ""
+    try:
+        dt = pd.to_datetime(val, errors="coerce", utc=True)
+        if pd.isna(dt):
+            return ""
+        return dt.tz_convert("Africa/Nairobi").strftime("%Y-%m-%d")
+    except Exception:
+        try:
+            dt = pd.to_datetime(val, errors="coerce")
+            if pd.isna(dt):
+                return ""
+            return dt.strftime("%Y-%m-%d")
+        except Exception:
+            return ""
+
+
+def extract_field(article, keys):
+    for k in keys:
+        if article.get(k):
+            return article.get(k)
+    return ""
+
+
+def parse_article(a):
+    """A raw item as a sheet row dict, plus its UTC publish time (or None)."""
+    title = str(extract_field(a, ["title"])).strip()
+    summary = str(extract_field(a, ["description", "summary", "snippet"])).strip()
+    link = str(extract_field(a, ["url", "link"])).strip()
+    published_raw = str(extract_field(a, ["published date", "published", "publishedAt"])).strip()
+    source = ""
+    pub = a.get("publisher")
+    if isinstance(pub, dict):
+        source = pub.get("title", "")
+    if not source:
+        source = str(extract_field(a, ["source", "site", "domain"])).strip()
+
+    # Normalize published dates
+    published_parsed = pd.to_datetime(published_raw, errors="coerce", utc=True)
+    if pd.isna(published_parsed):
+        published, published_parsed = "", None
+    else:
+        try:
+            published = published_parsed.tz_convert("Africa/Nairobi").strftime("%Y-%m-%d")
+        except Exception:
+            published = published_parsed.strftime("%Y-%m-%d")
+
+    mention = {"title": title, "published": published, "source": source, "summary": summary, "link": link,
+               "tonality": "", "topic": "", "outlet": resolve_outlet(source, link)}
+    return mention, published_parsed
+
+
+def normalize(items, stats):
+    """(fetcher name, raw item) -> (fetcher name, mention); drops mentions before the cutoff."""
+    cutoff = CUTOFF_DATE.strftime("%Y-%m-%d")
+    for name, item in items:
+        mention, published_at = parse_article(item)
+        newest = stats[name]["newest"]
+        if published_at is not None and (newest is None or published_at > newest):
+            stats[name]["newest"] = published_at
+        if not (mention["title"] or mention["link"]):
+            continue
+        if mention["published"] and mention["published"] < cutoff:
+            continue  # skip old mentions
+        yield name, mention
+
+
+# ---------------- DEDUP ----------------
+def dedup_title(title, source=""):
+    """Title as compared across sources: Google News appends " - Publisher" to the outlet's
+    own headline, and feeds differ in case and spacing."""
+    title = re.sub(r"\s+", " ", str(title or "")).strip()
+    source = re.sub(r"\s+", " ", str(source or "")).strip()
+    for sep in (" - ", " | "):
+        if source and title.lower().endswith(f"{sep}{source}".lower()):
+            title = title[: -len(sep + source)].rstrip()
+            break
+    return title.casefold()
+
+
+def signature(record):
+    return dedup_title(record.get("title", ""), record.get("source", "")), str(record.get("published", "")).strip()
+
+
+class SeenMentions:
+    """Links and (title, published) signatures already in the sheet."""
+
+    def __init__(self, links=(), sigs=()):
+        self.links = set(links)
+        self.sigs = {tuple(s) for s in sigs}
+
+    @classmethod
+    def from_records(cls, records):
+        seen = cls()
+        seen.update(records)
+        return seen
+
+    def update(self, records):
+        for r in records:
+            link = str(r.get("link", "")).strip()
+            if link:
+                self.links.add(link)
+            self.sigs.add(signature(r))
+
+    def __contains__(self, mention):
+        """The mention's link, or the same title on the same day, was seen."""
+        return bool(mention["link"] and mention["link"] in self.links) or signature(mention) in self.sigs
+
+    def add_if_new(self, mention):
+        """Mark a mention seen; False if it (or the same title on the same day) already was."""
+        if mention in self:
+            return False
+        self.update([mention])
+        return True
+
+
+def dedup(mentions, seen, stats):
+    """Drops mentions already in the sheet, or already yielded by another fetcher.
+    `seen` itself is only updated by sink(), once a batch is actually stored."""
+    pending = SeenMentions()
+    for name, mention in mentions:
+        if mention not in seen and pending.add_if_new(mention):
+            stats[name]["new"] += 1
+            yield mention
+
+
+# ---------------- SCORE ----------------
+def _batches(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def enrich(mentions, bootstrap=None, dry_run=False):
+    """Tonality and topic for a batch of mentions, each in one call.
+    A dry run only reads the topic model (no partial_fit, nothing saved)."""
+    titles = [m["title"] for m in mentions]
+    summaries = [m["summary"] for m in mentions]
+    # Trained model from tonality_model.py if present, else VADER
+    for m, tonality in zip(mentions, score_tonality(titles, summaries)):
+        m["tonality"] = tonality
+    # Topics: the clusters are updated with just this batch (partial_fit), not the archive
+    for m, topic in zip(mentions, assign_topics(titles, summaries, bootstrap=bootstrap, update=not dry_run)):
+        m["topic"] = topic
+
+
+def score(mentions, bootstrap=None, batch_size=BATCH_SIZE, dry_run=False):
+    """Yields scored batches. `bootstrap` (archive texts) seeds the topic model on first use."""
+    for batch in _batches(mentions, batch_size):
+        enrich(batch, bootstrap=bootstrap, dry_run=dry_run)
+        bootstrap = None
+        yield batch
+
+
+# ---------------- SINK ----------------
+def append_mentions(worksheet, mentions):
+    header = worksheet.row_values(1)
+    if not header:
+        worksheet.append_row(HEADERS, value_input_option="USER_ENTERED")
+        header = HEADERS
+        time.sleep(1)
+    elif any(h not in header for h in HEADERS):
+        # Older sheets predate some columns (e.g. "topic"); add them after the last one
+        header = header + [h for h in HEADERS if h not in header]
+        worksheet.update(values=[header], range_name="A1")
+    # Write values in the sheet's own column order
+    rows = [[m.get(h, "") for h in header] for m in mentions]
+
+    try:
+        worksheet.append_rows(rows, value_input_option="USER_ENTERED")
+        print(f"✅ Appended {len(rows)} new mentions.")
+    except Exception as e:
+        print(f"⚠️ Batch append failed: {e}. Trying row-by-row...")
+        for r in rows:
+            worksheet.append_row(r, value_input_option="USER_ENTERED")
+        print(f"✅ Appended {len(rows)} mentions (row-by-row).")
+
+
+def sink(batches, worksheet=None, seen=None):
+    """Appends each batch to the sheet (skipped when worksheet is None), marks it seen once
+    the append returned, and yields its mentions. A failed append leaves them unseen."""
+    for batch in batches:
+        if worksheet is not None:
+            append_mentions(worksheet, batch)
+        if seen is not None:
+            seen.update(batch)
+        yield from batch
+
+
+def pipeline(items, seen, stats, worksheet=None, bootstrap=None, dry_run=False):
+    """normalize -> dedup -> score -> sink over fetched items; yields the appended mentions.
+    `dry_run` leaves the topic model untouched (pass no worksheet to skip the sheet)."""
+    scored = score(dedup(normalize(items, stats), seen, stats), bootstrap, dry_run=dry_run)
+    return sink(scored, worksheet, seen)
+
+
+# ---------------- FIXTURE RUN ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Dry-run the feed/sitemap fetchers (nothing is written to the sheet).")
+    parser.add_argument("--feed", action="append", default=[], help="RSS/Atom URL or local file (repeatable)")
+    parser.add_argument("--sitemap", action="append", default=[], help="sitemap URL or local file (repeatable)")
+    parser.add_argument("--cache", help="HTTP cache file (default: in memory, so everything is fetched)")
+    args = parser.parse_args()
+
+    fetchers = [FeedFetcher(os.path.basename(u), u) for u in args.feed]
+    fetchers += [SitemapFetcher(os.path.basename(u), u) for u in args.sitemap]
+    cache = load_http_cache(args.cache) if args.cache else HttpCache()
+    stats = new_stats(fetchers)
+    for m in pipeline(fetch_all(fetchers, cache, stats), SeenMentions(), stats, dry_run=True):
+        print(f"  {m['published'] or '----------'}  {m['source']:<14} {m['tonality']:<8} {m['title'][:70]}")
+    print(json.dumps({name: {**s, "newest": str(s["newest"])} for name, s in stats.items()}, indent=1))
+    if args.cache:
+        cache.commit()
+        save_http_cache(cache, args.cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+# nlp_utils.py
+"""
+Shared NLP helpers for the scraper and the Streamlit pages.
+- NLTK is imported only when a resource is actually needed
+- Resources are looked up on local disk first; the downloader runs only when missing
+"""
+
+
+def ensure_nltk_resource(resource_path, package):
+    """Make sure an NLTK resource (e.g. "corpora/stopwords") is available locally."""
+    import nltk
+
+    try:
+        nltk.data.find(resource_path)
+    except LookupError:
+        nltk.download(package, quiet=True)
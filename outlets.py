@@ -0,0 +1,211 @@
+# outlets.py
+"""
+Canonical outlet registry.
+- Every mention gets a compact outlet id (e.g. "nation"), resolved from its link's
+  domain or else from its source spelling ("Daily Nation", "Nation Africa", ...)
+- Lookups are plain dict hits on tables precomputed at import; the scraper stores
+  the id in the sheet's "outlet" column, and the pages group on it
+- Each outlet carries a tier and media type; `weight` turns the tier into a factor
+  for weighted counts
+
+Usage:
+    python outlets.py report     # spellings per outlet, and unregistered sources by count
+    python outlets.py backfill   # write the "outlet" column for the whole archive
+"""
+
+import argparse
+import re
+from functools import lru_cache
+from typing import NamedTuple
+from urllib.parse import urlsplit
+
+import pandas as pd
+
+from helb_data import CSV_URL, CsvSource
+
+# ---------------- REGISTRY ----------------
+TIER_WEIGHTS = {1: 1.0, 2: 0.6, 3: 0.3}   # national / established / niche
+UNKNOWN = "unknown"
+
+
+class Outlet(NamedTuple):
+    id: str
+    name: str
+    tier: int
+    media_type: str            # newspaper | tv | radio | online | agency | international
+    domains: tuple = ()
+    aliases: tuple = ()
+
+    @property
+    def weight(self):
+        return TIER_WEIGHTS.get(self.tier, TIER_WEIGHTS[3])
+
+
+OUTLETS = [
+    Outlet("nation", "Nation", 1, "newspaper", ("nation.africa", "nation.co.ke"), ("Daily Nation", "Nation Africa", "Nation Kenya")),
+    Outlet("standard", "The Standard", 1, "newspaper", ("standardmedia.co.ke",), ("Standard Digital", "Standard Media", "The Standard Kenya")),
+    Outlet("star", "The Star", 1, "newspaper", ("the-star.co.ke",), ("The Star Kenya", "Star")),
+    Outlet("business-daily", "Business Daily", 1, "newspaper", ("businessdailyafrica.com",), ("Business Daily Africa",)),
+    Outlet("citizen", "Citizen Digital", 1, "tv", ("citizen.digital",), ("Citizen TV", "Citizen TV Kenya", "Citizen")),
+    Outlet("ntv", "NTV Kenya", 1, "tv", ("ntvkenya.co.ke",), ("NTV",)),
+    Outlet("ktn", "KTN News", 1, "tv", (), ("KTN", "KTN News Kenya")),
+    Outlet("kbc", "KBC", 1, "tv", ("kbc.co.ke",), ("Kenya Broadcasting Corporation", "KBC Digital")),
+    Outlet("capital-fm", "Capital FM", 2, "radio", ("capitalfm.co.ke",), ("Capital FM Kenya", "Capital News")),
+    Outlet("people-daily", "People Daily", 2, "newspaper", ("pd.co.ke", "peopledaily.digital"), ("People Daily Kenya",)),
+    Outlet("east-african", "The EastAfrican", 2, "newspaper", ("theeastafrican.co.ke",), ("The East African", "East African")),
+    Outlet("kna", "Kenya News Agency", 2, "agency", ("kenyanews.go.ke",), ("KNA",)),
+    Outlet("kenyans", "Kenyans.co.ke", 2, "online", ("kenyans.co.ke",), ("Kenyans",)),
+    Outlet("tuko", "Tuko", 2, "online", ("tuko.co.ke",), ("Tuko News", "Tuko.co.ke")),
+    Outlet("the-kenya-times", "The Kenya Times", 3, "online", ("thekenyatimes.com",), ("Kenya Times",)),
+    Outlet("nairobi-leo", "Nairobi Leo", 3, "online", ("nairobileo.co.ke",), ()),
+    Outlet("mwakilishi", "Mwakilishi", 3, "online", ("mwakilishi.com",), ()),
+    Outlet("kahawa-tungu", "Kahawa Tungu", 3, "online", ("kahawatungu.com",), ()),
+    Outlet("bbc", "BBC", 1, "international", ("bbc.com", "bbc.co.uk"), ("BBC News",)),
+    Outlet("reuters", "Reuters", 1, "international", ("reuters.com",), ()),
+]
+
+# Links on these hosts say nothing about the outlet (e.g. Google News redirect URLs)
+AGGREGATOR_DOMAINS = {"news.google.com", "google.com", "msn.com", "yahoo.com", "flipboard.com"}
+_HOST_PREFIXES = ("www.", "m.", "amp.", "mobile.")
+
+
+# ---------------- LOOKUP TABLES (built once) ----------------
+def normalize_alias(name):
+    """'The Star (Kenya)' -> 'star kenya'; used for both registry aliases and incoming sources."""
+    key = re.sub(r"[^a-z0-9]+", " ", str(name or "").lower().replace("&", " and ")).strip()
+    return key[4:] if key.startswith("the ") else key
+
+
+def _host(link):
+    try:
+        host = (urlsplit(str(link or "")).hostname or "").lower()
+    except ValueError:
+        return ""
+    for prefix in _HOST_PREFIXES:
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    return host
+
+
+BY_ID = {o.id: o for o in OUTLETS}
+BY_DOMAIN = {d: o.id for o in OUTLETS for d in o.domains}
+BY_ALIAS = {
+    normalize_alias(alias): o.id
+    for o in OUTLETS
+    for alias in (o.id, o.name, *o.aliases, *o.domains)
+}
+
+
+def _domain_id(host):
+    """Registered outlet for a host, trying parent domains too (news.nation.africa -> nation)."""
+    parts = host.split(".")
+    for i in range(len(parts) - 1):
+        outlet_id = BY_DOMAIN.get(".".join(parts[i:]))
+        if outlet_id:
+            return outlet_id
+    return None
+
+
+@lru_cache(maxsize=8192)
+def _resolve(source_key, host):
+    if host and host not in AGGREGATOR_DOMAINS:
+        outlet_id = _domain_id(host)
+        if outlet_id:
+            return outlet_id
+    if source_key in BY_ALIAS:
+        return BY_ALIAS[source_key]
+    if source_key:
+        # Unregistered: a slug of the spelling, so case/punctuation variants still group together
+        return source_key.replace(" ", "-")
+    if host and host not in AGGREGATOR_DOMAINS:
+        # Slugged like a spelling, so the id resolves to itself ("example.com" -> "example-com")
+        return normalize_alias(host).replace(" ", "-")
+    return UNKNOWN
+
+
+def resolve(source, link=""):
+    """Outlet id for a mention's source spelling and link. Every id resolves to itself."""
+    return _resolve(normalize_alias(source), _host(link))
+
+
+def outlet(outlet_id):
+    """Registry entry for an id; unregistered ids get a placeholder in the lowest tier."""
+    found = BY_ID.get(outlet_id)
+    if found:
+        return found
+    name = "Unknown" if outlet_id in ("", UNKNOWN) else outlet_id.replace("-", " ").title()
+    return Outlet(outlet_id or UNKNOWN, name, 3, "unknown")
+
+
+def outlet_column(df):
+    """Outlet ids for a frame with lowercase source/link columns; stored ids are kept (passed
+    through `resolve`, which older host ids such as "example.com" need). Resolution runs
+    once per distinct (source, link host) pair."""
+    source = df["source"].astype("object").fillna("").astype(str) if "source" in df else pd.Series("", index=df.index)
+    link = df["link"].astype("object").fillna("").astype(str) if "link" in df else pd.Series("", index=df.index)
+    hosts = link.map(_host)
+    pairs = pd.MultiIndex.from_arrays([source, hosts])
+    codes, uniques = pairs.factorize()
+    ids = pd.Series([_resolve(normalize_alias(s), h) for s, h in uniques], dtype="object").to_numpy()[codes]
+    resolved = pd.Series(ids, index=df.index)
+    if "outlet" in df:
+        stored = df["outlet"].astype("object").fillna("").astype(str)
+        codes, uniques = stored.factorize()
+        canonical = pd.Series([resolve(s) if s else "" for s in uniques], dtype="object").to_numpy()[codes]
+        resolved = pd.Series(canonical, index=df.index).where(stored.ne(""), resolved)
+    return resolved
+
+
+def outlet_table(ids=None):
+    """Registry (or the given ids) as a frame: id, name, tier, media_type, weight."""
+    entries = OUTLETS if ids is None else [outlet(i) for i in ids]
+    return pd.DataFrame(
+        [(o.id, o.name, o.tier, o.media_type, o.weight) for o in entries],
+        columns=["outlet", "outlet_name", "tier", "media_type", "weight"],
+    )
+
+
+# ---------------- CLI ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Outlet registry report / backfill.")
+    parser.add_argument("command", choices=["report", "backfill"])
+    parser.add_argument("--csv", help="read (and for backfill, write) a local CSV instead of the Google Sheet")
+    args = parser.parse_args()
+
+    if args.csv or args.command == "report":
+        df = CsvSource(args.csv or CSV_URL).fetch()
+        worksheet = None
+    else:
+        from helb_data import open_sheet
+
+        sh, worksheet = open_sheet()
+        df = pd.DataFrame(worksheet.get_all_records())
+    df.columns = [c.strip().lower() for c in df.columns]
+    if "outlet" in df and args.command == "backfill":
+        df = df.drop(columns="outlet")  # re-resolve everything with the current registry
+    df["outlet"] = outlet_column(df)
+
+    if args.command == "report":
+        registered = df[df["outlet"].isin(BY_ID)]
+        print("✅ Registered outlets (spellings merged):")
+        for outlet_id, group in registered.groupby("outlet"):
+            print(f"  {BY_ID[outlet_id].name:<20} {len(group):>6}  {sorted(group['source'].astype(str).unique())}")
+        unregistered = df.loc[~df["outlet"].isin(BY_ID), "source"].astype(str).value_counts()
+        print(f"ℹ️ {len(unregistered)} unregistered sources (add the frequent ones to OUTLETS):")
+        print(unregistered.head(30).to_string())
+        return
+
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+    else:
+        from helb_data import write_version_marker
+
+        worksheet.update([df.columns.tolist()] + df.fillna("").values.tolist())
+        last_link = str(df["link"].iloc[-1]) if len(df) else ""
+        write_version_marker(sh, len(df), last_link, rewritten=True)
+    print(f"✅ Outlets: {df['outlet'].value_counts().head(10).to_dict()}")
+    print("🎉 Done.")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,16 @@
 import streamlit as st 
 import pandas as pd
 import plotly.express as px
-import matplotlib.pyplot as plt
-from wordcloud import WordCloud, STOPWORDS
-import nltk
-import gspread
-from google.oauth2.service_account import Credentials
 import calendar
-import io
-from datetime import datetime
 
-# Ensure nltk stopwords are available
-nltk.download("stopwords", quiet=True)
-from nltk.corpus import stopwords as nltk_stopwords
+from app_data import get_sheet_store, show_memory_report
+from helb_data import compact_frame
+from outlets import outlet_column, outlet_table
+from reports import QUARTERS, financial_periods
+from nlp_utils import ensure_nltk_resource
+
+# matplotlib, wordcloud, nltk and gspread are imported where they are used,
+# so a plain page view does not pay for them.
 
 # ---------------- CONFIG ----------------
 HELB_GREEN = "#008000"
@@ -171,112 +169,85 @@ st.markdown(
 st.markdown('<div class="app-body">', unsafe_allow_html=True)
 
 # ---------------- DATA LOADER ----------------
-@st.cache_data(ttl=600)
-def load_data_from_sheet(sheet_id: str):
-    # Attempt to authenticate via st.secrets first, otherwise fall back to local file
-    scope = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive"]
-    creds = None
-    try:
-        if "gcp_service_account" in st.secrets:
-            # st.secrets["gcp_service_account"] should be the parsed JSON (dict)
-            creds = Credentials.from_service_account_info(st.secrets["gcp_service_account"], scopes=scope)
-        else:
-            # fallback to local file 'service_account.json' if exists
-            import os
-            if os.path.exists("service_account.json"):
-                creds = Credentials.from_service_account_file("service_account.json", scopes=scope)
-            else:
-                raise FileNotFoundError("No GCP service account available. Add st.secrets['gcp_service_account'] or service_account.json in app root.")
-        client = gspread.authorize(creds)
-        sh = client.open_by_key(sheet_id)
-        worksheet = sh.sheet1
-        records = worksheet.get_all_records()
-        df = pd.DataFrame(records)
-    except Exception as e:
-        st.error(f"Error loading Google Sheet: {e}")
-        return pd.DataFrame()
-    return df
-
 # Replace with your sheet ID (the long ID from the sheet URL)
 SHEET_ID = "10LcDId4y2vz5mk7BReXL303-OBa2QxsN3drUcefpdSQ"
 
-df_raw = load_data_from_sheet(SHEET_ID)
+# The sheet is shared process-wide (app_data) and reloaded only when the
+# scraper's version marker changes; the normalized frame is one read-only
+# object per process and version, shared by every session (never mutate it).
+try:
+    version_key, df_raw = get_sheet_store(SHEET_ID).snapshot()
+except Exception as e:
+    st.error(f"Error loading Google Sheet: {e}")
+    version_key, df_raw = None, pd.DataFrame()
 
 # ---------------- Data sanity / normalization ----------------
 if df_raw.empty:
     st.error("No data loaded from the Google Sheet. Please check credentials and Sheet ID.")
     st.stop()
 
-# normalize column names to lowercase
-df_raw.columns = [c.strip().lower() for c in df_raw.columns]
+@st.cache_resource(max_entries=1, show_spinner=False)
+def normalize(version_key, _raw):
+    df = _raw.copy()
 
-# ensure expected columns exist (create if missing)
-for col in ["title", "summary", "source", "tonality", "link", "published"]:
-    if col not in df_raw.columns:
-        df_raw[col] = ""
+    # normalize column names to lowercase
+    df.columns = [c.strip().lower() for c in df.columns]
 
-# parse published into datetime (robust)
-df = df_raw.copy()
-df["published"] = df["published"].astype(str).str.strip()
-# try parse as utc then convert to Nairobi
-try:
-    df["published_parsed"] = pd.to_datetime(df["published"], errors="coerce", utc=True).dt.tz_convert("Africa/Nairobi")
-except Exception:
-    df["published_parsed"] = pd.to_datetime(df["published"], errors="coerce")
+    # ensure expected columns exist (create if missing)
+    for col in ["title", "summary", "source", "tonality", "link", "published", "topic"]:
+        if col not in df.columns:
+            df[col] = ""
+
+    # parse published into datetime (robust)
+    df["published"] = df["published"].astype(str).str.strip()
+    # try parse as utc then convert to Nairobi
     try:
-        # attempt localization if naive
-        df["published_parsed"] = df["published_parsed"].dt.tz_localize("Africa/Nairobi", ambiguous="NaT", nonexistent="NaT")
+        df["published_parsed"] = pd.to_datetime(df["published"], errors="coerce", utc=True).dt.tz_convert("Africa/Nairobi")
     except Exception:
-        pass
-
-# tonality normalization
-df["tonality_norm"] = df["tonality"].astype(str).str.strip().str.capitalize()
-
-# derived fields
-df["YEAR"] = df["published_parsed"].dt.year
-df["MONTH_NUM"] = df["published_parsed"].dt.month
-df["MONTH"] = df["published_parsed"].dt.strftime("%b")
-# financial year
-fy_list = []
-for d in df["published_parsed"]:
-    if pd.isnull(d):
-        fy_list.append(None)
-    else:
-        if d.month >= 7:
-            fy_list.append(f"{d.year}/{d.year+1}")
-        else:
-            fy_list.append(f"{d.year-1}/{d.year}")
-df["FINANCIAL_YEAR"] = fy_list
-
-def fy_quarter(date):
-    if pd.isnull(date):
-        return None
-    m = date.month
-    if m in (7, 8, 9):
-        return "Q1 (Jul–Sep)"
-    if m in (10, 11, 12):
-        return "Q2 (Oct–Dec)"
-    if m in (1, 2, 3):
-        return "Q3 (Jan–Mar)"
-    return "Q4 (Apr–Jun)"
-
-df["QUARTER"] = df["published_parsed"].apply(fy_quarter)
+        df["published_parsed"] = pd.to_datetime(df["published"], errors="coerce")
+        try:
+            # attempt localization if naive
+            df["published_parsed"] = df["published_parsed"].dt.tz_localize("Africa/Nairobi", ambiguous="NaT", nonexistent="NaT")
+        except Exception:
+            pass
+
+    # tonality normalization
+    df["tonality_norm"] = df["tonality"].astype(str).str.strip().str.capitalize()
+
+    # canonical outlet (stored by the scraper; resolved here for older rows)
+    df["outlet"] = outlet_column(df)
+
+    # derived fields
+    df["YEAR"] = df["published_parsed"].dt.year
+    df["MONTH_NUM"] = df["published_parsed"].dt.month
+    df["MONTH"] = df["published_parsed"].dt.strftime("%b")
+    # financial year (Jul–Jun) and its quarters, as in the Reports page
+    df["FINANCIAL_YEAR"], df["QUARTER"] = financial_periods(df["published_parsed"])
+
+    # categorical / Arrow string / narrow int columns instead of object dtypes
+    df = compact_frame(df, categories=["tonality_norm", "MONTH", "FINANCIAL_YEAR", "outlet"], fill_blank=False)
+    return df
+
+df = normalize(version_key, df_raw)
 
 # ---------------- SIDEBAR SLICERS ----------------
 st.sidebar.header("🔎 Filters (Slicers)")
 
 years_all = sorted([int(y) for y in df["YEAR"].dropna().unique()]) if not df["YEAR"].dropna().empty else []
 fys_all = sorted([fy for fy in df["FINANCIAL_YEAR"].dropna().unique()]) if not df["FINANCIAL_YEAR"].dropna().empty else []
-quarters_all = ["Q1 (Jul–Sep)", "Q2 (Oct–Dec)", "Q3 (Jan–Mar)", "Q4 (Apr–Jun)"]
+quarters_all = QUARTERS
 months_all = list(calendar.month_abbr)[1:]
+topics_all = sorted(t for t in df["topic"].dropna().unique() if t)
 
 selected_years = st.sidebar.multiselect("Select Year(s)", years_all, default=[])
 selected_fys = st.sidebar.multiselect("Select Financial Year(s)", fys_all, default=[])
 selected_quarters = st.sidebar.multiselect("Select Quarter(s)", quarters_all, default=[])
 selected_months = st.sidebar.multiselect("Select Month(s)", months_all, default=[])
+selected_topics = st.sidebar.multiselect("Select Topic(s)", topics_all, default=[])
 
 keyword = st.sidebar.text_input("Keyword search (title + summary)")
 show_debug = st.sidebar.checkbox("🛠 Show Debug Table")
+show_memory_report(df, version_key, "dashboard")
 
 if st.sidebar.button("Clear All Filters"):
     # reset local variables (widgets will keep state until page reload)
@@ -284,10 +255,12 @@ if st.sidebar.button("Clear All Filters"):
     selected_fys = []
     selected_quarters = []
     selected_months = []
+    selected_topics = []
     keyword = ""
 
 # ---------------- APPLY FILTERS ----------------
-filtered = df.copy()
+# Boolean indexing returns new frames, so the shared `df` is never copied or changed
+filtered = df
 
 if selected_years:
     filtered = filtered[filtered["YEAR"].isin(selected_years)]
@@ -297,6 +270,8 @@ if selected_quarters:
     filtered = filtered[filtered["QUARTER"].isin(selected_quarters)]
 if selected_months:
     filtered = filtered[filtered["MONTH"].isin(selected_months)]
+if selected_topics:
+    filtered = filtered[filtered["topic"].isin(selected_topics)]
 
 if keyword:
     kw = keyword.strip().lower()
@@ -356,9 +331,7 @@ with colB:
     st.markdown("<div class='chart-tile'>", unsafe_allow_html=True)
     st.subheader("Mentions Over Time")
     if filtered["published_parsed"].notna().any():
-        times = filtered.copy()
-        times["date_only"] = times["published_parsed"].dt.date
-        timeline = times.groupby("date_only").size().reset_index(name="count")
+        timeline = filtered.groupby(filtered["published_parsed"].dt.date.rename("date_only")).size().reset_index(name="count")
         timeline["date"] = pd.to_datetime(timeline["date_only"])
         fig_line = px.line(timeline.sort_values("date"), x="date", y="count", markers=True)
         fig_line.update_traces(line_color=HELB_BLUE)
@@ -374,15 +347,19 @@ colC, colD = st.columns(2)
 with colC:
     st.markdown("<div class='chart-tile'>", unsafe_allow_html=True)
     st.subheader("Top News Sources")
-    src_counts = filtered["source"].fillna("Unknown").value_counts().head(8).reset_index()
+    # grouped on the canonical outlet, so spellings of one outlet count together
+    src_counts = filtered["outlet"].value_counts()
+    src_counts = src_counts[src_counts > 0].head(8)
     if not src_counts.empty:
-        src_counts.columns = ["Source", "Count"]
+        src_counts = outlet_table(src_counts.index).assign(Count=src_counts.to_numpy())
+        src_counts = src_counts.rename(columns={"outlet_name": "Source", "tier": "Tier", "media_type": "Media type"})
         fig_bar = px.bar(
             src_counts.sort_values("Count"),
             x="Count",
             y="Source",
             orientation="h",
             text="Count",
+            hover_data=["Tier", "Media type"],
         )
         fig_bar.update_traces(marker_color=HELB_GREEN)
         fig_bar.update_layout(margin=dict(t=6, b=6, l=6, r=6), yaxis=dict(dtick=1), height=320)
@@ -398,7 +375,7 @@ with colD:
     if filtered["published_parsed"].notna().any():
         trend = (
             filtered.assign(month=filtered["published_parsed"].dt.to_period("M").astype(str))
-            .groupby(["month", "tonality_norm"])
+            .groupby(["month", "tonality_norm"], observed=True)
             .size()
             .reset_index(name="count")
         )
@@ -420,18 +397,50 @@ with colD:
         st.info("No date information for trend chart.")
     st.markdown("</div>", unsafe_allow_html=True)
 
+# --- Chart E: Topics Over Time (Monthly)
+if topics_all:
+    st.markdown("<div class='chart-tile'>", unsafe_allow_html=True)
+    st.subheader("Topics Over Time (Monthly)")
+    with_topic = filtered[filtered["topic"].astype(str).ne("") & filtered["published_parsed"].notna()]
+    if not with_topic.empty:
+        topic_trend = (
+            with_topic.assign(month=with_topic["published_parsed"].dt.strftime("%Y-%m"))
+            .groupby(["month", "topic"], observed=True)
+            .size()
+            .reset_index(name="count")
+            .sort_values("month")
+        )
+        fig_topics = px.bar(topic_trend, x="month", y="count", color="topic")
+        fig_topics.update_layout(margin=dict(t=6, b=6, l=6, r=6), legend_title_text="Topic", height=360)
+        st.plotly_chart(fig_topics, use_container_width=True)
+    else:
+        st.info("No topic data for selected filters.")
+    st.markdown("</div>", unsafe_allow_html=True)
+
 st.markdown("---")
 
 # ---------------- WORD CLOUD ----------------
+@st.cache_resource
+def get_wordcloud_stopwords():
+    from wordcloud import STOPWORDS
+
+    ensure_nltk_resource("corpora/stopwords", "stopwords")
+    from nltk.corpus import stopwords as nltk_stopwords
+
+    return frozenset(nltk_stopwords.words("english")) | frozenset(STOPWORDS)
+
 st.markdown("<div class='chart-tile'>", unsafe_allow_html=True)
 if st.button("☁️ Generate Word Cloud"):
+    import matplotlib.pyplot as plt
+    from wordcloud import WordCloud
+
     st.subheader("Keyword Word Cloud")
     title_col = "title" if "title" in filtered.columns else "TITLE"
     summary_col = "summary" if "summary" in filtered.columns else "SUMMARY"
     texts = (filtered[title_col].astype(str) + " " + filtered[summary_col].astype(str)).tolist()
     big_text = " ".join(texts).strip()
     if big_text:
-        stop_words = set(nltk_stopwords.words("english")) | set(STOPWORDS)
+        stop_words = set(get_wordcloud_stopwords())
 
         def color_func(word, font_size, position, orientation, random_state=None, **kwargs):
             idx = abs(hash(word)) % len(HELB_COLORS)
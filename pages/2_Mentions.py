@@ -2,9 +2,13 @@ import streamlit as st
 import pandas as pd
 import os
 
+from app_data import get_csv_store, show_memory_report
+from helb_data import OVERRIDES_CSV, compact_frame, load_overrides, mention_key, save_overrides
+
 # ---------- CONFIG ----------
-CSV_URL = "https://docs.google.com/spreadsheets/d/10LcDId4y2vz5mk7BReXL303-OBa2QxsN3drUcefpdSQ/export?format=csv"
-LOCAL_CSV = "persistent_mentions.csv"  # File to save updates
+LOCAL_CSV = "persistent_mentions.csv"  # Legacy full copy; migrated into OVERRIDES_CSV
+TONALITIES = ["Positive", "Neutral", "Negative"]
+PAGE_SIZES = [25, 50, 100, 250]
 EDITOR_PASSWORD = "MyHardSecret123"
 
 # ---------- PASSWORD ----------
@@ -16,13 +20,11 @@ else:
     st.sidebar.info("Read-only mode 🔒")
 
 # ---------- LOAD DATA ----------
-@st.cache_data
-def load_data():
-    # Load persistent CSV if it exists
-    if os.path.exists(LOCAL_CSV):
-        df = pd.read_csv(LOCAL_CSV)
-    else:
-        df = pd.read_csv(CSV_URL)
+# One sorted, read-only frame per process (shared by every session), rebuilt
+# only when the sheet version changes.
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_data(version_key, _raw):
+    df = _raw.copy()
     df.columns = [c.strip().lower() for c in df.columns]
     if "published" in df.columns:
         df["published_parsed"] = pd.to_datetime(df["published"], errors="coerce", utc=True)
@@ -33,6 +35,7 @@ def load_data():
         df["DATE"] = df["published_parsed"].dt.strftime("%d-%b-%Y")
         df["TIME"] = df["published_parsed"].dt.strftime("%H:%M")
     else:
+        df["published"] = ""
         df["published_parsed"] = pd.NaT
         df["DATE"] = ""
         df["TIME"] = ""
@@ -40,6 +43,7 @@ def load_data():
         if col not in df.columns:
             df[col] = ""
         df[col] = df[col].fillna("")
+    df["KEY"] = [mention_key(l, t, p) for l, t, p in zip(df["link"], df["title"], df["published"])]
     rename_map = {
         "title": "TITLE",
         "summary": "SUMMARY",
@@ -48,22 +52,74 @@ def load_data():
         "link": "LINK",
     }
     df = df.rename(columns=rename_map)
-    return df
+    df = df.sort_values(by="published_parsed", ascending=False).reset_index(drop=True)
+    return compact_frame(df, categories=["DATE", "TIME"], fill_blank=False)
 
-# ---------- SESSION STATE ----------
-if "mentions_df" not in st.session_state:
-    st.session_state["mentions_df"] = load_data()
-df = st.session_state["mentions_df"]
+# Saved corrections, shared by all sessions; reloaded when the file changes
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_saved_overrides(file_stamp):
+    overrides = load_overrides(OVERRIDES_CSV)
+    return dict(zip(overrides["key"], overrides["tonality"]))
+
+def migrate_legacy_csv(df):
+    """One-off: turn an old persistent_mentions.csv into an overrides file. Rows are matched on
+    the columns that file has: the link, else title + published (as mention_key does)."""
+    legacy = pd.read_csv(LOCAL_CSV, dtype=str, keep_default_na=False)
+    legacy.columns = [c.strip().lower() for c in legacy.columns]
+    columns = set(legacy.columns)
+    if "tonality" not in columns or not ("link" in columns or {"title", "published"} <= columns):
+        st.warning(f"⚠️ {LOCAL_CSV} was not migrated: it needs a tonality column and a link (or title and published) column.")
+        return
+    blank = pd.Series("", index=legacy.index)
+    base = dict(zip(df["KEY"], df["TONALITY"].astype(str)))
+    changes, unmatched = {}, 0
+    for link, title, published, tonality in zip(
+        legacy.get("link", blank), legacy.get("title", blank), legacy.get("published", blank), legacy["tonality"]
+    ):
+        key = mention_key(link, title, published)
+        if key not in base:
+            unmatched += 1
+        elif tonality.strip() in TONALITIES and tonality.strip() != base[key]:
+            changes[key] = (tonality.strip(), base[key])
+    save_overrides(changes, OVERRIDES_CSV)
+    st.success(
+        f"Migrated {len(changes)} tonality corrections from {LOCAL_CSV}"
+        + (f" ({unmatched} of its rows match no current mention)" if unmatched else "")
+    )
+
+version_key, raw_df = get_csv_store().snapshot()
+df = load_data(version_key, raw_df)
+show_memory_report(df, version_key, "mentions")
 
 if df.empty:
     st.info("No data available.")
     st.stop()
 
-df = df.sort_values(by="published_parsed", ascending=False).reset_index(drop=True)
+if os.path.exists(LOCAL_CSV) and not os.path.exists(OVERRIDES_CSV):
+    migrate_legacy_csv(df)
+
+# ---------- SESSION STATE ----------
+# Per session: only corrections applied here that the shared cache has not picked up yet,
+# as {key: (tonality, original)}
+saved_overrides = load_saved_overrides(os.stat(OVERRIDES_CSV).st_mtime_ns if os.path.exists(OVERRIDES_CSV) else 0)
+session_overrides = st.session_state.setdefault("tonality_overrides", {})
+# Once the reloaded file has a correction (or it was set back to the original, which drops
+# it from the file), the session copy must go, or it would hide later edits by other editors
+for key, (tonality, original) in list(session_overrides.items()):
+    if key in saved_overrides or tonality == original:
+        del session_overrides[key]
 
-# Tonality mapping
-if "tonality_map" not in st.session_state:
-    st.session_state["tonality_map"] = {i: df.at[i, "TONALITY"] for i in df.index}
+def effective_tonality(i):
+    key = df.at[i, "KEY"]
+    if key in session_overrides:
+        return session_overrides[key][0]
+    return saved_overrides.get(key, df.at[i, "TONALITY"])
+
+# ---------- PAGING ----------
+page_size = st.sidebar.selectbox("Mentions per page", PAGE_SIZES, index=1)
+n_pages = max(1, -(-len(df) // page_size))
+page_no = st.sidebar.number_input(f"Page (1–{n_pages})", min_value=1, max_value=n_pages, value=1, step=1)
+page_df = df.iloc[(page_no - 1) * page_size : page_no * page_size]
 
 # ---------- COLOR CODES ----------
 COLORS = {
@@ -82,34 +138,35 @@ if is_editor:
             '<div style="max-height:600px; overflow-y:auto; padding-right:5px;">', 
             unsafe_allow_html=True
         )
-        for i in df.index:
-            current = st.session_state["tonality_map"][i]
+        for i in page_df.index:
+            current = effective_tonality(i)
             new_val = st.selectbox(
                 f"{i+1}. {df.at[i, 'TITLE'][:50]}...",
-                options=["Positive", "Neutral", "Negative"],
-                index=["Positive","Neutral","Negative"].index(current) if current in ["Positive","Neutral","Negative"] else 1,
-                key=f"tonality_{i}"
+                options=TONALITIES,
+                index=TONALITIES.index(current) if current in TONALITIES else 1,
+                # the row position keeps keys unique when the sheet repeats a link / title+date
+                key=f"tonality_{i}_{df.at[i, 'KEY']}"
             )
-            edited_values[i] = new_val
+            if new_val != current:
+                edited_values[i] = new_val
         st.markdown('</div>', unsafe_allow_html=True)
 
     # Execute update button
     if st.sidebar.button("Execute Update"):
-        for idx, val in edited_values.items():
-            st.session_state["tonality_map"][idx] = val
-        # Save updated CSV for persistence
-        updated_df = df.copy()
-        updated_df["TONALITY"] = [st.session_state["tonality_map"][i] for i in df.index]
-        updated_df.to_csv(LOCAL_CSV, index=False)
+        changes = {df.at[i, "KEY"]: (val, str(df.at[i, "TONALITY"])) for i, val in edited_values.items()}
+        # Save only the corrections, for persistence (and for retraining the tonality model)
+        save_overrides(changes, OVERRIDES_CSV)
+        session_overrides.update(changes)
         st.sidebar.success("Tonality changes applied and saved! Colours updated below.")
 
 # ---------- DISPLAY MENTIONS ----------
 st.title("📰 Mentions — Media Coverage")
 st.subheader("Mentions List")
+st.caption(f"Showing {page_df.index.min() + 1}–{page_df.index.max() + 1} of {len(df):,} mentions")
 
-for i in df.index:
-    row = df.loc[i]
-    tonality = st.session_state["tonality_map"][i]
+for i in page_df.index:
+    row = page_df.loc[i]
+    tonality = effective_tonality(i)
     bg_color = COLORS.get(tonality, "#ffffff")
     text_color = "#ffffff" if tonality in ["Positive", "Negative"] else "#ffffff"
 
@@ -137,8 +194,10 @@ for i in df.index:
 
 # ---------- DOWNLOAD UPDATED CSV ----------
 st.subheader("Export Updated Mentions")
-export_df = df.copy()
-export_df["TONALITY"] = [st.session_state["tonality_map"][i] for i in df.index]
+overlay = {**saved_overrides, **{key: val for key, (val, _) in session_overrides.items()}}
+export_df = df.drop(columns=["KEY"]).assign(
+    TONALITY=df["KEY"].astype("object").map(overlay).fillna(df["TONALITY"].astype("object"))
+)
 csv_bytes = export_df.to_csv(index=False).encode("utf-8")
 st.download_button(
     "📥 Download Updated Mentions CSV",
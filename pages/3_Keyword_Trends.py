@@ -4,35 +4,44 @@ import pandas as pd
 from collections import Counter
 import re
 
+from app_data import get_csv_store, show_memory_report
+from outlets import outlet_column, outlet_table
+
 st.title("🔑 Keyword Trends")
 
 # -------------------------------
 # Load dataset from Google Sheets
 # -------------------------------
-CSV_URL = "https://docs.google.com/spreadsheets/d/10LcDId4y2vz5mk7BReXL303-OBa2QxsN3drUcefpdSQ/export?format=csv"
+# One read-only frame per process, shared by every session
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_data(version_key, _raw):
+    # Rename columns to standard names
+    col_map = {
+        "published": "date",
+        "tonality": "sentiment",
+        "title": "title",
+        "source": "source"
+    }
+    df = _raw.rename(columns=col_map)
+
+    # Canonical outlet id, so one outlet's spellings filter together
+    df["outlet"] = outlet_column(_raw.rename(columns=str.lower)).astype("category")
+
+    # Keep only the needed columns
+    df = df[["date", "source", "outlet", "title", "sentiment"]]
+
+    # Convert date column to datetime
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    return df
 
 try:
-    df = pd.read_csv(CSV_URL)
+    version_key, raw_df = get_csv_store().snapshot()
 except Exception as e:
     st.error(f"Error loading dataset: {e}")
     st.stop()
 
-# -------------------------------
-# Rename columns to standard names
-# -------------------------------
-col_map = {
-    "published": "date",
-    "tonality": "sentiment",
-    "title": "title",
-    "source": "source"
-}
-df = df.rename(columns=col_map)
-
-# Keep only the needed columns
-df = df[["date", "source", "title", "sentiment"]]
-
-# Convert date column to datetime
-df["date"] = pd.to_datetime(df["date"], errors="coerce")
+df = load_data(version_key, raw_df)
+show_memory_report(df, version_key, "keyword_trends")
 
 # -------------------------------
 # Filters
@@ -46,16 +55,17 @@ if len(date_range) == 2:
     df = df[(df["date"] >= pd.to_datetime(date_range[0])) & (df["date"] <= pd.to_datetime(date_range[1]))]
 
 # Sentiment filter
-sentiment_options = ["All"] + sorted(df["sentiment"].dropna().unique())
+sentiment_options = ["All"] + sorted(s for s in df["sentiment"].dropna().unique() if s)
 sentiment_filter = st.sidebar.selectbox("Sentiment", sentiment_options)
 if sentiment_filter != "All":
     df = df[df["sentiment"] == sentiment_filter]
 
-# Source filter
-source_options = ["All"] + sorted(df["source"].dropna().unique())
-source_filter = st.sidebar.selectbox("Source", source_options)
+# Source filter (by canonical outlet)
+outlets = outlet_table(o for o in df["outlet"].dropna().unique() if o).sort_values("outlet_name")
+outlet_by_name = dict(zip(outlets["outlet_name"], outlets["outlet"]))
+source_filter = st.sidebar.selectbox("Source", ["All"] + list(outlet_by_name))
 if source_filter != "All":
-    df = df[df["source"] == source_filter]
+    df = df[df["outlet"] == outlet_by_name[source_filter]]
 
 # -------------------------------
 # Keyword Extraction
@@ -0,0 +1,90 @@
+# pages/4_Search.py
+import threading
+import time
+
+import streamlit as st
+
+from app_data import get_csv_store
+from outlets import outlet
+from search_index import INDEX_PATH, SearchIndex, snippet
+
+st.title("🔎 Search Mentions")
+
+# -------------------------------
+# Index (one per process, shared by every session)
+# -------------------------------
+@st.cache_resource(show_spinner=False)
+def get_index():
+    # Starts from the index the scraper saved when it runs on this host; otherwise
+    # sync_index builds it from the loaded data, once per process
+    return SearchIndex.load(INDEX_PATH), threading.Lock()
+
+@st.cache_resource(max_entries=1, show_spinner="Indexing new mentions…")
+def sync_index(version_key, _raw):
+    index, lock = get_index()
+    df = _raw.copy()
+    df.columns = [c.strip().lower() for c in df.columns]
+    with lock:
+        added = index.sync(df)
+        if added:
+            try:
+                index.save(INDEX_PATH)
+            except OSError:
+                pass  # read-only deployments keep the index in memory
+    return added
+
+try:
+    version_key, raw_df = get_csv_store().snapshot()
+except Exception as e:
+    st.error(f"Error loading dataset: {e}")
+    st.stop()
+
+sync_index(version_key, raw_df)
+index, lock = get_index()
+
+# -------------------------------
+# Filters
+# -------------------------------
+st.sidebar.header("Filters")
+date_range = None
+if len(index):
+    picked = st.sidebar.date_input("Date Range", [])
+    if len(picked) == 2:
+        date_range = (picked[0].isoformat(), picked[1].isoformat())
+outlet_ids = sorted({d["outlet"] for d in index.docs if d}, key=lambda i: outlet(i).name.lower())
+outlets = st.sidebar.multiselect("Source", outlet_ids, format_func=lambda i: outlet(i).name)
+tonalities = st.sidebar.multiselect("Sentiment", sorted({d["tonality"] for d in index.docs if d and d["tonality"]}))
+top_k = st.sidebar.selectbox("Results", [10, 20, 50, 100], index=1)
+
+# -------------------------------
+# Search
+# -------------------------------
+query = st.text_input("Search titles and summaries", placeholder='e.g. disbursement "wings to fly"')
+st.caption(f"{len(index):,} mentions indexed. Put phrases in quotes; results are ranked by relevance (BM25).")
+
+if query:
+    t0 = time.perf_counter()
+    with lock:
+        results, outlet_counts, tonality_counts = index.search(
+            query, k=top_k, date_range=date_range, outlets=set(outlets), tonalities=set(tonalities)
+        )
+    elapsed_ms = (time.perf_counter() - t0) * 1000
+    total = sum(outlet_counts.values())
+    st.caption(f"{total:,} matching mentions · top {len(results)} in {elapsed_ms:.1f} ms")
+
+    if total:
+        with st.expander("Facets"):
+            col1, col2 = st.columns(2)
+            col1.write({outlet(o).name: c for o, c in outlet_counts.most_common(10)})
+            col2.write({t or "Unknown": c for t, c in tonality_counts.most_common()})
+
+    for doc_id, score in results:
+        doc = index.docs[doc_id]
+        title = doc["title"] or doc["link"] or "(untitled)"
+        link = f"[{title}]({doc['link']})" if doc["link"] else title
+        st.markdown(f"**{link}**")
+        st.caption(f"{doc['published']} · {outlet(doc['outlet']).name} · {doc['tonality'] or '—'} · score {score:.2f}")
+        st.markdown(snippet(doc, query), unsafe_allow_html=True)
+        st.divider()
+    if not results:
+        st.info("No mentions match that search.")
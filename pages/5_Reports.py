@@ -0,0 +1,130 @@
+# pages/5_Reports.py
+import streamlit as st
+import pandas as pd
+import plotly.express as px
+
+from app_data import get_csv_store
+from reports import ReportCube, build_report, load_precomputed, render_markdown, standard_periods
+
+st.title("📑 Share of Voice Reports")
+
+# -------------------------------
+# Cached aggregates
+# -------------------------------
+# The daily cube (day x outlet x tonality) is rolled up once per data version from the
+# shared frame (a cube the scraper saved on this host is reused if it matches). Every
+# report below is a slice of it, built on first view and shared by all sessions until
+# the data or the day changes, so switching periods never goes back to the raw rows;
+# the current quarter and FY come ready-made from the scraper when it runs on this host.
+@st.cache_resource(max_entries=1, show_spinner=False)
+def get_cube(version_key, _raw):
+    saved = ReportCube.load()
+    if saved is not None and saved.version is not None and saved.version.key == version_key:
+        return saved
+    return ReportCube.from_frame(_raw.rename(columns=lambda c: c.strip().lower()))
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def get_report(version_key, period, today, _cube):
+    """Read-only: shared by every session."""
+    if period == standard_periods(today)[period.kind]:
+        saved = load_precomputed(version_key, today)
+        if saved:
+            return saved[period.kind]
+    report = build_report(_cube, period, today)
+    report["markdown"] = render_markdown(report)
+    return report
+
+
+try:
+    version_key, raw_df = get_csv_store().snapshot()
+except Exception as e:
+    st.error(f"Error loading dataset: {e}")
+    st.stop()
+
+cube = get_cube(version_key, raw_df)
+today = pd.Timestamp.now(tz="Africa/Nairobi").tz_localize(None).normalize()
+
+# -------------------------------
+# Period selection
+# -------------------------------
+st.sidebar.header("Report")
+kind = st.sidebar.radio("Compare", ["quarter", "fy"], format_func=lambda k: {"quarter": "Quarter vs previous quarter", "fy": "Financial year vs previous FY"}[k])
+current = standard_periods(today)[kind]
+periods = [current] + [p for p in cube.periods(kind) if p != current]
+period = st.sidebar.selectbox("Period", periods, format_func=lambda p: p.label)
+report = get_report(version_key, period, today, cube)
+cur, prev = report["current"], report["previous"]
+
+# -------------------------------
+# Headline
+# -------------------------------
+st.subheader(f"{cur['label']} vs {prev['label']}")
+if cur["in_progress"]:
+    st.caption(f"{cur['label']} is in progress ({cur['days']} days so far); compare the per-day rate.")
+
+
+def delta(now, before):
+    return f"{(now - before) / before:+.1%}" if before else None
+
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Mentions", f"{cur['mentions']:,}", delta(cur["mentions"], prev["mentions"]))
+col2.metric("Mentions per day", f"{cur['per_day']:.1f}", delta(cur["per_day"], prev["per_day"]))
+col3.metric("Tier-weighted mentions", f"{cur['weighted_mentions']:,.0f}", delta(cur["weighted_mentions"], prev["weighted_mentions"]))
+col4.metric("Net sentiment", f"{cur['net_sentiment']:.1%}", f"{(cur['net_sentiment'] - prev['net_sentiment']) * 100:+.1f} pts")
+
+# -------------------------------
+# Tonality mix
+# -------------------------------
+st.subheader("Tonality mix")
+mix = pd.DataFrame(
+    [(p["label"], t, n) for p in (cur, prev) for t, n in p["tonality"].items()],
+    columns=["Period", "Tonality", "Mentions"],
+)
+if mix["Mentions"].sum() > 0:
+    fig_mix = px.bar(
+        mix, x="Period", y="Mentions", color="Tonality", barmode="relative",
+        color_discrete_map={"Positive": "#008000", "Negative": "#B22222", "Neutral": "#808080"},
+    )
+    fig_mix.update_layout(margin=dict(t=6, b=6, l=6, r=6), height=320)
+    st.plotly_chart(fig_mix, use_container_width=True)
+else:
+    st.info("No mentions in either period.")
+
+# -------------------------------
+# Share of voice
+# -------------------------------
+st.subheader("Share of voice by outlet")
+sov = pd.DataFrame(report["share_of_voice"])
+if not sov.empty:
+    sov = sov.rename(columns={
+        "name": "Outlet", "tier": "Tier", "mentions": "Mentions", "share": "Share",
+        "weighted_share": "Weighted share", "previous_mentions": f"Mentions ({prev['label']})", "share_change": "Share change",
+    })
+    st.dataframe(
+        sov.drop(columns=["rank", "outlet"]),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "Share": st.column_config.NumberColumn(format="percent"),
+            "Weighted share": st.column_config.NumberColumn(format="percent"),
+            "Share change": st.column_config.NumberColumn(format="percent"),
+        },
+    )
+else:
+    st.info("No mentions in this period.")
+
+# -------------------------------
+# Export
+# -------------------------------
+st.subheader("Export")
+with st.expander("📄 Report preview"):
+    st.markdown(report["markdown"])
+st.download_button(
+    "⬇️ Download report (Markdown)",
+    report["markdown"].encode("utf-8"),
+    f"helb_share_of_voice_{period.kind}_{period.fy}{f'Q{period.quarter}' if period.quarter else ''}.md",
+    "text/markdown",
+    key="download-report",
+)
@@ -0,0 +1,396 @@
+# reports.py
+"""
+Share-of-voice reports: quarter vs previous quarter, financial year vs previous FY.
+- Financial years run Jul–Jun (FY 2025/2026 starts 1 Jul 2025); quarters are FY quarters
+- Mentions are rolled up once into a daily cube (day x outlet x tonality -> count), and
+  every period metric is a slice of the cube rather than a pass over the raw rows
+- Outlet shares are also tier-weighted (outlets.TIER_WEIGHTS), so national coverage
+  counts for more than niche blogs
+- The scraper keeps its cube in step with each ingest (rebuilding it from the sheet when
+  it is not) and renders the standard reports (current quarter and FY)
+- The Reports page serves those as they are when it shares the scraper's state/ and they
+  match the data it loaded; otherwise it rolls the cube up from that data and builds each
+  report on first view (st.cache_resource, per data version and day)
+
+State lives in state/report_cube.pkl and state/reports.json on the scraper host.
+
+Usage:
+    python reports.py rebuild [--csv PATH]                 # cube + standard reports from scratch
+    python reports.py show --kind fy [--period 2025] [--csv PATH]
+"""
+
+import argparse
+import json
+import os
+import pickle
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+import pandas as pd
+
+from helb_data import CSV_URL, CsvSource, atomic_write, run_main
+from outlets import outlet, outlet_column
+
+# ---------------- CONFIG ----------------
+STATE_DIR = os.environ.get("HELB_STATE_DIR", "state")
+CUBE_PATH = os.path.join(STATE_DIR, "report_cube.pkl")
+REPORTS_PATH = os.path.join(STATE_DIR, "reports.json")
+TONALITIES = ["Positive", "Neutral", "Negative"]
+TOP_OUTLETS = 10
+TIMEZONE = "Africa/Nairobi"
+
+# financial-year quarters (Jul–Jun)
+QUARTERS = ["Q1 (Jul–Sep)", "Q2 (Oct–Dec)", "Q3 (Jan–Mar)", "Q4 (Apr–Jun)"]
+QUARTER_BY_MONTH = {m: QUARTERS[((m - 7) % 12) // 3] for m in range(1, 13)}
+
+
+# ---------------- PERIODS ----------------
+def fy_label(fy):
+    return f"{fy}/{fy + 1}"
+
+
+def financial_periods(dates):
+    """FINANCIAL_YEAR ("2025/2026") and QUARTER columns for a datetime Series."""
+    fy_start = (dates.dt.year - (dates.dt.month < 7)).astype("Int64")
+    financial_year = fy_start.astype("string") + "/" + (fy_start + 1).astype("string")
+    quarter = pd.Categorical(dates.dt.month.map(QUARTER_BY_MONTH), categories=QUARTERS, ordered=True)
+    return financial_year, quarter
+
+
+class Period(NamedTuple):
+    kind: str         # "quarter" | "fy"
+    fy: int           # first calendar year of the financial year
+    quarter: int = 0  # 1-4 for quarters
+
+    @classmethod
+    def containing(cls, kind, date):
+        date = pd.Timestamp(date)
+        fy = date.year - (date.month < 7)
+        return cls(kind, fy, (date.month - 7) % 12 // 3 + 1 if kind == "quarter" else 0)
+
+    @property
+    def label(self):
+        if self.kind == "fy":
+            return f"FY {fy_label(self.fy)}"
+        return f"{QUARTERS[self.quarter - 1]} {fy_label(self.fy)}"
+
+    @property
+    def start(self):
+        start = pd.Timestamp(self.fy, 7, 1)
+        return start + pd.DateOffset(months=3 * (self.quarter - 1)) if self.kind == "quarter" else start
+
+    @property
+    def end(self):
+        """Exclusive."""
+        return self.start + pd.DateOffset(months=3 if self.kind == "quarter" else 12)
+
+    def previous(self):
+        if self.kind == "fy":
+            return Period("fy", self.fy - 1)
+        return Period("quarter", self.fy, self.quarter - 1) if self.quarter > 1 else Period("quarter", self.fy - 1, 4)
+
+
+def _today():
+    return pd.Timestamp.now(tz=TIMEZONE).tz_localize(None).normalize()
+
+
+# ---------------- CUBE ----------------
+class ReportCube:
+    """Daily mention counts per outlet and tonality, the only input of every report."""
+
+    def __init__(self, counts=None, version=None):
+        self.counts = counts if counts is not None else pd.DataFrame(
+            {"day": pd.Series(dtype="datetime64[ns]"), "outlet": pd.Series(dtype="object"),
+             "tonality": pd.Series(dtype="object"), "mentions": pd.Series(dtype="int64")}
+        )
+        self.version = version   # DataVersion of the sheet the cube reflects
+
+    @staticmethod
+    def rollup(df):
+        """Cube rows for a mentions frame (lowercase columns)."""
+        for col in ("published", "tonality"):
+            if col not in df:
+                df = df.assign(**{col: ""})
+        published = df["published"].astype("object").fillna("").astype(str).str.strip()
+        parsed = pd.to_datetime(published, errors="coerce", utc=True, format="mixed")
+        rows = pd.DataFrame({
+            "day": parsed.dt.tz_convert(TIMEZONE).dt.tz_localize(None).dt.normalize().astype("datetime64[ns]"),
+            "outlet": outlet_column(df).to_numpy(),
+            "tonality": df["tonality"].astype("object").fillna("").astype(str).str.strip().str.capitalize().to_numpy(),
+        }).dropna(subset=["day"])
+        return rows.groupby(["day", "outlet", "tonality"]).size().rename("mentions").reset_index()
+
+    @classmethod
+    def from_frame(cls, df, version=None):
+        return cls(cls.rollup(df), version)
+
+    @classmethod
+    def from_records(cls, records, version=None):
+        df = pd.DataFrame(list(records))
+        df.columns = [str(c).strip().lower() for c in df.columns]
+        return cls.from_frame(df, version) if len(df) else cls(version=version)
+
+    def add(self, mentions):
+        """Add new mention dicts (as appended by the scraper)."""
+        if not mentions:
+            return
+        new = self.rollup(pd.DataFrame(list(mentions)))
+        merged = pd.concat([self.counts, new], ignore_index=True)
+        self.counts = merged.groupby(["day", "outlet", "tonality"], as_index=False)["mentions"].sum()
+
+    def slice(self, start, end):
+        days = self.counts["day"]
+        return self.counts[(days >= start) & (days < end)]
+
+    def periods(self, kind):
+        """Periods with at least one mention, newest first."""
+        days = self.counts["day"]
+        if days.empty:
+            return []
+        found = {Period.containing(kind, d) for d in days.dt.to_period("M").unique().to_timestamp()}
+        return sorted(found, reverse=True)
+
+    def save(self, path=CUBE_PATH):
+        atomic_write(path, lambda fh: pickle.dump(self, fh, protocol=pickle.HIGHEST_PROTOCOL), "wb")
+
+    @classmethod
+    def load(cls, path=CUBE_PATH):
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "rb") as fh:
+                return pickle.load(fh)
+        except Exception as e:
+            print(f"⚠️ Report cube unreadable, rebuilding: {e}")
+            return None
+
+
+# ---------------- METRICS ----------------
+def period_metrics(cube, period, today=None):
+    """Headline numbers, tonality mix and outlet shares for one period."""
+    today = today or _today()
+    rows = cube.slice(period.start, period.end)
+    total = int(rows["mentions"].sum())
+    days = max(0, (min(period.end, today + pd.Timedelta(days=1)) - period.start).days)
+
+    tonality = rows.groupby("tonality")["mentions"].sum()
+    tonality = {t: int(tonality.get(t, 0)) for t in TONALITIES}
+
+    by_outlet = rows.groupby("outlet")["mentions"].sum()
+    weights = pd.Series([outlet(o).weight for o in by_outlet.index], index=by_outlet.index, dtype="float64")
+    weighted = by_outlet * weights
+    weighted_total = float(weighted.sum())
+    outlets = {
+        o: {
+            "mentions": int(n),
+            "share": n / total if total else 0.0,
+            "weighted_share": weighted[o] / weighted_total if weighted_total else 0.0,
+        }
+        for o, n in by_outlet.items()
+    }
+    return {
+        "label": period.label,
+        "start": period.start.strftime("%Y-%m-%d"),
+        "end": (period.end - pd.Timedelta(days=1)).strftime("%Y-%m-%d"),
+        "days": days,
+        "in_progress": bool(period.start <= today < period.end),
+        "mentions": total,
+        "per_day": total / days if days else 0.0,
+        "weighted_mentions": weighted_total,
+        "net_sentiment": (tonality["Positive"] - tonality["Negative"]) / total if total else 0.0,
+        "tonality": tonality,
+        "outlets": outlets,
+    }
+
+
+def build_report(cube, period, today=None):
+    """`period` against the one before it, as plain JSON-able values."""
+    current = period_metrics(cube, period, today)
+    previous = period_metrics(cube, period.previous(), today)
+    ranked = sorted(current["outlets"].items(), key=lambda kv: (-kv[1]["mentions"], kv[0]))[:TOP_OUTLETS]
+    share_of_voice = []
+    for rank, (outlet_id, m) in enumerate(ranked, start=1):
+        entry = outlet(outlet_id)
+        before = previous["outlets"].get(outlet_id, {"mentions": 0, "share": 0.0})
+        share_of_voice.append({
+            "rank": rank,
+            "outlet": outlet_id,
+            "name": entry.name,
+            "tier": entry.tier,
+            "mentions": m["mentions"],
+            "share": m["share"],
+            "weighted_share": m["weighted_share"],
+            "previous_mentions": before["mentions"],
+            "share_change": m["share"] - before["share"],
+        })
+    for metrics in (current, previous):
+        metrics["outlet_count"] = len(metrics.pop("outlets"))
+    return {
+        "kind": period.kind,
+        "period": list(period),
+        "version": cube.version.key if cube.version else "",
+        "generated_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "current": current,
+        "previous": previous,
+        "share_of_voice": share_of_voice,
+    }
+
+
+# ---------------- RENDER ----------------
+def _pct(x):
+    return f"{x:.1%}"
+
+
+def _change(now, before):
+    if not before:
+        return "new" if now else "–"
+    return f"{(now - before) / before:+.1%}"
+
+
+def _points(x):
+    return f"{x * 100:+.1f} pts"
+
+
+def _table(headers, rows):
+    lines = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+    lines += ["| " + " | ".join(str(c) for c in row) + " |" for row in rows]
+    return "\n".join(lines)
+
+
+def render_markdown(report):
+    """The whole report as one Markdown document (shown on the page and downloaded as-is)."""
+    cur, prev = report["current"], report["previous"]
+    progress = f" (to date: {cur['days']} days)" if cur["in_progress"] else ""
+    out = [
+        f"# HELB media share of voice: {cur['label']} vs {prev['label']}",
+        f"_{cur['start']} → {cur['end']}{progress} · generated {report['generated_at']}_",
+        "",
+        "## Headline",
+        _table(
+            ["", cur["label"], prev["label"], "Change"],
+            [
+                ["Mentions", f"{cur['mentions']:,}", f"{prev['mentions']:,}", _change(cur["mentions"], prev["mentions"])],
+                ["Mentions per day", f"{cur['per_day']:.1f}", f"{prev['per_day']:.1f}", _change(cur["per_day"], prev["per_day"])],
+                ["Tier-weighted mentions", f"{cur['weighted_mentions']:,.1f}", f"{prev['weighted_mentions']:,.1f}",
+                 _change(cur["weighted_mentions"], prev["weighted_mentions"])],
+                ["Net sentiment", _pct(cur["net_sentiment"]), _pct(prev["net_sentiment"]),
+                 _points(cur["net_sentiment"] - prev["net_sentiment"])],
+                ["Outlets", cur["outlet_count"], prev["outlet_count"], f"{cur['outlet_count'] - prev['outlet_count']:+d}"],
+            ],
+        ),
+        "",
+        "## Tonality mix",
+    ]
+    rows = []
+    for t in TONALITIES:
+        now, before = cur["tonality"][t], prev["tonality"][t]
+        share_now = now / cur["mentions"] if cur["mentions"] else 0.0
+        share_before = before / prev["mentions"] if prev["mentions"] else 0.0
+        rows.append([t, f"{now:,} ({_pct(share_now)})", f"{before:,} ({_pct(share_before)})", _points(share_now - share_before)])
+    out += [_table(["Tonality", cur["label"], prev["label"], "Share change"], rows), "", "## Share of voice by outlet"]
+    if report["share_of_voice"]:
+        out.append(_table(
+            ["#", "Outlet", "Tier", "Mentions", "Share", "Weighted share", f"Mentions ({prev['label']})", "Share change"],
+            [
+                [o["rank"], o["name"], o["tier"], f"{o['mentions']:,}", _pct(o["share"]), _pct(o["weighted_share"]),
+                 f"{o['previous_mentions']:,}", _points(o["share_change"])]
+                for o in report["share_of_voice"]
+            ],
+        ))
+    else:
+        out.append("No mentions in this period.")
+    return "\n".join(out) + "\n"
+
+
+# ---------------- PRECOMPUTE ----------------
+def standard_periods(today=None):
+    today = today or _today()
+    return {kind: Period.containing(kind, today) for kind in ("quarter", "fy")}
+
+
+def precompute(cube, today=None, path=REPORTS_PATH):
+    """Render the standard reports and save them next to the cube."""
+    today = today or _today()
+    reports = {}
+    for kind, period in standard_periods(today).items():
+        report = build_report(cube, period, today)
+        report["markdown"] = render_markdown(report)
+        reports[kind] = report
+    saved = {"version": cube.version.key if cube.version else "", "as_of": today.strftime("%Y-%m-%d"), "reports": reports}
+    atomic_write(path, lambda fh: json.dump(saved, fh))
+    return reports
+
+
+def load_precomputed(version_key, today=None, path=REPORTS_PATH):
+    """The saved standard reports, if they were made from this data version today."""
+    today = today or _today()
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as fh:
+            saved = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if saved.get("version") != version_key or saved.get("as_of") != today.strftime("%Y-%m-%d"):
+        return None
+    return saved["reports"]
+
+
+def update_reports(mentions, version, records=None, path=CUBE_PATH):
+    """Scraper stage: add this ingest's rows to the cube and re-render the standard reports.
+    `records` (the sheet before this ingest, or a function that loads it) rebuilds a cube
+    that is missing or out of step; without them such a cube is left for
+    `python reports.py rebuild` to redo, and None is returned."""
+    mentions = list(mentions)
+    cube = ReportCube.load(path)
+    known = cube is not None and version is not None
+    unchanged = known and cube.version == version and not mentions
+    appended = known and version.extends(cube.version) and version.row_count == cube.version.row_count + len(mentions)
+    if appended:
+        cube.add(mentions)
+    elif not unchanged:
+        # (unchanged data still gets its reports re-rendered, as "today" may be in a new quarter)
+        if records is None:
+            return None
+        if callable(records):
+            records = records()
+        cube = ReportCube.from_records(list(records) + mentions)
+    cube.version = version
+    cube.save(path)
+    return precompute(cube)
+
+
+# ---------------- CLI ----------------
+def main():
+    parser = argparse.ArgumentParser(description="Share-of-voice reports.")
+    parser.add_argument("command", choices=["rebuild", "show"])
+    parser.add_argument("--csv", default=CSV_URL, help="mentions export (URL or local CSV)")
+    parser.add_argument("--kind", choices=["quarter", "fy"], default="quarter")
+    parser.add_argument("--period", help="FY start year (e.g. 2025), plus quarter for --kind quarter (e.g. 2025Q2)")
+    args = parser.parse_args()
+
+    source = CsvSource(args.csv)
+    df = source.fetch()
+    df.columns = [c.strip().lower() for c in df.columns]
+    try:
+        version = source.probe()
+    except Exception:
+        version = None
+    cube = ReportCube.from_frame(df, version)
+
+    if args.command == "rebuild":
+        cube.save()
+        precompute(cube)
+        print(f"✅ Report cube: {len(cube.counts):,} cells from {len(df):,} mentions -> {CUBE_PATH}, {REPORTS_PATH}")
+        return
+
+    if args.period:
+        fy, _, quarter = args.period.upper().partition("Q")
+        period = Period(args.kind, int(fy), int(quarter or 1) if args.kind == "quarter" else 0)
+    else:
+        period = standard_periods()[args.kind]
+    print(render_markdown(build_report(cube, period)))
+
+
+if __name__ == "__main__":
+    run_main("reports")
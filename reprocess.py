@@ -0,0 +1,408 @@
+# reprocess.py
+"""
+Re-run the current clean / score / cluster stages over the whole archive.
+- A CSV archive is streamed in chunks through a process pool, with at most two chunks
+  per worker in flight, and written back chunk by chunk, so it is never held whole;
+  the sheet is read once. Each worker loads the tonality and topic models once
+- Every finished chunk is checkpointed under state/reprocess/<run>/, so an interrupted
+  run picks up where it stopped (same input, same models, same chunk size)
+- Rows are deduplicated across the archive in archive order, with the same rules as
+  ingest (link, then title + date, ignoring a " - Publisher" suffix and case)
+- The result replaces the data in one step (CSV: temp file + rename; sheet: staged in a
+  hidden worksheet and swapped in with a single batchUpdate), then a new dataset version
+  is written, so the pages do a full reload
+- Just before that step the input is checked again; if anyone wrote to it meanwhile
+  (e.g. the scraper appended rows), nothing is replaced and the run exits with an error
+
+Usage:
+    python reprocess.py                          # the Google Sheet
+    python reprocess.py --csv mentions.csv       # a local CSV, rewritten in place
+    python reprocess.py --refit-topics --workers 8
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from collections import Counter, deque
+from multiprocessing import Pool, cpu_count
+
+import pandas as pd
+
+from helb_data import atomic_write
+from ingest import CUTOFF_DATE, HEADERS, SeenMentions, clean_date
+from outlets import outlet_column
+
+# ---------------- CONFIG ----------------
+STATE_DIR = os.environ.get("HELB_STATE_DIR", "state")
+CHECKPOINT_DIR = os.path.join(STATE_DIR, "reprocess")
+CHUNK_ROWS = 20_000
+STAGING_SHEET = "_reprocess"
+STAGING_BATCH = 20_000     # rows per write into the staging worksheet
+
+
+# ---------------- STAGES (run in the workers) ----------------
+def clean_dates(values):
+    """clean_date() over a column: one vectorized parse, per-value fallback for the rest."""
+    values = values.astype("object").fillna("").astype(str).str.strip()
+    parsed = pd.to_datetime(values, errors="coerce", utc=True, format="mixed")
+    cleaned = parsed.dt.tz_convert("Africa/Nairobi").dt.strftime("%Y-%m-%d").astype("object")
+    missing = cleaned.isna() & values.ne("")
+    cleaned[missing] = values[missing].map(clean_date)
+    return cleaned.fillna("")
+
+
+_topic_model = None
+
+
+def _init_worker(topics_path):
+    """Load the models once per process."""
+    global _topic_model
+    from tonality_model import score_tonality
+    from topics import TopicModel
+
+    score_tonality(["warm up"], [""])
+    try:
+        _topic_model = TopicModel.load(topics_path)
+    except ImportError:
+        _topic_model = None
+
+
+def process_chunk(task):
+    """clean -> outlet -> score -> cluster for one chunk; returns (chunk index, frame, rows in, seconds)."""
+    from tonality_model import score_tonality
+    from topics import topic_column
+
+    index, df = task
+    t0 = time.perf_counter()
+    rows_in = len(df)
+    df = df.copy()
+    for col in HEADERS:
+        if col not in df.columns:
+            df[col] = ""
+    df = df.fillna("")
+    df["published"] = clean_dates(df["published"])
+    df = df[df["published"] >= CUTOFF_DATE.strftime("%Y-%m-%d")]
+    for col in ("title", "summary", "source", "link"):
+        df[col] = df[col].astype(str).str.strip()
+
+    df["outlet"] = outlet_column(df.drop(columns="outlet"))
+    df["tonality"] = score_tonality(df["title"], df["summary"]) if len(df) else []
+    if _topic_model is not None and _topic_model.fitted and len(df):
+        df["topic"] = topic_column(df, _topic_model)
+    return index, df.reset_index(drop=True), rows_in, time.perf_counter() - t0
+
+
+# ---------------- INPUT / OUTPUT ----------------
+class _ArchiveChanged(Exception):
+    pass
+
+
+class Archive:
+    """The mentions to re-process: a local CSV (streamed) or the Google Sheet (one read)."""
+
+    def __init__(self, csv=None):
+        self.csv = csv
+        self.sh = None
+        self.version = None
+        self._df = None
+        if csv:
+            self.stamp = self._csv_stamp()
+            self.columns = _lower(pd.read_csv(csv, nrows=0).columns)
+            return
+        from helb_data import open_sheet
+
+        self.sh, _ = open_sheet()
+        self.version = self._probe()
+        self._df = self._source().fetch()
+        self._df.columns = self.columns = _lower(self._df.columns)
+        self.stamp = f"sheet:{self.version.key if self.version else len(self._df)}"
+
+    def _csv_stamp(self):
+        stat = os.stat(self.csv)
+        return f"file:{os.path.abspath(self.csv)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def _source(self):
+        from helb_data import SheetsApiSource
+
+        return SheetsApiSource(self.sh)
+
+    def _probe(self):
+        try:
+            return self._source().probe()
+        except Exception:
+            return None
+
+    def unchanged(self):
+        """Nobody wrote to the archive since it was read (compare before swapping)."""
+        if self.csv:
+            return self._csv_stamp() == self.stamp
+        if self.version is not None:
+            return self._probe() == self.version
+        # no version marker: at least the row count must match
+        return len(self.sh.sheet1.col_values(1)) - 1 == len(self._df)
+
+    def chunks(self, rows):
+        """(chunk index, frame with lowercase columns), in archive order."""
+        if self._df is not None:
+            for i, start in enumerate(range(0, len(self._df), rows)):
+                yield i, self._df.iloc[start:start + rows]
+            return
+        reader = pd.read_csv(self.csv, dtype=str, keep_default_na=False, chunksize=rows)
+        for i, df in enumerate(reader):
+            df.columns = self.columns
+            yield i, df
+
+
+def _lower(columns):
+    return [str(c).strip().lower() for c in columns]
+
+
+def _file_stamp(path):
+    return f"{path}:{os.stat(path).st_mtime_ns}" if os.path.exists(path) else f"{path}:none"
+
+
+def write_csv_atomic(df, path):
+    atomic_write(path, lambda fh: df.to_csv(fh, index=False))
+
+
+def write_sheet_atomic(sh, df, unchanged=lambda: True):
+    """Stage the rows in a hidden worksheet, then swap them into the first worksheet
+    with one batchUpdate (applied all-or-nothing by the Sheets API). `unchanged()` is
+    asked right before the swap; if it says no, the staging sheet is dropped and
+    False is returned, with the first worksheet untouched."""
+    values = [df.columns.tolist()] + df.astype(str).values.tolist()
+    n_rows, n_cols = len(values), len(values[0])
+    try:
+        sh.del_worksheet(sh.worksheet(STAGING_SHEET))
+    except Exception:
+        pass
+    staging = sh.add_worksheet(title=STAGING_SHEET, rows=n_rows, cols=n_cols)
+    for start in range(0, n_rows, STAGING_BATCH):
+        staging.update(values=values[start:start + STAGING_BATCH], range_name=f"A{start + 1}")
+        print(f"  staged {min(start + STAGING_BATCH, n_rows) - 1:,} rows")
+
+    if not unchanged():
+        sh.del_worksheet(staging)
+        return False
+    target = sh.get_worksheet(0)
+    old_rows, old_cols = target.row_count, target.col_count
+    requests = [
+        {"updateSheetProperties": {
+            "properties": {"sheetId": target.id, "gridProperties": {"rowCount": max(old_rows, n_rows), "columnCount": max(old_cols, n_cols)}},
+            "fields": "gridProperties(rowCount,columnCount)",
+        }},
+        {"updateCells": {"range": {"sheetId": target.id}, "fields": "userEnteredValue"}},  # clear old values
+        {"copyPaste": {
+            "source": {"sheetId": staging.id, "startRowIndex": 0, "endRowIndex": n_rows, "startColumnIndex": 0, "endColumnIndex": n_cols},
+            "destination": {"sheetId": target.id, "startRowIndex": 0, "endRowIndex": n_rows, "startColumnIndex": 0, "endColumnIndex": n_cols},
+            "pasteType": "PASTE_VALUES",
+        }},
+    ]
+    if old_rows > n_rows:
+        requests.append({"deleteDimension": {"range": {"sheetId": target.id, "dimension": "ROWS", "startIndex": n_rows, "endIndex": old_rows}}})
+    sh.batch_update({"requests": requests})
+    sh.del_worksheet(staging)
+    return True
+
+
+# ---------------- CHECKPOINTS ----------------
+class Checkpoint:
+    """Finished chunks of one run, keyed by everything that decides their contents."""
+
+    def __init__(self, run_key, root=CHECKPOINT_DIR):
+        self.dir = os.path.join(root, hashlib.sha1(run_key.encode("utf-8")).hexdigest()[:16])
+        os.makedirs(self.dir, exist_ok=True)
+        self.manifest_path = os.path.join(self.dir, "manifest.json")
+        self.done = {}     # chunk index -> input rows
+        self.topics = ""   # stamp of the topic model the chunks were clustered with
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as fh:
+                manifest = json.load(fh)
+            self.done = {int(i): n for i, n in manifest["done"].items()}
+            self.topics = manifest.get("topics", "")
+
+    def path(self, index):
+        return os.path.join(self.dir, f"chunk_{index:05d}.pkl")
+
+    def save(self, index, df, rows_in):
+        atomic_write(self.path(index), df.to_pickle, "wb")
+        self.done[index] = rows_in
+        atomic_write(self.manifest_path, lambda fh: json.dump({"done": self.done, "topics": self.topics}, fh))
+
+    def load(self, index):
+        return pd.read_pickle(self.path(index))
+
+    def clear(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+        self.done = {}
+
+
+# ---------------- RUN ----------------
+def refit_topics(archive, chunk_rows, path):
+    """A fresh topic model, fitted chunk by chunk before the pool starts (workers only predict)."""
+    from topics import TopicModel, mention_texts
+
+    model = TopicModel()
+    total = 0
+    for _, df in archive.chunks(chunk_rows):
+        model.partial_fit(mention_texts(df["title"].astype(str), df["summary"].astype(str)))
+        total += len(df)
+    model.save(path)
+    print(f"🧭 Refit topics on {total:,} mentions")
+
+
+def dedup(df, seen=None):
+    """Keep the first of each mention as ingest tells them apart (ingest.SeenMentions).
+    `seen` carries what earlier chunks held, and is updated with this one."""
+    seen = SeenMentions() if seen is None else seen
+    keep = []
+    for record in df[["link", "title", "source", "published"]].to_dict("records"):
+        keep.append(record not in seen)
+        seen.update([record])
+    return df[keep].reset_index(drop=True)
+
+
+def process_all(archive, checkpoint, chunk_rows, workers, topics_path):
+    """Run the pending chunks through the pool, at most 2 per worker in flight, and
+    checkpoint each as it returns. Returns (rows processed, worker seconds)."""
+    tasks = ((i, df) for i, df in archive.chunks(chunk_rows) if i not in checkpoint.done)
+    pending = deque()
+    t0 = time.perf_counter()
+    rows_done, cpu_seconds = 0, 0.0
+    with Pool(workers, initializer=_init_worker, initargs=(topics_path,)) as pool:
+        while True:
+            while len(pending) < 2 * workers:
+                task = next(tasks, None)
+                if task is None:
+                    break
+                pending.append(pool.apply_async(process_chunk, (task,)))
+            if not pending:
+                break
+            index, out, rows_in, seconds = pending.popleft().get()
+            checkpoint.save(index, out, rows_in)
+            rows_done += rows_in
+            cpu_seconds += seconds
+            elapsed = time.perf_counter() - t0
+            print(f"  chunk {index + 1} · {rows_done:,} rows · {rows_done / max(elapsed, 1e-9):,.0f} rows/s")
+    return rows_done, cpu_seconds
+
+
+def main():
+    from topics import TOPICS_PATH
+    from tonality_model import MODEL_PATH
+
+    parser = argparse.ArgumentParser(description="Re-process the whole archive with the current stages.")
+    parser.add_argument("--csv", help="local CSV to re-process in place (default: the Google Sheet)")
+    parser.add_argument("--workers", type=int, default=cpu_count())
+    parser.add_argument("--chunk", type=int, default=CHUNK_ROWS, help="rows per chunk")
+    parser.add_argument("--refit-topics", action="store_true", help="refit the topic clusters on the archive first")
+    parser.add_argument("--dry-run", action="store_true", help="process and report, but do not write back")
+    args = parser.parse_args()
+
+    t_start = time.perf_counter()
+    archive = Archive(args.csv)
+
+    # The key names the refit rather than the refit's output, so a resumed run finds it
+    refit = args.refit_topics or not os.path.exists(TOPICS_PATH)
+    run_key = "|".join([archive.stamp, str(args.chunk), _file_stamp(MODEL_PATH), "refit" if refit else _file_stamp(TOPICS_PATH)])
+    checkpoint = Checkpoint(run_key)
+    if refit and checkpoint.done and checkpoint.topics != _file_stamp(TOPICS_PATH):
+        checkpoint.clear()   # the refit model was replaced since; its chunks are stale
+    if refit and not checkpoint.done:
+        try:
+            refit_topics(archive, args.chunk, TOPICS_PATH)
+        except ImportError:
+            print("⚠️ scikit-learn not installed; topics left as they are")
+    checkpoint.topics = _file_stamp(TOPICS_PATH)
+    if checkpoint.done:
+        print(f"♻️ Resuming: {len(checkpoint.done)} chunks ({sum(checkpoint.done.values()):,} rows) already done")
+
+    t0 = time.perf_counter()
+    rows_done, cpu_seconds = process_all(archive, checkpoint, args.chunk, args.workers, TOPICS_PATH)
+    elapsed = time.perf_counter() - t0
+    if rows_done:
+        print(
+            f"⚡ {rows_done:,} rows in {elapsed:.1f}s on {args.workers} workers: {rows_done / elapsed:,.0f} rows/s "
+            f"({rows_done / max(cpu_seconds, 1e-9):,.0f} rows/s per worker)"
+        )
+
+    from reports import ReportCube, precompute
+    from search_index import SearchIndex
+
+    # One pass over the checkpoints, in archive order, feeds the output, the search index
+    # and the report cube
+    columns = list(archive.columns) + [h for h in HEADERS if h not in archive.columns]
+    counts = {"processed": 0, "kept": 0, "last_link": "", "tonality": Counter()}
+    index, cube_parts = SearchIndex(), []
+
+    def deduped_chunks():
+        seen = SeenMentions()
+        for i in sorted(checkpoint.done):
+            df = checkpoint.load(i)
+            counts["processed"] += len(df)
+            df = dedup(df, seen)[columns]
+            counts["kept"] += len(df)
+            counts["tonality"].update(df["tonality"])
+            if len(df):
+                counts["last_link"] = str(df["link"].iloc[-1])
+            if not args.dry_run:
+                index.add_many(df.to_dict("records"))
+                cube_parts.append(ReportCube.rollup(df))
+            yield df
+
+    if args.dry_run:
+        for _ in deduped_chunks():
+            pass
+    elif args.csv:
+        def write(fh):
+            pd.DataFrame(columns=columns).to_csv(fh, index=False)
+            for df in deduped_chunks():
+                df.to_csv(fh, index=False, header=False)
+            if not archive.unchanged():
+                raise _ArchiveChanged
+
+        try:
+            atomic_write(args.csv, write)
+        except _ArchiveChanged:
+            sys.exit(f"❌ {args.csv} changed while re-processing; nothing was written. Run again.")
+    else:
+        frames = list(deduped_chunks())
+        result = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        if not write_sheet_atomic(archive.sh, result, archive.unchanged):
+            sys.exit("❌ The sheet changed while re-processing (someone wrote to it); nothing was replaced. Run again.")
+
+    total_in = sum(checkpoint.done.values())
+    print(f"🧹 {total_in - counts['processed']:,} rows before the cutoff, {counts['processed'] - counts['kept']:,} duplicates dropped")
+    if args.dry_run:
+        print(pd.Series(counts["tonality"], dtype="int64").sort_values(ascending=False).to_string())
+        return
+
+    if args.csv:
+        from helb_data import CsvSource
+
+        version = CsvSource(args.csv).probe()
+    else:
+        from helb_data import write_version_marker
+
+        version = write_version_marker(archive.sh, counts["kept"], counts["last_link"], rewritten=True)
+        print(f"🔖 Data version {version.key}")
+    checkpoint.clear()
+
+    # The search index and report cube would otherwise notice the rewrite later and rebuild then
+    index.save()
+    cube = ReportCube(
+        pd.concat(cube_parts, ignore_index=True).groupby(["day", "outlet", "tonality"], as_index=False)["mentions"].sum()
+        if cube_parts else None,
+        version,
+    )
+    cube.save()
+    precompute(cube)
+    print(f"🎉 Re-processed {counts['kept']:,} mentions in {time.perf_counter() - t_start:.1f}s total.")
+
+
+if __name__ == "__main__":
+    main()
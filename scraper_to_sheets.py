@@ -4,160 +4,359 @@ Scraper for HELB mentions in Kenyan news starting from Jan 1, 2025.
 - Cleans 'published' dates into YYYY-MM-DD
 - Removes mentions before Jan 1, 2025
 - Appends only NEW mentions (deduplicated by link/title+date)
+- Sources: Google News plus outlet RSS/Atom feeds and sitemaps, fetched concurrently
+  (the fetch -> normalize -> dedup -> score -> sink pipeline lives in ingest.py)
+- Afterwards: search index, alerts, and the standard share-of-voice reports (reports.py)
+
+Usage:
+    python scraper_to_sheets.py            # one full run (the daily workflow)
+    python scraper_to_sheets.py --daemon   # stay resident and poll each source on its own interval
+
+The daemon keeps the sheet session and the dedup keys in memory, asks Google News only
+for items newer than the last one it saw, and saves its state to state/scraper.json so
+a restart does not reload the sheet unless someone else changed it.
 """
 
-from gnews import GNews
-import pandas as pd
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import argparse
+import json
 import os
+import signal
 import sys
+import threading
 import time
 
-nltk.download("vader_lexicon", quiet=True)
+import pandas as pd
+
+from alerts import run_alerts
+from helb_data import DataVersion, SheetsApiSource, atomic_write, open_sheet, write_version_marker
+from ingest import (
+    CUTOFF_DATE, HttpCache, SeenMentions, clean_date, default_fetchers, fetch_all, load_http_cache, new_stats,
+    pipeline, save_http_cache,
+)
+from reports import update_reports
+from search_index import update_index
+from topics import backfill_blank_topics
 
 # ---------------- CONFIG ----------------
-SHEET_NAME = "HELB_Mentions"     # Google Sheet name
-SPREADSHEET_ID = None            # if you prefer ID, put it here
+QUERY = "HELB Kenya"
+QUERIES = [QUERY]          # Google News queries; feeds and sitemaps are configured in ingest.py
+KEYFILE = "service_account.json"
 
-HEADERS = ["title", "published", "source", "summary", "link", "tonality"]
+STATE_DIR = os.environ.get("HELB_STATE_DIR", "state")
+DAEMON_STATE = os.path.join(STATE_DIR, "scraper.json")
+MIN_INTERVAL = 5 * 60        # seconds between polls of a busy source
+START_INTERVAL = 30 * 60
+MAX_INTERVAL = 6 * 60 * 60   # a quiet source is still polled this often
+STATE_FORMAT = 2             # bumped when the saved dedup keys change shape (2: normalized titles)
 
-QUERY = "HELB Kenya"
-START_DATE = (2025, 1, 1)  # YYYY, MM, DD → fetch from Jan 1, 2025 onwards
-CUTOFF_DATE = pd.Timestamp("2025-01-01")
 
-# ---------------- AUTH ----------------
-SCOPES = [
-    "https://spreadsheets.google.com/feeds",
-    "https://www.googleapis.com/auth/drive",
-]
+# ---------------- CLEAN ----------------
+def clean_sheet(worksheet):
+    """Normalize stored dates and drop mentions before the cutoff.
+    Returns the records afterwards and whether the sheet was rewritten."""
+    existing_records = worksheet.get_all_records()
+    df = pd.DataFrame(existing_records)
+    print(f"✅ Existing rows before cleaning: {len(df)}")
 
-if not os.path.exists("service_account.json"):
-    print("❌ service_account.json missing.")
-    sys.exit(1)
+    sheet_rewritten = False
+    if not df.empty and "published" in df.columns:
+        original_published = df["published"].astype(str)
+        df["published"] = df["published"].apply(clean_date)
+        # Keep only mentions from Jan 1, 2025 onwards
+        df = df[df["published"] >= CUTOFF_DATE.strftime("%Y-%m-%d")]
 
-creds = ServiceAccountCredentials.from_json_keyfile_name("service_account.json", SCOPES)
-gc = gspread.authorize(creds)
+        # Push cleaned + filtered data back, only if cleaning changed anything
+        if df["published"].tolist() != original_published.tolist():
+            values = [df.columns.tolist()] + df.values.tolist()
+            worksheet.clear()
+            worksheet.update(values)
+            sheet_rewritten = True
+            print(f"🧹 Cleaned and kept only mentions since {CUTOFF_DATE.date()}")
 
-try:
-    if SPREADSHEET_ID:
-        sh = gc.open_by_key(SPREADSHEET_ID)
-    else:
-        sh = gc.open(SHEET_NAME)
-    worksheet = sh.get_worksheet(0)
-except Exception as e:
-    print(f"❌ Failed to open sheet: {e}")
-    sys.exit(1)
-
-# ---------------- LOAD EXISTING ----------------
-existing_records = worksheet.get_all_records()
-df = pd.DataFrame(existing_records)
-
-print(f"✅ Existing rows before cleaning: {len(df)}")
-
-# ---------------- CLEAN + FILTER ----------------
-def clean_date(val):
-    if not val or pd.isna(val):
-        return ""
+    # Refresh records after cleaning
+    if sheet_rewritten:
+        existing_records = worksheet.get_all_records()
+    print(f"✅ Existing rows after cleaning: {len(existing_records)}")
+    return existing_records, sheet_rewritten
+
+
+# ---------------- INGEST ----------------
+def mark_version(sh, row_count, last_link, rewritten=False):
+    """Lets the dashboard reload only when something changed (and fetch just the new tail)."""
+    try:
+        version = write_version_marker(sh, row_count, str(last_link).strip(), rewritten=rewritten)
+        print(f"🔖 Data version {version.key}")
+        return version
+    except Exception as e:
+        print(f"⚠️ Could not write version marker: {e}")
+        return None
+
+
+def backfill_topics(worksheet):
+    """Topics for rows stored before their cluster was named; returns the cells written."""
     try:
-        dt = pd.to_datetime(val, errors="coerce", utc=True)
-        if pd.isna(dt):
-            return ""
-        return dt.tz_convert("Africa/Nairobi").strftime("%Y-%m-%d")
-    except Exception:
+        filled = backfill_blank_topics(worksheet)
+    except Exception as e:
+        print(f"⚠️ Could not backfill topics: {e}")
+        return 0
+    if filled:
+        print(f"🏷️ Filled in {filled} blank topics")
+    return filled
+
+
+def refresh_reports(mentions, version, records=None):
+    """Report cube + standard reports; `records` (the sheet before this ingest, or a
+    function that loads it) allow a rebuild."""
+    try:
+        if update_reports(mentions, version, records) is None:
+            print("ℹ️ Report cube out of step; run `python reports.py rebuild`")
+    except Exception as e:
+        print(f"⚠️ Could not update reports: {e}")
+
+
+def after_ingest(mentions, version=None, records=None):
+    """Search index, alerts and reports, on just this ingest's rows."""
+    if mentions:
         try:
-            dt = pd.to_datetime(val, errors="coerce")
-            if pd.isna(dt):
-                return ""
-            return dt.strftime("%Y-%m-%d")
-        except Exception:
-            return ""
-
-if not df.empty and "published" in df.columns:
-    df["published"] = df["published"].apply(clean_date)
-    # Keep only mentions from Jan 1, 2025 onwards
-    df = df[df["published"] >= CUTOFF_DATE.strftime("%Y-%m-%d")]
-
-    # Push cleaned + filtered data back
-    values = [df.columns.tolist()] + df.values.tolist()
-    worksheet.clear()
-    worksheet.update(values)
-    print(f"🧹 Cleaned and kept only mentions since {CUTOFF_DATE.date()}")
-
-# ---------------- Refresh Records After Cleaning ----------------
-existing_records = worksheet.get_all_records()
-existing_links = {str(r.get("link", "")).strip() for r in existing_records if r.get("link")}
-existing_sigs = {(str(r.get("title", "")).strip(), str(r.get("published", "")).strip()) for r in existing_records}
-
-print(f"✅ Existing rows after cleaning: {len(existing_records)}")
-
-# ---------------- Scrape New Articles ----------------
-sia = SentimentIntensityAnalyzer()
-g = GNews(language="en", country="KE", start_date=START_DATE)
-
-articles = g.get_news(QUERY) or []
-print(f"📰 Articles fetched: {len(articles)}")
-
-def extract_field(article, keys):
-    for k in keys:
-        if article.get(k):
-            return article.get(k)
-    return ""
-
-new_rows = []
-for a in articles:
-    title = str(extract_field(a, ["title"])).strip()
-    summary = str(extract_field(a, ["description", "summary", "snippet"])).strip()
-    link = str(extract_field(a, ["url", "link"])).strip()
-    published_raw = str(extract_field(a, ["published date", "published", "publishedAt"])).strip()
-    source = ""
-    pub = a.get("publisher")
-    if isinstance(pub, dict):
-        source = pub.get("title", "")
-    if not source:
-        source = str(extract_field(a, ["source", "site", "domain"])).strip()
-
-    # Normalize new published dates
-    published_parsed = pd.to_datetime(published_raw, errors="coerce", utc=True)
-    if pd.isna(published_parsed):
-        published = ""
+            update_index(mentions)
+        except Exception as e:
+            print(f"⚠️ Could not update search index: {e}")
+
+    # Spike / sentiment-shift detection (state in state/alerts.pkl)
+    try:
+        for alert in run_alerts(mentions):
+            print(f"🚨 {alert['message']}")
+    except Exception as e:
+        print(f"⚠️ Alerting failed: {e}")
+
+    refresh_reports(mentions, version, records)
+
+
+# ---------------- ONE RUN ----------------
+def run_once(keyfile=KEYFILE):
+    if not os.path.exists(keyfile):
+        print(f"❌ {keyfile} missing.")
+        sys.exit(1)
+    try:
+        sh, worksheet = open_sheet(keyfile)
+    except Exception as e:
+        print(f"❌ Failed to open sheet: {e}")
+        sys.exit(1)
+
+    existing_records, sheet_rewritten = clean_sheet(worksheet)
+    seen = SeenMentions.from_records(existing_records)
+
+    fetchers = default_fetchers(QUERIES)
+    cache = load_http_cache()
+    stats = new_stats(fetchers)
+    archive = (
+        [str(r.get("title", "")) for r in existing_records],
+        [str(r.get("summary", "")) for r in existing_records],
+    )
+    new_mentions = list(pipeline(fetch_all(fetchers, cache, stats), seen, stats, worksheet, bootstrap=archive))
+    cache.commit()   # every fetched item is in the sheet now
+    save_http_cache(cache)
+
+    if not new_mentions:
+        print("ℹ️ No new mentions to append.")
+    # Cells changed in place, so readers need a full reload (like a cleaned sheet)
+    sheet_rewritten = backfill_topics(worksheet) > 0 or sheet_rewritten
+
+    if new_mentions or sheet_rewritten:
+        last_link = new_mentions[-1]["link"] if new_mentions else ""
+        last_link = last_link or (existing_records[-1].get("link", "") if existing_records else "")
+        version = mark_version(sh, len(existing_records) + len(new_mentions), last_link, rewritten=sheet_rewritten)
     else:
         try:
-            published = published_parsed.tz_convert("Africa/Nairobi").strftime("%Y-%m-%d")
+            version = SheetsApiSource(sh).probe()
         except Exception:
-            published = published_parsed.strftime("%Y-%m-%d")
+            version = None
 
-    if published and published < CUTOFF_DATE.strftime("%Y-%m-%d"):
-        continue  # skip old mentions
+    after_ingest(new_mentions, version, existing_records)
+    print("🎉 Done.")
 
-    text_for_sent = summary if summary else title
-    score = sia.polarity_scores(text_for_sent)["compound"]
-    tonality = "Positive" if score >= 0.05 else "Negative" if score <= -0.05 else "Neutral"
 
-    sig = (title, published)
-    if (link and link in existing_links) or (sig in existing_sigs):
-        continue
+# ---------------- DAEMON ----------------
+class ScraperDaemon:
+    """Resident scraper: one sheet session, in-memory dedup, per-source adaptive polling."""
 
-    row = [title, published, source, summary, link, tonality]
-    new_rows.append(row)
+    def __init__(self, queries=QUERIES, keyfile=KEYFILE, state_path=DAEMON_STATE, fetchers=None):
+        self.fetchers = {f.name: f for f in (fetchers or default_fetchers(queries))}
+        self.keyfile = keyfile
+        self.state_path = state_path
+        self.sh = self.worksheet = None
+        self.version = None          # DataVersion of the sheet as this process last saw it
+        self.seen = SeenMentions()
+        self.http_cache = HttpCache()
+        self.bootstrap = None        # archive texts, kept only until the first ingest
+        self.schedule = {name: {"last_seen": None, "interval": START_INTERVAL, "next_due": 0.0} for name in self.fetchers}
+        self.stop = threading.Event()
 
-# ---------------- Append to Sheet ----------------
-if not new_rows:
-    print("ℹ️ No new mentions to append.")
-else:
-    if len(worksheet.get_all_values()) == 0:
-        worksheet.append_row(HEADERS, value_input_option="USER_ENTERED")
-        time.sleep(1)
+    @property
+    def row_count(self):
+        return self.version.row_count if self.version else 0
+
+    # -------- state --------
+    def load_state(self):
+        self.http_cache = load_http_cache()
+        if not os.path.exists(self.state_path):
+            return False
+        with open(self.state_path, encoding="utf-8") as fh:
+            state = json.load(fh)
+        if state.get("format") != STATE_FORMAT:
+            print("♻️ Daemon state is from an older version; reloading the sheet")
+            return False
+        self.version = DataVersion(*state["version"]) if state.get("version") else None
+        self.seen = SeenMentions(state.get("links", []), state.get("sigs", []))
+        for name, entry in state.get("sources", {}).items():
+            if name in self.schedule:
+                self.schedule[name].update(entry)
+        print(f"♻️ Restored daemon state: {self.row_count} rows, {len(self.seen.links)} links")
+        return True
+
+    def save_state(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        state = {
+            "format": STATE_FORMAT,
+            "version": list(self.version) if self.version else None,
+            "links": sorted(self.seen.links),
+            "sigs": sorted(self.seen.sigs),
+            "sources": self.schedule,
+        }
+        atomic_write(self.state_path, lambda fh: json.dump(state, fh))
+        save_http_cache(self.http_cache)
+
+    # -------- sheet --------
+    def connect(self):
+        if self.sh is None:
+            self.sh, self.worksheet = open_sheet(self.keyfile)
+            print("🔐 Sheet session opened")
+
+    def sync_sheet(self):
+        """Catch up with writes made by anyone else (e.g. the daily workflow).
+        Appended rows are read as a tail; anything else reloads the sheet."""
+        self.connect()
+        source = SheetsApiSource(self.sh)
+        try:
+            remote = source.probe()
+        except Exception:
+            remote = None
+        if remote is not None and remote == self.version:
+            return
+        if remote is not None and remote.extends(self.version):
+            before = self.row_count
+            tail = source.fetch(offset=before).to_dict("records")
+            self.seen.update(tail)
+            # An out-of-step cube is rebuilt from the rows we already had plus the tail
+            refresh_reports(tail, remote, lambda: source.fetch().head(before).to_dict("records"))
+            self.version = remote
+            print(f"🔄 Picked up {len(tail)} rows appended elsewhere")
+            return
+
+        records, rewritten = clean_sheet(self.worksheet)
+        self.seen = SeenMentions.from_records(records)
+        self.bootstrap = ([str(r.get("title", "")) for r in records], [str(r.get("summary", "")) for r in records])
+        if rewritten or remote is None:
+            last_link = records[-1].get("link", "") if records else ""
+            remote = mark_version(self.sh, len(records), last_link, rewritten=rewritten)
+        self.version = remote or DataVersion("", len(records))
+        refresh_reports([], self.version, records)
+
+    # -------- polling --------
+    def poll(self, names):
+        """One pass of the pipeline over the sources that are due, fetched concurrently."""
+        due = [self.fetchers[n] for n in names]
+        for f in due:
+            # Google News is asked only for items newer than the last one seen
+            f.since = self.schedule[f.name]["last_seen"]
+        stats = new_stats(due)
+        items = list(fetch_all(due, self.http_cache, stats))
+        if items:
+            # Someone else may have appended the same stories since the last poll
+            self.sync_sheet()
+        # Mentions count as seen batch by batch, once appended; if an append fails, the
+        # batches before it are still recorded and last_seen stays put, so the rest is retried
+        mentions = []
+        try:
+            for mention in pipeline(items, self.seen, stats, self.worksheet, bootstrap=self.bootstrap):
+                mentions.append(mention)
+        except BaseException:
+            for f in due:
+                self.http_cache.drop(f.name)   # refetch in full next time
+            raise
+        finally:
+            if mentions:
+                self.record_appended(mentions)
+        self.http_cache.commit()
+
+        now = pd.Timestamp.now(tz="UTC")
+        for f in due:
+            entry, s = self.schedule[f.name], stats[f.name]
+            if s["newest"] is not None:
+                newest = min(s["newest"], now)
+                if not entry["last_seen"] or newest > pd.Timestamp(entry["last_seen"]):
+                    entry["last_seen"] = newest.isoformat()
+            if s["error"]:
+                entry["interval"] = min(MAX_INTERVAL, entry["interval"] * 2)
+            elif s["new"]:
+                entry["interval"] = max(MIN_INTERVAL, entry["interval"] / 2)  # busy source: poll sooner
+            else:
+                entry["interval"] = min(MAX_INTERVAL, entry["interval"] * 1.5)
+            entry["next_due"] = time.time() + entry["interval"]
+
+    def record_appended(self, mentions):
+        self.bootstrap = None
+        before = self.row_count
+        row_count = before + len(mentions)
+        rewritten = backfill_topics(self.worksheet) > 0
+        self.version = mark_version(self.sh, row_count, mentions[-1]["link"], rewritten) or DataVersion("", row_count)
+        # Read only if the report cube is out of step (e.g. the topic backfill rewrote rows)
+        after_ingest(mentions, self.version, lambda: SheetsApiSource(self.sh).fetch().head(before).to_dict("records"))
+
+    def run(self):
+        self.load_state()
+        self.sync_sheet()
+        self.save_state()
+        print(f"🕑 Daemon polling {len(self.fetchers)} sources (Ctrl+C to stop)")
+        while not self.stop.is_set():
+            wait = min(e["next_due"] for e in self.schedule.values()) - time.time()
+            if wait > 0 and self.stop.wait(wait):
+                break
+            due = [n for n, e in self.schedule.items() if e["next_due"] <= time.time()]
+            try:
+                self.poll(due)
+            except Exception as e:
+                # Back off, and reopen the sheet session next time in case it expired
+                for n in due:
+                    entry = self.schedule[n]
+                    entry["interval"] = min(MAX_INTERVAL, entry["interval"] * 2)
+                    entry["next_due"] = time.time() + entry["interval"]
+                self.sh = self.worksheet = None
+                print(f"⚠️ Poll failed: {e}")
+            self.save_state()
+        self.save_state()
+        print("👋 Daemon stopped, state saved.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape HELB mentions into the Google Sheet.")
+    parser.add_argument("--daemon", action="store_true", help="stay resident and poll on adaptive intervals")
+    parser.add_argument("--query", action="append", help=f"Google News query (repeatable, default {QUERIES})")
+    parser.add_argument("--keyfile", default=KEYFILE)
+    args = parser.parse_args()
+
+    if not args.daemon:
+        run_once(args.keyfile)
+        return
+
+    if not os.path.exists(args.keyfile):
+        print(f"❌ {args.keyfile} missing.")
+        sys.exit(1)
+    daemon = ScraperDaemon(args.query or QUERIES, args.keyfile)
+    signal.signal(signal.SIGTERM, lambda *_: daemon.stop.set())
+    signal.signal(signal.SIGINT, lambda *_: daemon.stop.set())
+    daemon.run()
 
-    try:
-        worksheet.append_rows(new_rows, value_input_option="USER_ENTERED")
-        print(f"✅ Appended {len(new_rows)} new mentions.")
-    except Exception as e:
-        print(f"⚠️ Batch append failed: {e}. Trying row-by-row...")
-        for r in new_rows:
-            worksheet.append_row(r, value_input_option="USER_ENTERED")
-        print(f"✅ Appended {len(new_rows)} mentions (row-by-row).")
 
-print("🎉 Done.")
+if __name__ == "__main__":
+    main()
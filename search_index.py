@@ -0,0 +1,294 @@
+# search_index.py
+"""
+Persistent BM25 full-text index over the mentions archive.
+- Positional postings over title, summary and (when present) enriched body text,
+  so quoted phrases match exactly; title terms weigh more
+- Updated incrementally: the scraper adds each ingest's rows to its own copy, and the
+  Search page indexes whatever the loaded data has that its index has not seen yet
+  (from scratch when the scraper's copy is not on the app's host); a row that changed
+  or disappeared (per-row content hash) is re-indexed or dropped on its own: its old
+  doc is tombstoned, and tombstones are compacted away once they outnumber live docs
+- Date / outlet / tonality facets filter candidates before scoring; top-k via a heap.
+  Outlets are ids (outlets.resolve), so one outlet is one facet whatever its spelling
+
+State lives in state/search_index.pkl.
+
+Usage:
+    python search_index.py rebuild [--csv PATH]   # index the whole archive from scratch
+"""
+
+import argparse
+import hashlib
+import heapq
+import html
+import math
+import os
+import pickle
+import re
+from collections import Counter
+
+from helb_data import CSV_URL, CsvSource, atomic_write, mention_key, run_main
+from outlets import resolve
+
+# ---------------- CONFIG ----------------
+STATE_DIR = os.environ.get("HELB_STATE_DIR", "state")
+INDEX_PATH = os.path.join(STATE_DIR, "search_index.pkl")
+FIELDS = ("title", "summary", "body")
+FIELD_WEIGHTS = {"title": 2.0, "summary": 1.0, "body": 1.0}
+FIELD_GAP = 10_000        # position offset between fields, so phrases never span two fields
+K1, B = 1.2, 0.75
+SNIPPET_CHARS = 220
+
+_TOKEN = re.compile(r"\w+")
+_QUERY = re.compile(r'"([^"]+)"|(\S+)')
+
+
+def tokenize(text):
+    return _TOKEN.findall(str(text or "").lower())
+
+
+def content_hash(doc):
+    """Digest of the indexed fields of a doc dict, to spot rows edited in the sheet."""
+    text = "\x1f".join(doc[f] for f in ("title", "summary", "body", "link", "source", "outlet", "tonality", "published"))
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _doc(key, mention):
+    doc = {
+        "key": key,
+        **{f: str(mention.get(f, "") or "") for f in ("title", "summary", "body", "link", "source", "tonality")},
+        "published": str(mention.get("published", "") or "")[:10],
+    }
+    stored = str(mention.get("outlet", "") or "")
+    doc["outlet"] = resolve(stored) if stored else resolve(doc["source"], doc["link"])
+    doc["hash"] = content_hash(doc)
+    return doc
+
+
+def parse_query(query):
+    """Quoted phrases and loose terms: 'fees "wings to fly"' -> (["fees"], [["wings", "to", "fly"]])."""
+    terms, phrases = [], []
+    for phrase, word in _QUERY.findall(query or ""):
+        if phrase:
+            tokens = tokenize(phrase)
+            if len(tokens) > 1:
+                phrases.append(tokens)
+            else:
+                terms.extend(tokens)
+        else:
+            terms.extend(tokenize(word))
+    return terms, phrases
+
+
+class SearchIndex:
+    """Inverted index: term -> {doc id: (weighted tf, positions)}, plus per-doc fields for facets and snippets."""
+
+    def __init__(self):
+        self.postings = {}
+        self.docs = []          # dicts: key, title, summary, body, link, published, source, outlet, tonality, hash
+                                # (None once removed)
+        self.lengths = []
+        self.ids = {}           # mention key -> doc id (live docs only)
+        self.total_length = 0.0
+        self.removed = 0        # tombstoned doc ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    # -------- building --------
+    def add(self, mention):
+        """Index one mention (a sheet row dict); rows already indexed are skipped."""
+        key = mention_key(mention.get("link", ""), mention.get("title", ""), mention.get("published", ""))
+        if key in self.ids:
+            return False
+        self._insert(key, _doc(key, mention))
+        return True
+
+    def _insert(self, key, doc):
+        doc_id = len(self.docs)
+        self.ids[key] = doc_id
+        self.docs.append(doc)
+        length, terms = 0.0, {}
+        for n, field in enumerate(FIELDS):
+            weight = FIELD_WEIGHTS[field]
+            for pos, token in enumerate(tokenize(doc[field])):
+                tf, positions = terms.get(token, (0.0, []))
+                positions.append(n * FIELD_GAP + pos)
+                terms[token] = (tf + weight, positions)
+                length += weight
+        for token, posting in terms.items():
+            self.postings.setdefault(token, {})[doc_id] = (posting[0], tuple(posting[1]))
+        self.lengths.append(length)
+        self.total_length += length
+
+    def add_many(self, mentions):
+        return sum(self.add(m) for m in mentions)
+
+    def remove(self, key):
+        """Drop a mention: its postings go and its doc id is left as a tombstone."""
+        doc_id = self.ids.pop(key, None)
+        if doc_id is None:
+            return False
+        doc = self.docs[doc_id]
+        for token in {t for field in FIELDS for t in tokenize(doc[field])}:
+            posting = self.postings.get(token)
+            if posting is not None:
+                posting.pop(doc_id, None)
+                if not posting:
+                    del self.postings[token]
+        self.total_length -= self.lengths[doc_id]
+        self.lengths[doc_id] = 0.0
+        self.docs[doc_id] = None
+        self.removed = getattr(self, "removed", 0) + 1
+        return True
+
+    def compact(self):
+        """Renumber the live docs, once tombstones outnumber them (no re-read of the sheet)."""
+        live = [d for d in self.docs if d is not None]
+        self.__init__()
+        for doc in live:
+            self._insert(doc["key"], doc)
+
+    def sync(self, df):
+        """Bring the index up to date with a sheet frame (lowercase columns); returns the
+        number of docs added, re-indexed or dropped. Appended rows are added; a row whose
+        content changed (edited by hand, or the sheet rewritten) is re-indexed on its own,
+        and one that disappeared is dropped."""
+        current = {}
+        for r in df.fillna("").astype(str).to_dict("records"):
+            key = mention_key(r.get("link", ""), r.get("title", ""), r.get("published", ""))
+            current.setdefault(key, r)   # add() keeps the first row of a key
+        changed = 0
+        for key in [k for k in self.ids if k not in current]:
+            changed += self.remove(key)
+        for key, record in current.items():
+            doc = _doc(key, record)
+            doc_id = self.ids.get(key)
+            if doc_id is not None:
+                if self.docs[doc_id].get("hash") == doc["hash"]:
+                    continue
+                self.remove(key)
+            self._insert(key, doc)
+            changed += 1
+        if getattr(self, "removed", 0) > len(self.ids):
+            self.compact()
+        return changed
+
+    # -------- querying --------
+    def _phrase_docs(self, phrase):
+        postings = [self.postings.get(t) for t in phrase]
+        if not all(postings):
+            return set()
+        docs = set.intersection(*(set(p) for p in postings))
+        matches = set()
+        for doc in docs:
+            starts = set(postings[0][doc][1])
+            for offset, posting in enumerate(postings[1:], start=1):
+                starts &= {p - offset for p in posting[doc][1]}
+                if not starts:
+                    break
+            if starts:
+                matches.add(doc)
+        return matches
+
+    def _allowed(self, doc, date_range, outlets, tonalities):
+        d = self.docs[doc]
+        if outlets and d["outlet"] not in outlets:
+            return False
+        if tonalities and d["tonality"] not in tonalities:
+            return False
+        if date_range and not (date_range[0] <= d["published"] <= date_range[1]):
+            return False
+        return True
+
+    def search(self, query, k=20, date_range=None, outlets=None, tonalities=None):
+        """Top-k (doc, score) for a query. Loose terms are OR-ed and BM25-ranked; every quoted
+        phrase must match. `date_range` is a pair of YYYY-MM-DD strings."""
+        terms, phrases = parse_query(query)
+        if not terms and not phrases:
+            return [], Counter(), Counter()
+        if phrases:
+            candidates = set.intersection(*(self._phrase_docs(p) for p in phrases))
+        else:
+            candidates = set()
+            for t in terms:
+                candidates.update(self.postings.get(t, ()))
+        candidates = [d for d in candidates if self._allowed(d, date_range, outlets, tonalities)]
+
+        n = len(self.ids)
+        avg_len = self.total_length / n if n else 1.0
+        scores = dict.fromkeys(candidates, 0.0)
+        for t in set(terms) | {t for p in phrases for t in p}:
+            posting = self.postings.get(t)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for doc in candidates:
+                hit = posting.get(doc)
+                if hit:
+                    tf = hit[0]
+                    norm = K1 * (1 - B + B * self.lengths[doc] / avg_len)
+                    scores[doc] += idf * tf * (K1 + 1) / (tf + norm)
+
+        outlet_counts = Counter(self.docs[d]["outlet"] for d in candidates)
+        tonality_counts = Counter(self.docs[d]["tonality"] for d in candidates)
+        top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], self.docs[item[0]]["published"]))
+        return top, outlet_counts, tonality_counts
+
+    # -------- persistence --------
+    def save(self, path=INDEX_PATH):
+        atomic_write(path, lambda fh: pickle.dump(self, fh, protocol=pickle.HIGHEST_PROTOCOL), "wb")
+
+    @classmethod
+    def load(cls, path=INDEX_PATH):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "rb") as fh:
+            return pickle.load(fh)
+
+
+def snippet(doc, query, width=SNIPPET_CHARS):
+    """HTML-escaped excerpt around the first query hit, with matched terms in <mark>."""
+    terms, phrases = parse_query(query)
+    words = set(terms) | {t for p in phrases for t in p}
+    text = doc["summary"] or doc["body"] or doc["title"]
+    lowered = text.lower()
+    hits = [m.start() for w in words for m in re.finditer(rf"\b{re.escape(w)}\b", lowered)]
+    start = max(min(hits) - width // 3, 0) if hits else 0
+    excerpt = text[start:start + width]
+    excerpt = ("…" if start else "") + excerpt + ("…" if start + width < len(text) else "")
+    return highlight(excerpt, words)
+
+
+def highlight(text, words):
+    escaped = html.escape(text)
+    if not words:
+        return escaped
+    pattern = re.compile(r"\b(" + "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True)) + r")\b", re.IGNORECASE)
+    return pattern.sub(r"<mark>\1</mark>", escaped)
+
+
+def update_index(mentions, path=INDEX_PATH):
+    """Scraper stage: add this ingest's rows to the saved index."""
+    index = SearchIndex.load(path)
+    added = index.add_many(mentions)
+    index.save(path)
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the full-text search index.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--csv", default=CSV_URL, help="mentions export (URL or local CSV)")
+    args = parser.parse_args()
+
+    df = CsvSource(args.csv).fetch()
+    df.columns = [c.strip().lower() for c in df.columns]
+    index = SearchIndex()
+    index.sync(df)
+    index.save()
+    print(f"✅ Indexed {len(index)} mentions, {len(index.postings)} terms -> {INDEX_PATH}")
+
+
+if __name__ == "__main__":
+    run_main("search_index")
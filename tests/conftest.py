@@ -0,0 +1,34 @@
+# tests/conftest.py
+"""
+Shared fixtures. The modules read HELB_STATE_DIR / HELB_OVERRIDES_CSV / HELB_CSV_URL /
+HELB_TONALITY_LABELS at import time, so all of them point into a throwaway directory before
+any module is imported.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_STATE = tempfile.mkdtemp(prefix="helb-tests-")
+os.environ["HELB_STATE_DIR"] = os.path.join(_STATE, "state")
+os.environ["HELB_OVERRIDES_CSV"] = os.path.join(_STATE, "tonality_overrides.csv")
+os.environ["HELB_CSV_URL"] = os.path.join(_STATE, "mentions.csv")   # what the pages load
+os.environ["HELB_TONALITY_LABELS"] = os.path.join(_STATE, "tonality_labels.csv")
+
+import pytest  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "fixtures")
+
+
+@pytest.fixture
+def fixture_path():
+    return lambda *parts: os.path.join(FIXTURES, *parts)
+
+
+@pytest.fixture
+def pages_csv():
+    """Path of the CSV the pages read; tests write their rows there."""
+    return os.environ["HELB_CSV_URL"]
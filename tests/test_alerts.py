@@ -0,0 +1,82 @@
+from datetime import date, timedelta
+
+from alerts import CoverageDetector, MemorySink
+
+START = date(2025, 3, 1)
+
+
+def mentions(day, n, tonality="Neutral", outlet="nation", title="HELB update"):
+    return [{"title": f"{title} {i}", "summary": "", "published": str(day), "outlet": outlet, "tonality": tonality}
+            for i in range(n)]
+
+
+def quiet_days(detector, days, per_day=2, **kwargs):
+    for i in range(days):
+        day = START + timedelta(days=i)
+        assert detector.update(mentions(day, per_day, **kwargs), day=day) == []
+    return START + timedelta(days=days)
+
+
+def test_volume_spike_goes_to_the_sink():
+    sink = MemorySink()
+    detector = CoverageDetector(sinks=[sink])
+    spike_day = quiet_days(detector, 10)
+    alerts = detector.update(mentions(spike_day, 15), day=spike_day)
+    kinds = {(a["kind"], a["key"]) for a in alerts}
+    assert ("volume_spike", "all") in kinds and ("source_spike", "nation") in kinds
+    assert sink.alerts == alerts and all(a["day"] == str(spike_day) for a in alerts)
+    # The same spike is raised once per day
+    assert detector.update(mentions(spike_day, 3), day=spike_day) == []
+
+
+def test_negative_share_jump_goes_to_the_sink():
+    sink = MemorySink()
+    detector = CoverageDetector(sinks=[sink])
+    day = quiet_days(detector, 10, per_day=6, tonality="Positive")
+    detector.update(mentions(day, 6, tonality="Negative"), day=day)
+    shift = [a for a in sink.alerts if a["kind"] == "negative_share"]
+    assert len(shift) == 1 and shift[0]["share"] == 1.0 and shift[0]["baseline_share"] == 0.0
+
+
+def test_mentions_count_toward_their_published_day():
+    detector = CoverageDetector(sinks=[MemorySink()])
+    ingest_day = quiet_days(detector, 10)
+    # A backlog spread over the last week arrives in one ingest: no day has a spike
+    backlog = [m for i in range(1, 8) for m in mentions(ingest_day - timedelta(days=i), 2)]
+    assert detector.update(backlog + mentions(ingest_day, 2), day=ingest_day) == []
+    assert detector.state.day == ingest_day
+    # Six of those days were already closed into the baselines, so those rows are not counted
+    assert detector.state.late == 12 and detector.state.total.today == 2
+
+
+def test_undated_and_future_mentions_count_toward_the_ingest_day():
+    detector = CoverageDetector(sinks=[MemorySink()])
+    day = quiet_days(detector, 3)
+    undated = [dict(m, published="") for m in mentions(day, 2)]
+    detector.update(undated + mentions(day + timedelta(days=5), 1), day=day)
+    assert detector.state.day == day and detector.state.total.today == 3
+
+
+def test_state_keyed_by_source_spelling_is_migrated_to_outlet_ids(tmp_path):
+    import pickle
+
+    from alerts import Baseline, DetectorState
+
+    old = DetectorState()
+    old.day = START
+    for name, mean in [("Daily Nation", 2.0), ("Nation Africa", 1.0), ("The Standard", 1.5)]:
+        old.sources[name] = Baseline()
+        old.sources[name].mean, old.sources[name].days = mean, 10
+    old.alerted = {("source_spike", "Daily Nation"), ("volume_spike", "all")}
+    del old.format, old.late   # saved before either existed
+    path = tmp_path / "alerts.pkl"
+    path.write_bytes(pickle.dumps(old))
+
+    detector = CoverageDetector.load(str(path), sinks=[MemorySink()])
+    assert sorted(detector.state.sources) == ["nation", "standard"]
+    assert detector.state.sources["nation"].mean == 3.0
+    assert ("source_spike", "nation") in detector.state.alerted
+
+    # New mentions land on the migrated baseline, whichever spelling they carry
+    detector.update([{"title": "x", "published": str(START), "source": "Nation Africa", "tonality": "Neutral"}], day=START)
+    assert detector.state.sources["nation"].today == 1 and len(detector.state.sources) == 2
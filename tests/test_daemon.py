@@ -0,0 +1,94 @@
+import pytest
+
+import ingest
+import scraper_to_sheets
+from scraper_to_sheets import ScraperDaemon
+
+
+class FakeFetcher:
+    def __init__(self, items):
+        self.name = "feed:test"
+        self.items = items
+        self.since = None
+        self.offered = []
+
+    def fetch(self, cache):
+        self.offered.append([i["url"] for i in self.items])
+        yield from self.items
+
+
+class FakeWorksheet:
+    def __init__(self):
+        self.rows = []
+        self.fail_on = set()   # append calls (1-based) that raise
+        self.calls = 0
+
+    def row_values(self, n):
+        return list(ingest.HEADERS)
+
+    def append_rows(self, rows, **kwargs):
+        self.calls += 1
+        if self.calls in self.fail_on:
+            raise ConnectionError("sheet unavailable")
+        self.rows.extend(rows)
+
+    def append_row(self, row, **kwargs):
+        raise ConnectionError("sheet unavailable")
+
+
+def items(n):
+    return [{"title": f"HELB story {i}", "description": "", "published date": "2025-03-01T08:00:00Z",
+             "url": f"https://nation.africa/{i}", "publisher": {"title": "Nation"}} for i in range(n)]
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    def enrich(mentions, bootstrap=None, dry_run=False):
+        for m in mentions:
+            m["tonality"], m["topic"] = "Neutral", ""
+
+    monkeypatch.setattr(ingest, "enrich", enrich)
+    monkeypatch.setattr(scraper_to_sheets, "mark_version", lambda *a, **k: None)
+    monkeypatch.setattr(scraper_to_sheets, "after_ingest", lambda *a, **k: None)
+    monkeypatch.setattr(scraper_to_sheets, "backfill_topics", lambda worksheet: 0)
+
+    def make(fetcher):
+        d = ScraperDaemon(fetchers=[fetcher], state_path=str(tmp_path / "scraper.json"))
+        d.sh, d.worksheet = object(), FakeWorksheet()
+        d.sync_sheet = lambda: None
+        return d
+
+    return make
+
+
+def test_failed_append_offers_the_same_items_again(daemon):
+    fetcher = FakeFetcher(items(3))
+    d = daemon(fetcher)
+    d.worksheet.fail_on = {1}
+    with pytest.raises(ConnectionError):
+        d.poll(["feed:test"])
+    assert not d.seen.links and d.schedule["feed:test"]["last_seen"] is None
+
+    # run() saves state after a failed poll; a restart must not think the items are stored
+    d.save_state()
+    restarted = daemon(fetcher)
+    restarted.worksheet = d.worksheet
+    assert restarted.load_state() and not restarted.seen.links
+
+    restarted.poll(["feed:test"])
+    assert [r[ingest.HEADERS.index("link")] for r in restarted.worksheet.rows] == [f"https://nation.africa/{i}" for i in range(3)]
+    assert fetcher.offered == [fetcher.offered[0]] * 2
+    assert restarted.schedule["feed:test"]["last_seen"] is not None
+    assert restarted.row_count == 3
+
+
+def test_batches_appended_before_a_failure_stay_recorded(daemon):
+    n = ingest.BATCH_SIZE + 1
+    d = daemon(FakeFetcher(items(n)))
+    d.worksheet.fail_on = {2}
+    with pytest.raises(ConnectionError):
+        d.poll(["feed:test"])
+    assert len(d.seen.links) == ingest.BATCH_SIZE and d.row_count == ingest.BATCH_SIZE
+
+    d.poll(["feed:test"])
+    assert len(d.worksheet.rows) == n and d.row_count == n
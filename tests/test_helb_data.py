@@ -0,0 +1,107 @@
+import time
+
+import pandas as pd
+
+from helb_data import DataVersion, MentionsStore, content_version
+
+
+class FakeSource:
+    """A sheet with a marker; `edit` changes a cell without touching the marker."""
+
+    def __init__(self, rows, marker=True):
+        self.df = pd.DataFrame(rows, columns=["title", "published", "link", "tonality"])
+        self.generation = "1"
+        self.marker = marker
+        self.fetches = []
+
+    def append(self, *rows):
+        self.df = pd.concat([self.df, pd.DataFrame(rows, columns=self.df.columns)], ignore_index=True)
+
+    def probe(self):
+        if not self.marker:
+            return None
+        return DataVersion(self.generation, len(self.df), self.df["link"].iloc[-1])
+
+    def fetch(self, offset=0):
+        self.fetches.append(offset)
+        return self.df.iloc[offset:].reset_index(drop=True)
+
+
+ROWS = [
+    ("HELB delays", "2025-02-01", "https://a/1", "Negative"),
+    ("HELB funds", "2025-02-02", "https://a/2", "Positive"),
+]
+
+
+def make_store(source):
+    return MentionsStore(source, probe_interval=0, verify_interval=3600)
+
+
+def test_unchanged_marker_does_not_refetch():
+    source = FakeSource(ROWS)
+    store = make_store(source)
+    key, df = store.snapshot()
+    assert len(df) == 2 and source.fetches == [0]
+    assert store.snapshot() == (key, df)
+    assert source.fetches == [0]
+
+
+def test_appended_rows_are_fetched_as_a_tail():
+    source = FakeSource(ROWS)
+    store = make_store(source)
+    key, _ = store.snapshot()
+    source.append(("HELB new", "2025-02-03", "https://a/3", "Neutral"))
+    new_key, df = store.snapshot()
+    assert new_key != key
+    assert source.fetches == [0, 2]
+    assert df["link"].tolist() == ["https://a/1", "https://a/2", "https://a/3"]
+
+
+def test_rewrite_reloads_everything():
+    source = FakeSource(ROWS)
+    store = make_store(source)
+    store.snapshot()
+    source.df.loc[0, "tonality"] = "Neutral"
+    source.generation = "2"
+    _, df = store.snapshot()
+    assert source.fetches == [0, 0]
+    assert df["tonality"].iloc[0] == "Neutral"
+
+
+def test_hand_edit_is_caught_by_the_periodic_content_check():
+    source = FakeSource(ROWS)
+    store = make_store(source)
+    key, _ = store.snapshot()
+    source.df.loc[1, "title"] = "HELB funds (corrected)"   # marker unchanged
+    assert store.snapshot()[0] == key
+
+    store._verified_at = time.monotonic() - 3601   # verify interval elapsed
+    edited_key, df = store.snapshot()
+    assert edited_key != key
+    assert df["title"].iloc[1] == "HELB funds (corrected)"
+
+    # Later appends are still read as a tail
+    source.append(("HELB new", "2025-02-03", "https://a/3", "Neutral"))
+    fetches = len(source.fetches)
+    _, df = store.snapshot()
+    assert source.fetches[fetches:] == [2] and len(df) == 3
+
+
+def test_content_check_after_tail_appends_does_not_reload():
+    source = FakeSource(ROWS)
+    store = make_store(source)
+    store.snapshot()
+    source.append(("HELB new", "2025-02-03", "https://a/3", "Neutral"))
+    key, _ = store.snapshot()
+    store._verified_at = time.monotonic() - 3601
+    assert store.snapshot()[0] == key
+
+
+def test_without_marker_the_content_hash_is_the_version():
+    source = FakeSource(ROWS, marker=False)
+    store = make_store(source)
+    key, _ = store.snapshot()
+    assert store.snapshot()[0] == key
+    source.df.loc[0, "title"] = "changed"
+    assert store.snapshot()[0] != key
+    assert content_version(source.df).row_count == 2
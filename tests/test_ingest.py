@@ -0,0 +1,144 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import ingest
+from ingest import (
+    FeedFetcher, HttpCache, SeenMentions, SitemapFetcher, dedup_title, fetch_all, new_stats, parse_article, pipeline,
+)
+
+
+def titles(fetcher, cache=None):
+    return [i["title"] for i in fetcher.fetch(cache or HttpCache())]
+
+
+def test_rss_feed_keeps_items_mentioning_helb(fixture_path):
+    items = list(FeedFetcher("Example Outlet", fixture_path("feeds", "rss.xml")).fetch(HttpCache()))
+    assert [i["title"] for i in items][:2] == [
+        "HELB opens second-semester loan applications", "Students protest delayed HELB disbursements",
+    ]
+    assert "Harambee Stars name squad for qualifiers" not in [i["title"] for i in items]
+    first, _ = parse_article(items[0])
+    assert first["published"] == "2025-10-14" and first["source"] == "Example Outlet"
+    assert first["summary"].startswith("The Higher Education Loans Board has opened")   # HTML stripped
+
+
+def test_atom_feed(fixture_path):
+    items = list(FeedFetcher("Example Blog", fixture_path("feeds", "atom.xml")).fetch(HttpCache()))
+    assert [(i["title"], i["url"]) for i in items] == [
+        ("What the new funding model means for HELB borrowers", "https://blog.example/2025/10/funding-model-helb"),
+    ]
+    assert items[0]["description"] == "A look at banding and the Higher Education Loans Board."
+
+
+def test_sitemap_titles_from_news_tags_or_slugs(fixture_path):
+    fetcher = SitemapFetcher("Example Outlet", fixture_path("feeds", "sitemap.xml"))
+    assert titles(fetcher) == ["HELB opens second-semester loan applications", "Helb ceo appears before mps"]
+
+
+def test_local_file_is_refetched_until_committed(fixture_path):
+    fetcher = FeedFetcher("Example Outlet", fixture_path("feeds", "rss.xml"))
+    cache = HttpCache()
+    assert titles(fetcher, cache)
+    # Not committed (the run failed before storing the items): fetched again
+    assert titles(fetcher, cache)
+    cache.commit()
+    assert titles(fetcher, cache) == []
+
+
+class _Feed(BaseHTTPRequestHandler):
+    """Serves the RSS fixture with an ETag, and a 304 to a request that sends it back."""
+    body = b""
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(self.body)))
+        self.end_headers()
+        self.wfile.write(self.body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def feed_url(fixture_path):
+    with open(fixture_path("feeds", "rss.xml"), "rb") as fh:
+        _Feed.body = fh.read()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Feed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _Feed.requests = []
+    yield f"http://127.0.0.1:{server.server_port}/feed"
+    server.shutdown()
+
+
+def test_conditional_get_sends_the_committed_etag(feed_url):
+    fetcher = FeedFetcher("Example Outlet", feed_url)
+    cache = HttpCache()
+    assert titles(fetcher, cache)
+    assert cache.entries == {} and cache.staged == {fetcher.name: {feed_url: {"etag": '"v1"'}}}
+    assert titles(fetcher, cache)          # still unconditional: nothing committed yet
+    cache.commit()
+    assert titles(fetcher, cache) == []    # 304
+    assert _Feed.requests == [None, None, '"v1"']
+
+
+def test_failed_fetcher_stages_nothing(fixture_path, tmp_path):
+    broken = tmp_path / "broken.xml"
+    broken.write_text("<rss><channel><item>")
+    fetchers = [FeedFetcher("Broken", str(broken)), FeedFetcher("Example Outlet", fixture_path("feeds", "rss.xml"))]
+    cache, stats = HttpCache(), new_stats(fetchers)
+    list(fetch_all(fetchers, cache, stats))
+    assert stats["feed:Broken"]["error"] and list(cache.staged) == ["feed:Example Outlet"]
+
+
+def test_dedup_title_drops_the_publisher_suffix():
+    assert dedup_title("HELB opens  applications - Nation Africa", "Nation Africa") == "helb opens applications"
+    assert dedup_title("HELB opens applications | The Star", "The Star") == "helb opens applications"
+    assert dedup_title("Loans - what changes", "Nation Africa") == "loans - what changes"
+
+
+def gnews_item(title, publisher, url, published="2025-10-14T06:30:00Z"):
+    return {"title": title, "description": "", "published date": published, "url": url, "publisher": {"title": publisher}}
+
+
+@pytest.fixture
+def no_scoring(monkeypatch):
+    monkeypatch.setattr(ingest, "score_tonality", lambda titles, summaries: ["Neutral"] * len(list(titles)))
+
+
+def test_gnews_copy_of_an_outlet_story_is_dropped(fixture_path, no_scoring):
+    outlet = FeedFetcher("Example Outlet", fixture_path("feeds", "rss.xml"))
+    gnews = [gnews_item("HELB opens second-semester loan applications - Example Outlet", "Example Outlet",
+                        "https://news.google.com/rss/articles/CBMiabc")]
+    items = [(outlet.name, i) for i in outlet.fetch(HttpCache())] + [("gnews:HELB", i) for i in gnews]
+    stats = new_stats([outlet])
+    stats["gnews:HELB"] = dict(stats[outlet.name])
+    stored = list(pipeline(items, SeenMentions(), stats, dry_run=True))
+    assert [m["link"] for m in stored if m["title"].startswith("HELB opens")] == [
+        "https://outlet.example/news/helb-opens-second-semester-loan-applications"
+    ]
+    assert stats["gnews:HELB"]["new"] == 0
+
+    # ... and the same goes for a sheet that already holds the GNews copy
+    seen = SeenMentions.from_records([parse_article(gnews[0])[0]])
+    assert parse_article(next(outlet.fetch(HttpCache())))[0] in seen
+
+
+def test_dry_run_leaves_the_topic_model_alone(fixture_path, no_scoring):
+    import topics
+
+    fetcher = FeedFetcher("Example Outlet", fixture_path("feeds", "rss.xml"))
+    items = [(fetcher.name, i) for i in fetcher.fetch(HttpCache())]
+    stamp = lambda: os.stat(topics.TOPICS_PATH).st_mtime_ns if os.path.exists(topics.TOPICS_PATH) else None
+    before = stamp()
+    stored = list(pipeline(items, SeenMentions(), new_stats([fetcher]), dry_run=True))
+    assert stored and stamp() == before
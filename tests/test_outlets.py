@@ -0,0 +1,18 @@
+import pandas as pd
+
+from outlets import BY_ID, outlet_column, resolve
+
+
+def test_every_outlet_id_resolves_to_itself():
+    ids = list(BY_ID) + [resolve("Some New Blog"), resolve("", "https://www.example.com/story"), resolve("")]
+    assert resolve("", "https://www.example.com/story") == "example-com"
+    assert all(resolve(i) == i for i in ids)
+
+
+def test_stored_host_ids_join_their_slug():
+    df = pd.DataFrame({
+        "source": ["", "", "Daily Nation"],
+        "link": ["https://example.com/1", "https://example.com/2", "https://news.google.com/3"],
+        "outlet": ["example.com", "", ""],
+    })
+    assert outlet_column(df).tolist() == ["example-com", "example-com", "nation"]
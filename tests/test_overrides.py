@@ -0,0 +1,105 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from helb_data import atomic_write, load_overrides, save_overrides
+
+
+def test_concurrent_saves_keep_every_edit(tmp_path):
+    path = str(tmp_path / "overrides.csv")
+    start = threading.Barrier(16)
+
+    def editor(n):
+        start.wait()
+        save_overrides({f"https://a/{n}": ("Negative", "Positive")}, path)
+
+    threads = [threading.Thread(target=editor, args=(n,)) for n in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(load_overrides(path)["key"]) == sorted(f"https://a/{n}" for n in range(16))
+    assert [f for f in os.listdir(tmp_path) if f.endswith(".tmp")] == []
+
+
+def test_setting_back_the_original_drops_the_correction(tmp_path):
+    path = str(tmp_path / "overrides.csv")
+    save_overrides({"k": ("Negative", "Neutral")}, path)
+    # A second edit keeps the first original; going back to it removes the row
+    save_overrides({"k": ("Positive", "Negative")}, path)
+    assert load_overrides(path).set_index("key").at["k", "original"] == "Neutral"
+    save_overrides({"k": ("Neutral", "Positive")}, path)
+    assert load_overrides(path).empty
+
+
+def test_atomic_write_keeps_the_old_file_when_writing_fails(tmp_path):
+    path = str(tmp_path / "state.json")
+    atomic_write(path, lambda fh: fh.write("old"))
+
+    def broken(fh):
+        fh.write("partial")
+        raise RuntimeError("disk full")
+
+    with pytest.raises(RuntimeError):
+        atomic_write(path, broken)
+    with open(path, encoding="utf-8") as fh:
+        assert fh.read() == "old"
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+# ---------------- Mentions page ----------------
+def _mentions_page(pages_csv, rows):
+    from streamlit.testing.v1 import AppTest
+
+    pd.DataFrame(rows, columns=["title", "published", "source", "summary", "link", "tonality"]).to_csv(pages_csv, index=False)
+    at = AppTest.from_file(os.path.join(os.path.dirname(__file__), "..", "pages", "2_Mentions.py"), default_timeout=60)
+    at.run()
+    at.sidebar.text_input[0].input("MyHardSecret123").run()
+    return at
+
+
+def test_mentions_editor_handles_repeated_links_and_prunes_the_session_overlay(pages_csv):
+    rows = [
+        ("HELB delays", "2025-02-01", "Nation", "s", "https://a/1", "Neutral"),
+        ("HELB delays", "2025-02-01", "Nation", "s", "https://a/1", "Neutral"),   # same link twice
+        ("HELB funds", "2025-02-02", "Star", "s", "", "Positive"),
+        ("HELB funds", "2025-02-02", "Star", "s", "", "Positive"),                # same title|date
+    ]
+    at = _mentions_page(pages_csv, rows)
+    assert not at.exception
+    assert len(at.sidebar.selectbox) == 1 + len(rows)   # page size + one per mention
+
+    at.sidebar.selectbox[1].select("Negative").run()   # newest first: "HELB funds"
+    at.sidebar.button[0].click().run()
+    assert not at.exception
+    assert "HELB funds|2025-02-02" in at.session_state["tonality_overrides"]
+
+    # The next run reads the saved file; the session copy is no longer needed
+    at.run()
+    assert at.session_state["tonality_overrides"] == {}
+    assert load_overrides(os.environ["HELB_OVERRIDES_CSV"]).set_index("key").at["HELB funds|2025-02-02", "tonality"] == "Negative"
+
+
+def test_legacy_csv_without_titles_is_migrated_by_link(pages_csv, tmp_path, monkeypatch):
+    overrides = os.environ["HELB_OVERRIDES_CSV"]
+    if os.path.exists(overrides):
+        os.remove(overrides)
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame({"link": ["https://a/1", "https://a/2", "https://gone/3"], "tonality": ["Negative", "Neutral", "Positive"]}).to_csv(
+        "persistent_mentions.csv", index=False
+    )
+    rows = [
+        ("HELB delays", "2025-02-01", "Nation", "s", "https://a/1", "Neutral"),
+        ("HELB funds", "2025-02-02", "Star", "s", "https://a/2", "Neutral"),
+    ]
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    st.cache_resource.clear()   # the CSV store would still serve an earlier test's rows
+    pd.DataFrame(rows, columns=["title", "published", "source", "summary", "link", "tonality"]).to_csv(pages_csv, index=False)
+    at = AppTest.from_file(os.path.join(os.path.dirname(__file__), "..", "pages", "2_Mentions.py"), default_timeout=60).run()
+    assert not at.exception
+    assert load_overrides(overrides).set_index("key")["tonality"].to_dict() == {"https://a/1": "Negative"}
+    assert "Migrated 1 tonality corrections" in at.success[0].value and "1 of its rows" in at.success[0].value
@@ -0,0 +1,42 @@
+from helb_data import DataVersion
+from reports import ReportCube, load_precomputed, update_reports
+
+
+def mention(i, tonality="Neutral"):
+    return {"title": f"HELB story {i}", "published": "2025-03-01", "source": "Nation",
+            "link": f"https://nation.africa/{i}", "tonality": tonality}
+
+
+def total(path):
+    return int(ReportCube.load(path).counts["mentions"].sum())
+
+
+def test_update_reports_appends_or_rebuilds_from_loader(tmp_path):
+    path = str(tmp_path / "cube.pkl")
+    sheet = [mention(0), mention(1)]
+    ReportCube.from_records(sheet, DataVersion("g1", 2)).save(path)
+
+    # Appended rows only extend the cube; the loader is not needed
+    reports = update_reports([mention(2)], DataVersion("g1", 3), lambda: 1 / 0, path=path)
+    assert set(reports) == {"quarter", "fy"} and total(path) == 3
+    sheet.append(mention(2))
+
+    # Rows rewritten elsewhere: without records the cube is left alone...
+    rewritten = DataVersion("g2", 4)
+    assert update_reports([mention(3)], rewritten, path=path) is None
+    assert ReportCube.load(path).version == DataVersion("g1", 3)
+
+    # ...and with a loader it is rebuilt from the sheet plus this ingest
+    sheet[0]["tonality"] = "Negative"
+    assert update_reports([mention(3)], rewritten, lambda: sheet, path=path) is not None
+    cube = ReportCube.load(path)
+    assert cube.version == rewritten and total(path) == 4
+    assert int(cube.counts.loc[cube.counts["tonality"] == "Negative", "mentions"].sum()) == 1
+
+
+def test_standard_reports_are_served_only_for_their_data_version(tmp_path):
+    path = str(tmp_path / "cube.pkl")
+    version = DataVersion("g1", 2)
+    reports = update_reports([mention(0), mention(1)], version, [], path=path)
+    assert load_precomputed(version.key) == reports
+    assert load_precomputed(DataVersion("g1", 3).key) is None
@@ -0,0 +1,137 @@
+import shutil
+import sys
+
+import pandas as pd
+import pytest
+
+import reprocess
+from bench.synthetic import write_csv
+
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    import topics
+
+    monkeypatch.setattr(topics, "TOPICS_PATH", str(tmp_path / "topics.joblib"))
+    path = str(tmp_path / "mentions.csv")
+    write_csv(path, 3000)
+    df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    pd.concat([df, df.iloc[:20]]).to_csv(path, index=False)   # a few duplicates to drop
+    return path
+
+
+def run(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["reprocess.py", "--workers", "1", "--chunk", "500", *args])
+    reprocess.main()
+
+
+def interrupt_after(monkeypatch, n, action=None):
+    save = reprocess.Checkpoint.save
+    calls = []
+
+    def failing_save(self, *args):
+        save(self, *args)
+        calls.append(1)
+        if len(calls) == n:
+            if action:
+                action()
+            else:
+                raise KeyboardInterrupt
+
+    monkeypatch.setattr(reprocess.Checkpoint, "save", failing_save)
+
+
+def test_interrupted_run_resumes_and_matches_a_clean_run(archive, monkeypatch, capsys, tmp_path):
+    clean = str(tmp_path / "clean.csv")
+    shutil.copy(archive, clean)
+    run(monkeypatch, "--csv", clean)
+
+    shutil.rmtree(reprocess.CHECKPOINT_DIR, ignore_errors=True)
+    with monkeypatch.context() as m:
+        interrupt_after(m, 2)
+        with pytest.raises(KeyboardInterrupt):
+            run(m, "--csv", archive, "--refit-topics")
+    capsys.readouterr()
+
+    # Same input and models, and asking for the same refit: the two chunks are reused
+    run(monkeypatch, "--csv", archive, "--refit-topics")
+    out = capsys.readouterr().out
+    assert "Resuming: 2 chunks (1,000 rows) already done" in out
+    assert "Refit topics" not in out
+    assert "20 duplicates dropped" in out
+    with open(archive, "rb") as a, open(clean, "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_csv_changed_during_the_run_is_not_replaced(archive, monkeypatch):
+    edited = "title,published,source,summary,link,tonality\nHand edit,2025-03-01,Nation,,https://x/1,Neutral\n"
+
+    def edit():
+        with open(archive, "w", encoding="utf-8") as fh:
+            fh.write(edited)
+
+    interrupt_after(monkeypatch, 1, edit)
+    with pytest.raises(SystemExit, match="changed while re-processing"):
+        run(monkeypatch, "--csv", archive)
+    with open(archive, encoding="utf-8") as fh:
+        assert fh.read() == edited
+
+
+def test_dedup_matches_ingest_across_chunks():
+    first = pd.DataFrame({
+        "title": ["HELB opens loan applications - Nation", "Wings to Fly intake"],
+        "published": ["2025-03-01", "2025-03-02"],
+        "source": ["Nation", "Standard"],
+        "link": ["https://news.google.com/1", "https://standardmedia.co.ke/2"],
+    })
+    second = pd.DataFrame({
+        "title": ["helb opens  loan applications", "HELB opens loan applications"],
+        "published": ["2025-03-01", "2025-03-04"],
+        "source": ["Nation", "Nation"],
+        "link": ["https://nation.africa/1", "https://nation.africa/4"],
+    })
+    seen = reprocess.SeenMentions()
+    assert len(reprocess.dedup(first, seen)) == 2
+    # The syndicated copy's suffix and case are ignored; a later day is a new mention
+    assert reprocess.dedup(second, seen)["link"].tolist() == ["https://nation.africa/4"]
+
+
+class FakeWorksheet:
+    def __init__(self, title, id):
+        self.title, self.id = title, id
+        self.row_count = self.col_count = 10
+
+    def update(self, **kwargs):
+        pass
+
+
+class FakeSpreadsheet:
+    def __init__(self):
+        self.sheets = [FakeWorksheet("Sheet1", 0)]
+        self.requests = []
+
+    def worksheet(self, title):
+        return next(w for w in self.sheets if w.title == title)
+
+    def add_worksheet(self, title, rows, cols):
+        self.sheets.append(FakeWorksheet(title, len(self.sheets)))
+        return self.sheets[-1]
+
+    def del_worksheet(self, ws):
+        self.sheets.remove(ws)
+
+    def get_worksheet(self, n):
+        return self.sheets[n]
+
+    def batch_update(self, body):
+        self.requests.append(body)
+
+
+def test_sheet_swap_is_skipped_when_the_sheet_changed():
+    df = pd.DataFrame({"title": ["a"], "link": ["https://x/1"]})
+    sh = FakeSpreadsheet()
+    assert reprocess.write_sheet_atomic(sh, df, unchanged=lambda: False) is False
+    assert sh.requests == [] and [w.title for w in sh.sheets] == ["Sheet1"]
+
+    assert reprocess.write_sheet_atomic(sh, df) is True
+    assert len(sh.requests) == 1 and [w.title for w in sh.sheets] == ["Sheet1"]
@@ -0,0 +1,70 @@
+import pandas as pd
+
+from search_index import SearchIndex
+
+
+def frame(titles):
+    return pd.DataFrame({
+        "title": titles,
+        "published": "2025-03-01",
+        "source": "Nation",
+        "summary": "",
+        "link": [f"https://nation.africa/{i}" for i in range(len(titles))],
+        "tonality": "Neutral",
+    })
+
+
+def found(index, query):
+    return [index.docs[d]["title"] for d, _ in index.search(query)[0]]
+
+
+def test_sync_adds_only_appended_rows():
+    index = SearchIndex()
+    assert index.sync(frame(["HELB disbursement delayed"])) == 1
+    assert index.sync(frame(["HELB disbursement delayed"])) == 0
+    assert index.sync(frame(["HELB disbursement delayed", "Wings to Fly intake"])) == 1
+    assert found(index, "wings") == ["Wings to Fly intake"]
+
+
+def test_hand_edit_reindexes_only_that_row():
+    index = SearchIndex()
+    df = frame(["HELB disbursement delayed", "Wings to Fly intake"])
+    index.sync(df)
+    untouched = index.docs[1]
+    # Same link, title and date (so the same key); only the summary was corrected by hand
+    df.loc[0, "summary"] = "Students protest the delay"
+    assert index.sync(df) == 1
+    assert index.docs[1] is untouched and index.docs[0] is None   # no rebuild; old doc tombstoned
+    assert found(index, "protest") == ["HELB disbursement delayed"]
+    assert found(index, "delayed") == ["HELB disbursement delayed"]
+    assert len(index) == 2
+
+    # Tombstones are compacted away once they outnumber live docs
+    for summary in ("Second correction", "Third correction"):
+        df.loc[0, "summary"] = summary
+        index.sync(df)
+    assert len(index.docs) == 2 and found(index, "third") == ["HELB disbursement delayed"]
+    assert found(index, "protest") == []
+
+
+def test_sync_drops_removed_rows_and_reindexes_docs_without_hashes():
+    index = SearchIndex()
+    index.sync(frame(["HELB disbursement delayed", "Wings to Fly intake"]))
+    assert index.sync(frame(["HELB disbursement delayed"])) == 1
+    assert found(index, "wings") == [] and len(index) == 1
+
+    for doc in index.docs:
+        if doc:
+            del doc["hash"]   # index saved before docs carried a content hash
+    assert index.sync(frame(["HELB disbursement delayed"])) == 1
+    assert index.sync(frame(["HELB disbursement delayed"])) == 0
+
+
+def test_source_facet_groups_spellings_of_one_outlet():
+    df = frame(["HELB loan one", "HELB loan two", "HELB loan three", "HELB loan four"])
+    df["source"] = ["Nation", "nation.africa", "Daily Nation", "The Star"]
+    df["link"] = [f"https://news.google.com/{i}" for i in range(4)]   # the spelling decides
+    index = SearchIndex()
+    index.sync(df)
+    top, outlets, _ = index.search("loan", outlets={"nation"})
+    assert len(top) == 3 and outlets == {"nation": 3}
@@ -0,0 +1,86 @@
+import pandas as pd
+
+from helb_data import mention_key
+from tonality_model import (
+    add_sample, current_model, fit, load_labels, save_model, score_tonality, split_labelled, training_set, vader_text,
+)
+
+
+def mentions(n):
+    return pd.DataFrame({
+        "title": [f"HELB story {i}" for i in range(n)],
+        "published": "2025-03-01",
+        "source": "Nation",
+        "summary": ["" if i % 2 else f"summary {i}" for i in range(n)],
+        "link": [f"https://nation.africa/{i}" for i in range(n)],
+        "tonality": "Neutral",
+    })
+
+
+def test_vader_reads_the_summary_or_else_the_title():
+    assert vader_text("title", "summary") == "summary"
+    assert vader_text("title", "") == "title"
+    assert vader_text("title", float("nan")) == "title"
+
+
+def test_vader_fallback_uses_the_same_text_rule(monkeypatch):
+    import tonality_model
+
+    seen = []
+    monkeypatch.setattr(tonality_model, "current_model", lambda: False)
+    monkeypatch.setattr(tonality_model, "vader_tonality", lambda texts: seen.extend(texts) or ["Neutral"] * len(texts))
+    score_tonality(["t1", "t2"], ["s1", ""])
+    assert seen == ["s1", "t2"]
+
+
+def test_labelled_sample_is_kept_out_of_training(tmp_path):
+    path = str(tmp_path / "labels.csv")
+    df = mentions(10)
+    assert add_sample(df, 4, path, seed=1) == 4
+    assert add_sample(df, 4, path, seed=1) == 4          # only rows not sampled yet
+    sample = pd.read_csv(path, dtype=str, keep_default_na=False)
+    assert sample["key"].is_unique and len(sample) == 8
+
+    # Only the rows an editor filled in count, whatever VADER said about them
+    sample.loc[:2, "tonality"] = ["neutral", "Positive", "Negative"]
+    sample.to_csv(path, index=False)
+    labels = load_labels(path)
+    assert sorted(labels) == ["Negative", "Neutral", "Positive"]
+
+    data = training_set(df, pd.DataFrame(columns=["key", "tonality"]))
+    train, test = split_labelled(data, labels)
+    assert len(train) == 7 and set(test["key"]) == set(labels.index)
+    assert not set(train["key"]) & set(labels.index)
+    assert (test.set_index("key")["label"] == labels[test["key"]]).all()
+    first = df.iloc[0]
+    assert data.set_index("key").at[mention_key(first["link"], first["title"], first["published"]), "vader_text"] == "summary 0"
+
+
+def test_stored_tonality_does_not_feed_back_into_training(monkeypatch):
+    import tonality_model
+
+    df = mentions(4)
+    df["tonality"] = "Negative"     # written by an earlier model, wrongly
+    monkeypatch.setattr(tonality_model, "vader_tonality", lambda texts: ["Positive"] * len(texts))
+    first = df.iloc[0]
+    overrides = pd.DataFrame({"key": [mention_key(first["link"], first["title"], first["published"])], "tonality": ["Neutral"]})
+    data = training_set(df, overrides)
+    assert data["label"].tolist() == ["Neutral", "Positive", "Positive", "Positive"]
+    assert data["corrected"].tolist() == [True, False, False, False]
+
+
+def test_scoring_picks_up_a_retrained_model(tmp_path):
+    import os
+
+    path = str(tmp_path / "tonality.joblib")
+    assert current_model(path) is False
+
+    def train(label):
+        data = pd.DataFrame({"text": ["loan delayed", "bursary awarded"], "label": [label, "Neutral"], "weight": 1.0})
+        save_model(fit(data), path)
+
+    train("Negative")
+    assert current_model(path).predict(["loan delayed"])[0] == "Negative"
+    train("Positive")
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1))   # a distinct mtime on coarse clocks
+    assert current_model(path).predict(["loan delayed"])[0] == "Positive"
@@ -0,0 +1,63 @@
+from topics import TopicModel, backfill_blank_topics
+
+
+class FakeWorksheet:
+    def __init__(self, rows):
+        self.rows = [list(r) for r in rows]
+
+    def row_values(self, n):
+        return self.rows[n - 1]
+
+    def col_values(self, n):
+        values = [r[n - 1] if len(r) >= n else "" for r in self.rows]
+        while values and values[-1] == "":
+            values.pop()   # like the Sheets API
+        return values
+
+    def batch_update(self, data, **kwargs):
+        for update in data:
+            col, row = ord(update["range"][0]) - 64, int(update["range"][1:])
+            self.rows[row - 1][col - 1] = update["values"][0][0]
+
+
+DELAYS = "HELB disbursement delay leaves students stranded as funds release is late"
+WINGS = "Wings to Fly scholarship scholars get Equity Foundation support"
+
+
+def test_blank_topics_are_filled_once_clusters_exist(tmp_path):
+    path = str(tmp_path / "topics.joblib")
+    model = TopicModel()
+    # Too few mentions to start the clusters: stored without a topic
+    early = [DELAYS, WINGS]
+    assert model.partial_fit(early) == ["", ""]
+    model.partial_fit([DELAYS, WINGS] * 6)
+    assert model.backfill_due
+    model.save(path)
+
+    sheet = FakeWorksheet(
+        [["title", "summary", "topic", "link"]]
+        + [[t, "", "", f"https://x/{i}"] for i, t in enumerate(early)]
+        + [["Already labelled", "", "Loan repayment", "https://x/9"]]
+    )
+    assert backfill_blank_topics(sheet, path) == 2
+    assert [r[2] for r in sheet.rows[1:]] == TopicModel.load(path).predict(early) + ["Loan repayment"]
+    assert all(r[2] for r in sheet.rows[1:])
+
+    # Nothing pending any more: the sheet is not read again
+    assert not TopicModel.load(path).backfill_due
+    sheet.col_values = None
+    assert backfill_blank_topics(sheet, path) == 0
+
+
+def test_unnamed_cluster_waits_for_its_name(monkeypatch):
+    import topics
+
+    model = TopicModel()
+    texts = [f"county bursary fund {i} applications open" for i in range(12)]
+    monkeypatch.setattr(topics, "MIN_LABEL_DOCS", 10 ** 6)   # free clusters stay unnamed
+    labels = model.partial_fit(texts)
+    assert "" in labels and not model.backfill_due
+
+    monkeypatch.setattr(topics, "MIN_LABEL_DOCS", 1)
+    model.partial_fit(texts)
+    assert model.backfill_due
@@ -0,0 +1,246 @@
+# tonality_model.py
+"""
+Tonality scoring for the scraper: a linear model trained on editor corrections,
+with VADER as the fallback when no model has been trained yet.
+- Features: hashed word uni/bigrams (no vocabulary to store) + logistic regression
+- Labels: VADER's, overridden by editor corrections (which weigh more); never the sheet's
+  tonality column, which holds this model's own earlier predictions once it scores ingest
+- One vectorized predict() call scores every new row of an ingest; a retrained model
+  file is picked up by running processes (the daemon) on their next batch
+- Accuracy is measured on a hand-labelled random sample (tonality_labels.csv), drawn from
+  all mentions rather than from corrections, so rows where VADER was right count too;
+  those rows are never trained on
+
+Usage:
+    python tonality_model.py sample --n 200   # add random mentions to tonality_labels.csv to label
+    python tonality_model.py train            # retrain from the sheet + tonality_overrides.csv
+    python tonality_model.py report           # accuracy / throughput vs VADER, without saving
+"""
+
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from helb_data import CSV_URL, OVERRIDES_CSV, CsvSource, atomic_write, load_overrides, mention_key
+from nlp_utils import ensure_nltk_resource
+
+# ---------------- CONFIG ----------------
+MODEL_PATH = os.environ.get("HELB_TONALITY_MODEL", os.path.join("models", "tonality.joblib"))
+TONALITIES = ["Positive", "Neutral", "Negative"]
+OVERRIDE_WEIGHT = 5.0   # an editor correction counts as much as this many VADER labels
+LABELS_CSV = os.environ.get("HELB_TONALITY_LABELS", "tonality_labels.csv")
+LABEL_HEADERS = ["key", "title", "summary", "tonality"]
+N_FEATURES = 2 ** 18
+
+
+def mention_text(title, summary):
+    return f"{'' if pd.isna(title) else title} {'' if pd.isna(summary) else summary}".strip()
+
+
+def vader_text(title, summary):
+    """What VADER reads in the scraper: the summary, or the title when there is none."""
+    return title if pd.isna(summary) or not summary else summary
+
+
+# ---------------- VADER ----------------
+_sia = None
+
+def get_sia():
+    """VADER is loaded on first use, so runs with nothing new never touch NLTK."""
+    global _sia
+    if _sia is None:
+        ensure_nltk_resource("sentiment/vader_lexicon.zip", "vader_lexicon")
+        from nltk.sentiment.vader import SentimentIntensityAnalyzer
+        _sia = SentimentIntensityAnalyzer()
+    return _sia
+
+
+def vader_tonality(texts):
+    """The scraper's original rule on VADER's compound score."""
+    sia = get_sia()
+    labels = []
+    for text in texts:
+        score = sia.polarity_scores(text)["compound"]
+        labels.append("Positive" if score >= 0.05 else "Negative" if score <= -0.05 else "Neutral")
+    return labels
+
+
+# ---------------- MODEL ----------------
+def build_pipeline():
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+
+    return make_pipeline(
+        HashingVectorizer(n_features=N_FEATURES, ngram_range=(1, 2), alternate_sign=False, lowercase=True),
+        TfidfTransformer(sublinear_tf=True),
+        LogisticRegression(max_iter=1000, class_weight="balanced"),
+    )
+
+
+def training_set(mentions, overrides):
+    """Text, label and weight per mention: VADER's label, or the editor's correction."""
+    mentions = mentions.copy()
+    mentions.columns = [c.strip().lower() for c in mentions.columns]
+    keys = [mention_key(l, t, p) for l, t, p in zip(mentions["link"], mentions["title"], mentions["published"])]
+    corrected = dict(zip(overrides["key"], overrides["tonality"]))
+    data = pd.DataFrame({
+        "key": keys,
+        "text": [mention_text(t, s) for t, s in zip(mentions["title"], mentions["summary"])],
+        "vader_text": [vader_text(t, s) for t, s in zip(mentions["title"], mentions["summary"])],
+    })
+    data["corrected"] = data["key"].isin(corrected.keys())
+    data["label"] = data["key"].map(corrected).astype("object")
+    # Weak labels come from VADER itself, so a retrain never learns the model's own output
+    weak = ~data["corrected"]
+    data.loc[weak, "label"] = vader_tonality(data.loc[weak, "vader_text"].tolist()) if weak.any() else []
+    data["weight"] = data["corrected"].map({True: OVERRIDE_WEIGHT, False: 1.0})
+    data = data[data["label"].isin(TONALITIES) & data["text"].ne("")]
+    return data.drop_duplicates("key", keep="last").reset_index(drop=True)
+
+
+def fit(data):
+    model = build_pipeline()
+    model.fit(data["text"], data["label"], logisticregression__sample_weight=data["weight"])
+    return model
+
+
+def save_model(model, path=MODEL_PATH):
+    import joblib
+
+    atomic_write(path, lambda fh: joblib.dump(model, fh), "wb")
+
+
+def load_model(path=MODEL_PATH):
+    """The saved model, or None if there is none (or scikit-learn is not installed)."""
+    if not os.path.exists(path):
+        return None
+    try:
+        import joblib
+    except ImportError:
+        return None
+    return joblib.load(path)
+
+
+# ---------------- SCORING (used by the scraper) ----------------
+_model = None   # (model file mtime, model or False)
+
+def current_model(path=MODEL_PATH):
+    """The saved model (False if none), reloaded whenever the file changes."""
+    global _model
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime = None
+    if _model is None or _model[0] != mtime:
+        _model = (mtime, load_model(path) or False)
+    return _model[1]
+
+
+def score_tonality(titles, summaries):
+    """Label a batch of mentions in one call: the trained model if present, else VADER."""
+    titles, summaries = list(titles), list(summaries)
+    if not titles:
+        return []
+    model = current_model()
+    if model is False:
+        # VADER reads the summary, or the title when there is none
+        return vader_tonality([vader_text(t, s) for t, s in zip(titles, summaries)])
+    return list(model.predict([mention_text(t, s) for t, s in zip(titles, summaries)]))
+
+
+# ---------------- LABELLED SAMPLE ----------------
+def load_labels(path=LABELS_CSV):
+    """Hand-checked tonality per mention key; rows not labelled yet are skipped."""
+    if not os.path.exists(path):
+        return pd.Series(dtype="object")
+    labels = pd.read_csv(path, dtype=str, keep_default_na=False)
+    labels["tonality"] = labels["tonality"].str.strip().str.capitalize()
+    labels = labels[labels["tonality"].isin(TONALITIES)]
+    return labels.drop_duplicates("key", keep="last").set_index("key")["tonality"]
+
+
+def add_sample(mentions, n, path=LABELS_CSV, seed=None):
+    """Append n random mentions not yet in the sample, with a blank tonality to fill in."""
+    mentions = mentions.copy()
+    mentions.columns = [c.strip().lower() for c in mentions.columns]
+    existing = pd.read_csv(path, dtype=str, keep_default_na=False) if os.path.exists(path) else pd.DataFrame(columns=LABEL_HEADERS)
+    rows = pd.DataFrame({
+        "key": [mention_key(l, t, p) for l, t, p in zip(mentions["link"], mentions["title"], mentions["published"])],
+        "title": mentions["title"].fillna("").astype(str),
+        "summary": mentions["summary"].fillna("").astype(str),
+        "tonality": "",
+    }).drop_duplicates("key")
+    rows = rows[~rows["key"].isin(existing["key"])]
+    rows = rows.sample(n=min(n, len(rows)), random_state=seed)
+    sample = pd.concat([existing, rows], ignore_index=True)[LABEL_HEADERS]
+    atomic_write(path, lambda fh: sample.to_csv(fh, index=False))
+    return len(rows)
+
+
+def split_labelled(data, labels):
+    """Training rows, and the labelled sample with its hand-checked label."""
+    labelled = data["key"].isin(labels.index)
+    test = data[labelled].assign(label=lambda d: d["key"].map(labels))
+    return data[~labelled], test
+
+
+# ---------------- REPORT ----------------
+def evaluate(model, test, data):
+    """Accuracy of the model and of VADER on the hand-labelled sample, plus rows/s."""
+    lines = []
+    if not test.empty:
+        model_acc = (model.predict(test["text"]) == test["label"]).mean()
+        vader_acc = (pd.Series(vader_tonality(test["vader_text"]), index=test.index) == test["label"]).mean()
+        lines.append(f"Hand-labelled sample: {len(test)} mentions")
+        lines.append(f"  model accuracy {model_acc:.1%} | VADER accuracy {vader_acc:.1%}")
+    else:
+        lines.append(f"No hand-labelled mentions yet (python tonality_model.py sample, then fill in {LABELS_CSV}).")
+
+    uncorrected = data[~data["corrected"]]
+    if not uncorrected.empty:
+        agree = (model.predict(uncorrected["text"]) == uncorrected["label"]).mean()
+        lines.append(f"Agreement with VADER on {len(uncorrected)} uncorrected rows: {agree:.1%}")
+
+    t0 = time.perf_counter()
+    model.predict(data["text"].tolist())
+    model_rate = len(data) / max(time.perf_counter() - t0, 1e-9)
+    get_sia()
+    t0 = time.perf_counter()
+    vader_tonality(data["vader_text"].tolist())
+    vader_rate = len(data) / max(time.perf_counter() - t0, 1e-9)
+    lines.append(f"Throughput: model {model_rate:,.0f} rows/s | VADER {vader_rate:,.0f} rows/s ({model_rate / vader_rate:.1f}x)")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train or evaluate the tonality model.")
+    parser.add_argument("command", choices=["train", "report", "sample"])
+    parser.add_argument("--csv", default=CSV_URL, help="mentions export (URL or local CSV)")
+    parser.add_argument("--overrides", default=OVERRIDES_CSV)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--labels", default=LABELS_CSV, help="hand-labelled sample")
+    parser.add_argument("--n", type=int, default=200, help="mentions to add with `sample`")
+    args = parser.parse_args()
+
+    mentions = CsvSource(args.csv).fetch()
+    if args.command == "sample":
+        added = add_sample(mentions, args.n, args.labels)
+        print(f"📝 Added {added} mentions to {args.labels}; fill in their tonality column")
+        return
+
+    data = training_set(mentions, load_overrides(args.overrides))
+    print(f"✅ {len(data)} labelled mentions, {int(data['corrected'].sum())} editor corrections")
+    # The hand-labelled sample is never trained on, so every report measures unseen rows
+    train, test = split_labelled(data, load_labels(args.labels))
+    model = fit(train)
+    print(evaluate(model, test, data))
+    if args.command == "train":
+        save_model(model, args.model)
+        print(f"💾 Saved model to {args.model}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+# topics.py
+"""
+Streaming topic clustering of HELB mentions.
+- Hashed word uni/bigrams + MiniBatchKMeans, updated with partial_fit on each
+  ingest's new rows instead of being retrained on the whole archive
+- The first clusters are seeded with known themes, so they keep readable names;
+  the others are named after their most frequent terms, then frozen
+- Mentions stored before their cluster had a name are filled in once it gets one
+  (backfill_blank_topics, run by the scraper after an ingest)
+- State (model, term counts, labels) is saved to state/topics.joblib
+
+Usage:
+    python topics.py backfill   # fit on the whole archive and write the "topic" column
+"""
+
+import argparse
+import os
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from helb_data import atomic_write, run_main
+
+# ---------------- CONFIG ----------------
+STATE_DIR = os.environ.get("HELB_STATE_DIR", "state")
+TOPICS_PATH = os.path.join(STATE_DIR, "topics.joblib")
+N_FEATURES = 2 ** 14     # small enough to keep the saved cluster centres compact
+N_TOPICS = 8
+MIN_LABEL_DOCS = 5       # a free cluster is named once it has this many mentions
+TERMS_PER_TOPIC = 200    # term counts kept per cluster (bounds the state size)
+
+SEED_TOPICS = {
+    "Disbursement delays": "disbursement delay delayed late funds release students stranded",
+    "Loan repayment": "loan repayment repay defaulters penalty waiver recovery",
+    "Wings to Fly": "wings to fly scholarship scholars equity foundation",
+    "New funding model": "new funding model university banding scholarship loan students",
+}
+
+# Words on nearly every mention tell the clusters nothing
+DOMAIN_STOP_WORDS = {"helb", "kenya", "kenyan", "higher", "education", "loans", "board", "said", "says"}
+
+_TOKEN = re.compile(r"\b[a-z][a-z]+\b")
+
+
+def _stop_words():
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+    return sorted(ENGLISH_STOP_WORDS | DOMAIN_STOP_WORDS)
+
+
+def _tokens(text, stop_words):
+    return [t for t in _TOKEN.findall(text.lower()) if t not in stop_words]
+
+
+class TopicModel:
+    """MiniBatchKMeans over hashed features, plus the labels shown in the Dashboard."""
+
+    def __init__(self, n_topics=N_TOPICS, seed=42):
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        self.stop_words = _stop_words()
+        self.vectorizer = HashingVectorizer(
+            n_features=N_FEATURES, ngram_range=(1, 2), alternate_sign=False, stop_words=self.stop_words
+        )
+        self.n_topics = n_topics
+        self.seed = seed
+        self.kmeans = None
+        self.labels = {i: name for i, name in enumerate(SEED_TOPICS)}
+        self.terms = [Counter() for _ in range(n_topics)]
+        self.sizes = Counter()
+        self.blank = Counter()   # cluster -> mentions returned without a name (-1: before the first fit)
+
+    @property
+    def fitted(self):
+        return self.kmeans is not None and hasattr(self.kmeans, "cluster_centers_")
+
+    # -------- fitting --------
+    def _initial_centers(self, X):
+        """Seed themes first, then random mentions from the first batch."""
+        seeds = self.vectorizer.transform(list(SEED_TOPICS.values())).toarray()
+        rng = np.random.default_rng(self.seed)
+        n_free = self.n_topics - len(seeds)
+        picks = rng.choice(X.shape[0], size=n_free, replace=X.shape[0] < n_free)
+        return np.vstack([seeds, X[picks].toarray()])
+
+    def partial_fit(self, texts):
+        """Update the clusters with a batch of new mentions and return their topic labels.
+        The very first batch must hold at least n_topics mentions to start the clusters."""
+        texts = list(texts)
+        if not texts:
+            return []
+        from sklearn.cluster import MiniBatchKMeans
+
+        X = self.vectorizer.transform(texts)
+        if not self.fitted:
+            if X.shape[0] < self.n_topics:
+                self.blank[-1] += len(texts)
+                return [""] * len(texts)
+            self.kmeans = MiniBatchKMeans(
+                n_clusters=self.n_topics, init=self._initial_centers(X), n_init=1,
+                random_state=self.seed, batch_size=1024,
+            )
+        self.kmeans.partial_fit(X)
+        clusters = self.kmeans.predict(X)
+        self._update_labels(texts, clusters)
+        self.blank.update(int(c) for c in clusters if int(c) not in self.labels)
+        return [self.labels.get(int(c), "") for c in clusters]
+
+    def predict(self, texts):
+        """Topic labels without updating the clusters."""
+        return [self.labels.get(c, "") for c in self.predict_clusters(texts)]
+
+    def predict_clusters(self, texts):
+        texts = list(texts)
+        if not self.fitted or not texts:
+            return [-1] * len(texts)
+        return [int(c) for c in self.kmeans.predict(self.vectorizer.transform(texts))]
+
+    @property
+    def backfill_due(self):
+        """Some mentions were stored without a topic and would get one now."""
+        blank = getattr(self, "blank", Counter())   # models saved before blanks were tracked
+        return any(c in self.labels or (c == -1 and self.fitted) for c in blank)
+
+    def _update_labels(self, texts, clusters):
+        stop_words = set(self.stop_words)
+        for text, c in zip(texts, clusters):
+            self.terms[c].update(_tokens(text, stop_words))
+        self.sizes.update(int(c) for c in clusters)
+        for c, counts in enumerate(self.terms):
+            if len(counts) > TERMS_PER_TOPIC:
+                self.terms[c] = Counter(dict(counts.most_common(TERMS_PER_TOPIC)))
+            # Free clusters are named once, so stored topics never change name
+            if c not in self.labels and self.sizes[c] >= MIN_LABEL_DOCS:
+                top = [t for t, _ in counts.most_common(3)]
+                if top:
+                    self.labels[c] = " / ".join(t.capitalize() for t in top)
+
+    # -------- persistence --------
+    def save(self, path=TOPICS_PATH):
+        import joblib
+
+        atomic_write(path, lambda fh: joblib.dump(self, fh), "wb")
+
+    @classmethod
+    def load(cls, path=TOPICS_PATH):
+        if not os.path.exists(path):
+            return None
+        import joblib
+
+        return joblib.load(path)
+
+
+def mention_texts(titles, summaries):
+    return [f"{t or ''} {s or ''}".strip() for t, s in zip(titles, summaries)]
+
+
+def assign_topics(titles, summaries, path=TOPICS_PATH, bootstrap=None, update=True):
+    """Scraper stage: partially fit on the new rows and return one topic per row.
+    `bootstrap` (titles, summaries of the archive) seeds a model that does not exist yet.
+    With update=False the saved model only predicts and is left as it was."""
+    titles, summaries = list(titles), list(summaries)
+    if not titles:
+        return []
+    try:
+        model = TopicModel.load(path) or TopicModel()
+    except ImportError:
+        return [""] * len(titles)  # scikit-learn not installed
+    if not update:
+        return model.predict(mention_texts(titles, summaries))
+    if not model.fitted:
+        if bootstrap is not None:
+            model.partial_fit(mention_texts(*bootstrap))
+    topics = model.partial_fit(mention_texts(titles, summaries))
+    model.save(path)
+    return topics
+
+
+def backfill_blank_topics(worksheet, path=TOPICS_PATH):
+    """Fill in topic cells left blank while their cluster had no name yet. Only runs when a
+    pending cluster has since been named, and reads just the title, summary and topic columns.
+    Returns the number of cells written."""
+    model = TopicModel.load(path)
+    if model is None or not model.backfill_due:
+        return 0
+    header = worksheet.row_values(1)
+    if not all(h in header for h in ("title", "summary", "topic")):
+        return 0
+    col = {h: header.index(h) + 1 for h in ("title", "summary", "topic")}
+    titles = worksheet.col_values(col["title"])[1:]
+    pad = lambda values: values[1:] + [""] * (len(titles) + 1 - len(values))   # trailing blanks are dropped
+    summaries, topics = pad(worksheet.col_values(col["summary"])), pad(worksheet.col_values(col["topic"]))
+
+    from gspread.utils import rowcol_to_a1
+
+    rows = [i for i, topic in enumerate(topics) if not str(topic).strip()]
+    clusters = model.predict_clusters(mention_texts([titles[i] for i in rows], [summaries[i] for i in rows]))
+    updates = [
+        {"range": rowcol_to_a1(i + 2, col["topic"]), "values": [[model.labels[c]]]}
+        for i, c in zip(rows, clusters) if c in model.labels
+    ]
+    if updates:
+        worksheet.batch_update(updates, value_input_option="RAW")
+    model.blank = Counter(c for c in clusters if c not in model.labels)
+    model.save(path)
+    return len(updates)
+
+
+def topic_column(df, model):
+    """Topics for every row of a sheet frame (lowercase columns)."""
+    texts = mention_texts(df["title"].fillna("").astype(str), df["summary"].fillna("").astype(str))
+    return model.predict(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit topics on the archive and write them to the sheet.")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--csv", help="read/write a local CSV instead of the Google Sheet")
+    parser.add_argument("--chunk", type=int, default=2000, help="rows per partial_fit")
+    args = parser.parse_args()
+
+    if args.csv:
+        df = pd.read_csv(args.csv)
+    else:
+        from helb_data import open_sheet
+
+        sh, worksheet = open_sheet()
+        df = pd.DataFrame(worksheet.get_all_records())
+
+    model = TopicModel()
+    texts = mention_texts(df["title"].fillna("").astype(str), df["summary"].fillna("").astype(str))
+    for start in range(0, len(texts), args.chunk):
+        model.partial_fit(texts[start:start + args.chunk])
+    df["topic"] = topic_column(df, model)
+    model.blank = Counter(c for c in model.predict_clusters(texts) if c not in model.labels)
+    model.save()
+    print(f"✅ Topics: {df['topic'].value_counts().to_dict()}")
+
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+    else:
+        from helb_data import write_version_marker
+
+        worksheet.update([df.columns.tolist()] + df.fillna("").values.tolist())
+        last_link = str(df["link"].iloc[-1]) if len(df) else ""
+        write_version_marker(sh, len(df), last_link, rewritten=True)
+    print("🎉 Done.")
+
+
+if __name__ == "__main__":
+    run_main("topics")